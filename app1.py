@@ -1,52 +1,43 @@
 import streamlit as st
 import pandas as pd
+import hashlib
 import json
-import requests
 import io
+import os
+import threading
+from contextlib import contextmanager, redirect_stdout
 import matplotlib.pyplot as plt
 import seaborn as sns
-import matplotlib.font_manager as fm
-import warnings
 
-# Configure matplotlib for Chinese font support
-def setup_chinese_font():
-    """Setup Chinese font for matplotlib"""
-    try:
-        # Get available fonts
-        available_fonts = [f.name for f in fm.fontManager.ttflist]
-        
-        # Try to find a Chinese font
-        chinese_fonts = [
-            'SimHei',  # Windows
-            'STHeiti',  # macOS
-            'PingFang SC',  # macOS
-            'Hiragino Sans GB',  # macOS
-            'WenQuanYi Micro Hei',  # Linux
-            'Noto Sans CJK SC',  # Linux
-            'DejaVu Sans',  # Fallback
-        ]
-        
-        found_font = None
-        for font in chinese_fonts:
-            if font in available_fonts:
-                found_font = font
-                break
-        
-        if found_font:
-            plt.rcParams['font.sans-serif'] = [found_font]
-            plt.rcParams['axes.unicode_minus'] = False
-            plt.rcParams['font.family'] = 'sans-serif'
-        else:
-            # If no Chinese font found, suppress the warnings
-            warnings.filterwarnings('ignore', category=UserWarning, module='matplotlib')
-            plt.rcParams['axes.unicode_minus'] = False
-        
-    except Exception:
-        # Suppress font warnings
-        warnings.filterwarnings('ignore', category=UserWarning, module='matplotlib')
-
-# Setup font when module loads
-setup_chinese_font()
+import data_cleaning
+from dataset_summary import DatasetSummary
+from exec_memory import enable_copy_on_write, frame_for_execution
+from figure_capture import collect_figures
+from figure_isolation import isolated_figures, isolation_supported
+from font_config import apply_cjk_font, cjk_font_rc, warm_up_fonts_async
+from ingest import columnar_type, ingest, read_columnar
+from llm_client import DeepseekClient
+from exec_cache import ExecutionCache, ExecutionOutput
+from memory_cache import MemoryLRUCache, object_size
+
+# Without per-thread pyplot isolation, executions share the global figures and run one at a time
+_SERIAL_EXEC_LOCK = threading.Lock()
+
+def figure_scope():
+    """Per-thread pyplot state with the Chinese font applied, so sessions never see each other's figures"""
+    if isolation_supported():
+        return isolated_figures(cjk_font_rc())
+    return _serial_figures()
+
+@contextmanager
+def _serial_figures():
+    """Fallback for matplotlib versions without isolation: serialize executions on the global state"""
+    with _SERIAL_EXEC_LOCK:
+        apply_cjk_font()
+        yield
+
+# Resolve and warm up the font in the background instead of on the first query
+warm_up_fonts_async()
 
 # Initialize session state
 if 'api_key' not in st.session_state:
@@ -64,65 +55,29 @@ if 'execution_results' not in st.session_state:
 # Deepseek API configuration
 DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
 
+# CSV/xlsx uploads at least this large are ingested chunk-by-chunk with a progress bar
+STREAMING_MIN_BYTES = 20 * 1024 * 1024
+# Row cap for streamed uploads; larger files are randomly sampled down to this size (INGEST_MAX_ROWS, 0 = no cap)
+STREAMING_MAX_ROWS = int(os.getenv("INGEST_MAX_ROWS", "0")) or None
+
+# Figures left open by generated code are encoded in memory with these settings
+FIGURE_FORMAT = "png"
+FIGURE_DPI = 100
+
+# Memory budget for cleaned uploads kept across reruns; least recently used datasets are dropped first
+DATA_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Memory budget for cached execution results (output text and encoded figures)
+EXEC_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Cached frames are shared across reruns, so generated code gets a copy-on-write view
+enable_copy_on_write()
+
 def clean_dataframe(df):
     """Clean dataframe for better compatibility with Streamlit"""
-    df_clean = df.copy()
-    
-    # Clean column names
-    df_clean.columns = [str(col).strip().replace('\n', ' ').replace('\r', ' ') for col in df_clean.columns]
-    
-    # Process each column
-    for col in df_clean.columns:
-        try:
-            column_data = df_clean[col]
-            
-            if column_data.dtype == 'object':
-                def safe_str_convert(x):
-                    if pd.isna(x) or x is None:
-                        return ''
-                    elif isinstance(x, (list, dict, tuple)):
-                        return str(x)
-                    else:
-                        return str(x)
-                
-                df_clean[col] = column_data.apply(safe_str_convert)
-                
-            elif column_data.dtype in ['int64', 'float64', 'int32', 'float32']:
-                df_clean[col] = column_data.fillna(0)
-                
-            elif 'datetime' in str(column_data.dtype):
-                df_clean[col] = column_data.astype(str)
-                
-            else:
-                df_clean[col] = column_data.astype(str)
-                
-        except Exception as e:
-            st.warning(f"Converting column '{col}' to string due to data type issues: {str(e)}")
-            df_clean[col] = df_clean[col].apply(lambda x: str(x) if x is not None else '')
-    
-    # Final PyArrow compatibility check
-    for col in df_clean.columns:
-        try:
-            import pyarrow as pa
-            pa.array(df_clean[col])
-        except Exception:
-            def ultra_clean(x):
-                if x is None or pd.isna(x):
-                    return ''
-                try:
-                    s = str(x)
-                    s = s.replace('\x00', '').replace('\n', ' ').replace('\r', ' ')
-                    s = ''.join(char for char in s if ord(char) >= 32 or char in '\t\n\r')
-                    return s[:100]  # Limit length
-                except:
-                    return ''
-            
-            df_clean[col] = df_clean[col].apply(ultra_clean)
-    
-    # Remove completely empty columns
-    df_clean = df_clean.dropna(axis=1, how='all')
-    
-    return df_clean
+    def warn_column(col, error):
+        st.warning(f"Converting column '{col}' to string due to data type issues: {str(error)}")
+
+    return data_cleaning.clean_dataframe(df, stringify_other=True, on_column_error=warn_column)
 
 def load_data(uploaded_file):
     """Load data from various file formats"""
@@ -132,6 +87,12 @@ def load_data(uploaded_file):
     file_extension = uploaded_file.name.split('.')[-1].lower()
 
     try:
+        if file_extension in ('csv', 'xlsx') and uploaded_file.size >= STREAMING_MIN_BYTES:
+            return load_data_streaming(uploaded_file, file_extension)
+
+        if columnar_type(uploaded_file.name) is not None:
+            return load_data_columnar(uploaded_file)
+
         if file_extension == 'csv':
             df = pd.read_csv(uploaded_file)
         elif file_extension == 'xlsx':
@@ -139,7 +100,7 @@ def load_data(uploaded_file):
         elif file_extension == 'json':
             df = pd.read_json(uploaded_file)
         else:
-            st.error('Unsupported file format. Please upload CSV, Excel, or JSON file.')
+            st.error('Unsupported file format. Please upload CSV, Excel, JSON, Parquet, or Feather file.')
             return None
         
         # Clean data for better compatibility
@@ -149,44 +110,85 @@ def load_data(uploaded_file):
         st.error(f'Error loading file: {str(e)}')
         return None
 
-def get_data_summary(df):
-    """Generate a summary of the dataset"""
-    buffer = io.StringIO()
-    df.info(buf=buffer)
-    info_str = buffer.getvalue()
-
-    summary = {
-        'shape': df.shape,
-        'columns': df.columns.tolist(),
-        'dtypes': df.dtypes.astype(str).to_dict(),
-        'info': info_str,
-        'description': df.describe().to_dict()
-    }
+def load_data_streaming(uploaded_file, file_extension):
+    """Ingest a large upload in chunks, reporting progress in the UI"""
+    progress_bar = st.progress(0.0, text="Loading data...")
+    result = ingest(
+        uploaded_file,
+        file_extension,
+        max_rows=STREAMING_MAX_ROWS,
+        stringify_other=True,
+        progress=lambda fraction, _: progress_bar.progress(fraction, text=f"Loading data... {fraction:.0%}"),
+    )
+    progress_bar.empty()
+
+    if result.sampled:
+        st.info(f"The file has {result.total_rows:,} rows; exploring a random sample of {len(result.df):,} rows.")
+    return result.df
+
+def load_data_columnar(uploaded_file):
+    """Read a Parquet or Feather upload straight into Arrow, skipping row-by-row parsing"""
+    result = read_columnar(
+        uploaded_file,
+        columnar_type(uploaded_file.name),
+        max_rows=STREAMING_MAX_ROWS,
+        stringify_other=True,
+    )
+    if result.sampled:
+        st.info(f"The file has {result.total_rows:,} rows; exploring a random sample of {len(result.df):,} rows.")
+    return result.df
+
+@st.cache_resource
+def get_data_cache():
+    """Cleaned uploads and their summaries, shared across reruns and keyed by content hash"""
+    return MemoryLRUCache(DATA_CACHE_MAX_BYTES, sizeof=lambda summary: object_size(summary.df))
+
+def upload_version(uploaded_file):
+    """Content hash of an upload, computed once per uploaded file rather than on every rerun"""
+    file_id = getattr(uploaded_file, 'file_id', None)
+    cached = st.session_state.get('upload_version')
+    if file_id is None or cached is None or cached[0] != file_id:
+        cached = (file_id, hashlib.sha256(uploaded_file.getvalue()).hexdigest())
+        st.session_state.upload_version = cached
+    return cached[1]
+
+def load_dataset(uploaded_file):
+    """Parse, clean and summarize an upload once per content hash; reruns reuse the cached result"""
+    data_version = upload_version(uploaded_file)
+    cache = get_data_cache()
+    summary = cache.get(data_version)
+    if summary is None:
+        df = load_data(uploaded_file)
+        if df is None:
+            return None
+        summary = DatasetSummary(df, data_version)
+        cache.put(data_version, summary)
     return summary
 
-def call_deepseek_api(messages):
-    """Call Deepseek API"""
-    headers = {
-        "Authorization": f"Bearer {st.session_state.api_key}",
-        "Content-Type": "application/json"
-    }
+def get_data_summary(df, data_version=None):
+    """Generate a summary of the dataset, reusing the cached one while the data version is unchanged"""
+    summary = get_data_cache().get(data_version) if data_version is not None else None
+    if summary is None:
+        summary = DatasetSummary(df, data_version)
 
-    data = {
-        "model": "deepseek-chat",
-        "messages": messages
-    }
+    return summary.as_dict(include_info=True)
+
+@st.cache_resource
+def get_llm_client(api_key):
+    """Pooled HTTP client shared across reruns and sessions (one per API key)"""
+    return DeepseekClient(api_key, DEEPSEEK_API_URL)
 
+def call_deepseek_api(messages):
+    """Call Deepseek API"""
     try:
-        response = requests.post(DEEPSEEK_API_URL, headers=headers, json=data)
-        response.raise_for_status()
-        return response.json()
+        return get_llm_client(st.session_state.api_key).chat(messages)
     except Exception as e:
         st.error(f"Error calling Deepseek API: {str(e)}")
         return None
 
-def analyze_with_ai(df, user_query, conversation_history=None):
+def analyze_with_ai(df, user_query, conversation_history=None, data_version=None):
     """Use Deepseek to analyze the data based on user query"""
-    data_summary = get_data_summary(df)
+    data_summary = get_data_summary(df, data_version)
 
     system_prompt = """You are a data analysis expert. Analyze the provided data according to the user's query.
     Generate Python code using pandas, matplotlib, and seaborn for visualization if needed.
@@ -240,34 +242,55 @@ def analyze_with_ai(df, user_query, conversation_history=None):
         st.error(f"Error in AI analysis: {str(e)}")
         return None
 
-def execute_code(code, df):
-    """Execute code safely and return output"""
+@st.cache_resource
+def get_execution_cache():
+    """Results of successful executions, keyed by dataset version and normalized code"""
+    return ExecutionCache(EXEC_CACHE_MAX_BYTES)
+
+def execute_code(code, df, data_version=None):
+    """Execute code safely and return its output, success flag and the figures it drew"""
+    # Re-running unchanged code on the same data replays the cached result instead of executing it
+    cache_key = ExecutionCache.make_key(data_version, code, FIGURE_FORMAT, FIGURE_DPI) if data_version else None
+    cached = get_execution_cache().get(cache_key) if cache_key else None
+    if cached is not None:
+        for message in cached.messages:
+            st.write(message)
+        return cached.output, True, cached.figures
+
     try:
-        # Setup font for execution
-        setup_chinese_font()
-        
         # Create a safe context for code execution
+        messages = []
+        def show(*args):
+            messages.append(' '.join(str(arg) for arg in args))
+            st.write(messages[-1])
+
         local_vars = {
             'pd': pd,
             'plt': plt,
             'sns': sns,
-            'df': df,
-            'print': lambda *args: st.write(' '.join(str(arg) for arg in args))
+            'df': frame_for_execution(df),
+            'print': show
         }
         
         # Capture output
-        from contextlib import redirect_stdout
         output_buffer = io.StringIO()
         
-        with redirect_stdout(output_buffer):
-            exec(code, globals(), local_vars)
-        
+        # Figures and rcParams are private to this run; other sessions' figures are left alone
+        with figure_scope():
+            with redirect_stdout(output_buffer):
+                exec(code, globals(), local_vars)
+
+            # Encode every figure the code left open (the scope closes them on exit)
+            figures = collect_figures(FIGURE_FORMAT, FIGURE_DPI)
+
         output = output_buffer.getvalue()
-        return output, True
+        if cache_key:
+            get_execution_cache().put(cache_key, ExecutionOutput(output, figures, messages=tuple(messages)))
+        return output, True, figures
     except Exception as e:
         error_msg = f"Error executing code: {str(e)}"
         st.error(error_msg)
-        return error_msg, False
+        return error_msg, False, []
 
 def display_dataframe(df):
     """Display dataframe with multiple fallback methods"""
@@ -327,21 +350,27 @@ def main():
             st.session_state.execution_results = []
             if hasattr(st.session_state, 'latest_followup'):
                 del st.session_state.latest_followup
+            # Forget this session's upload marker only: the data and execution caches are keyed by
+            # file content and shared with other sessions that uploaded the same file, so their
+            # entries are left for the LRU budget to age out
+            st.session_state.pop('upload_version', None)
             st.rerun()
 
     st.write("Upload your data file and ask questions about it!")
 
     # File upload
     uploaded_file = st.file_uploader(
-        "Choose a file (CSV, Excel, or JSON)",
-        type=['csv', 'xlsx', 'json']
+        "Choose a file (CSV, Excel, JSON, Parquet, or Feather)",
+        type=['csv', 'xlsx', 'json', 'parquet', 'feather', 'arrow']
     )
 
     if uploaded_file is not None:
-        # Load data
-        df = load_data(uploaded_file)
+        # Load data (parsed once per upload content, then served from the cache on reruns)
+        summary = load_dataset(uploaded_file)
+
+        if summary is not None:
+            df, data_version = summary.df, summary.version
 
-        if df is not None:
             # Use tabs to organize content
             tab1, tab2, tab3 = st.tabs(["📊 Data Overview", "💬 Analysis", "📋 History"])
             
@@ -405,7 +434,7 @@ def main():
                 # Main analysis
                 if analyze_button and user_query:
                     with st.spinner("Analyzing data..."):
-                        analysis_result = analyze_with_ai(df, user_query, st.session_state.conversation_history)
+                        analysis_result = analyze_with_ai(df, user_query, st.session_state.conversation_history, data_version)
 
                         if analysis_result:
                             # Display analysis results
@@ -418,16 +447,14 @@ def main():
                             
                             # Execute code
                             st.write("### Execution Results")
-                            output, success = execute_code(analysis_result["code"], df)
+                            output, success, figures = execute_code(analysis_result["code"], df, data_version)
                             
                             if success and output:
                                 st.text(output)
                             
-                            # Show visualization if needed
-                            if analysis_result.get("visualization_needed", False):
-                                plt.figure(figsize=(10, 6))
-                                st.pyplot(plt)
-                                plt.close()
+                            # Show the figures the code drew
+                            for figure in figures:
+                                st.image(figure.data)
                             
                             # Add to conversation history
                             st.session_state.conversation_history.append({
@@ -450,7 +477,7 @@ def main():
                                 
                                 if followup_submit and followup_query:
                                     with st.spinner("Processing follow-up..."):
-                                        followup_result = analyze_with_ai(df, followup_query, st.session_state.conversation_history)
+                                        followup_result = analyze_with_ai(df, followup_query, st.session_state.conversation_history, data_version)
                                         
                                         if followup_result:
                                             st.write("#### Follow-up Analysis")
@@ -461,16 +488,14 @@ def main():
                                             
                                             # Execute follow-up code
                                             st.write("#### Follow-up Results")
-                                            followup_output, followup_success = execute_code(followup_result["code"], df)
+                                            followup_output, followup_success, followup_figures = execute_code(followup_result["code"], df, data_version)
                                             
                                             if followup_success and followup_output:
                                                 st.text(followup_output)
                                             
-                                            # Show visualization if needed
-                                            if followup_result.get("visualization_needed", False):
-                                                plt.figure(figsize=(10, 6))
-                                                st.pyplot(plt)
-                                                plt.close()
+                                            # Show the figures the code drew
+                                            for figure in followup_figures:
+                                                st.image(figure.data)
                                             
                                             # Add follow-up to history
                                             st.session_state.conversation_history.append({
@@ -494,15 +519,14 @@ def main():
                                 
                                 if st.button("Execute Modified Code", key="execute_modified"):
                                     st.write("#### Modified Code Results")
-                                    modified_output, modified_success = execute_code(edited_code, df)
+                                    modified_output, modified_success, modified_figures = execute_code(edited_code, df, data_version)
                                     
                                     if modified_success and modified_output:
                                         st.text(modified_output)
                                     
                                     # Show visualization
-                                    plt.figure(figsize=(10, 6))
-                                    st.pyplot(plt)
-                                    plt.close()
+                                    for figure in modified_figures:
+                                        st.image(figure.data)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
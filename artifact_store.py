@@ -0,0 +1,113 @@
+"""
+图表存储：每张图以内容的SHA-256命名保存在临时目录中，相同的图只保存一份，
+超过TTL或总容量时按LRU淘汰；进程内执行时把savefig写入的文件截获到内存
+"""
+
+import contextlib
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from typing import Dict, Iterator, Optional
+
+from disk_cache import DiskLRUCache
+
+DEFAULT_ARTIFACT_DIR = os.path.join(tempfile.gettempdir(), "oidiscover-artifacts")
+
+
+class ArtifactStore:
+    """内容寻址的图表存储，返回可直接交给gr.Image的文件路径"""
+
+    def __init__(self, directory=DEFAULT_ARTIFACT_DIR, max_bytes: int = 256 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = None):
+        self.store = DiskLRUCache(directory, max_bytes, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def key_for(data: bytes, extension: str = ".png") -> str:
+        return hashlib.sha256(data).hexdigest() + extension
+
+    def put(self, data: bytes, extension: str = ".png") -> str:
+        """保存图表并返回文件路径；相同内容已存在时直接复用"""
+        key = self.key_for(data, extension)
+        path = self.store.get(key)
+        if path is None:
+            path = self.store.put_bytes(key, data)
+        return str(path)
+
+    def get(self, key: str) -> Optional[str]:
+        """按key_for返回的键查找已保存的图表，不存在或已过期时返回None"""
+        path = self.store.get(key)
+        return None if path is None else str(path)
+
+    def stats(self) -> Dict[str, float]:
+        """去重命中次数（hits）、条目数和磁盘占用"""
+        return self.store.stats()
+
+    def clear(self):
+        self.store.clear()
+
+
+_capture = threading.local()
+_savefig_lock = threading.Lock()
+# 处于capture_savefig中的线程数；降为0时恢复原来的Figure.savefig
+_active_captures = 0
+_original_savefig = None
+
+
+def _install_savefig_hook():
+    """替换Figure.savefig：当前线程处于capture_savefig中时，写文件改为写入内存"""
+    global _active_captures, _original_savefig
+    with _savefig_lock:
+        _active_captures += 1
+        if _active_captures > 1:
+            return
+        from matplotlib.figure import Figure
+
+        original = _original_savefig = Figure.savefig
+
+        def savefig(self, fname, *args, **kwargs):
+            saved = getattr(_capture, "saved", None)
+            if saved is None or not isinstance(fname, (str, os.PathLike)):
+                return original(self, fname, *args, **kwargs)
+
+            name = os.path.basename(os.fspath(fname))
+            if kwargs.get("format") is None:
+                extension = os.path.splitext(name)[1][1:]
+                if extension:
+                    kwargs["format"] = extension
+            buffer = io.BytesIO()
+            original(self, buffer, *args, **kwargs)
+            saved[name] = buffer.getvalue()
+
+        Figure.savefig = savefig
+
+
+def _remove_savefig_hook():
+    global _active_captures, _original_savefig
+    with _savefig_lock:
+        _active_captures -= 1
+        if _active_captures:
+            return
+        from matplotlib.figure import Figure
+
+        Figure.savefig = _original_savefig
+        _original_savefig = None
+
+
+@contextlib.contextmanager
+def capture_savefig() -> Iterator[Dict[str, bytes]]:
+    """
+    在with块内，当前线程通过savefig保存到文件的图改为保存在返回的字典中（文件名 -> 内容）
+
+    其他线程的savefig不受影响，也不会在工作目录下留下文件；最后一个with块退出后恢复原来的savefig。
+    """
+    _install_savefig_hook()
+    saved: Dict[str, bytes] = {}
+    previous = getattr(_capture, "saved", None)
+    _capture.saved = saved
+    try:
+        yield saved
+    finally:
+        _capture.saved = previous
+        _remove_savefig_hook()
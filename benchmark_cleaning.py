@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+数据清理性能基准测试
+
+用法:
+    python benchmark_cleaning.py                 # 10k / 100k / 1M 行
+    python benchmark_cleaning.py --rows 50000    # 指定行数
+    python benchmark_cleaning.py --legacy        # 同时对比旧的逐元素实现
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning import clean_dataframe
+
+
+def make_frame(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """生成带缺失值和混合类型的测试数据"""
+    rng = np.random.default_rng(seed)
+    categories = np.array(['电子产品', '服装', '食品', '书籍', '家具'], dtype=object)
+    regions = np.array(['北京', '上海', '广州', '深圳', '杭州'], dtype=object)
+
+    price = rng.normal(500, 200, n_rows).round(2)
+    price[rng.random(n_rows) < 0.05] = np.nan
+
+    category = categories[rng.integers(0, len(categories), n_rows)]
+    category[rng.random(n_rows) < 0.05] = None
+
+    # 混合类型列：数字、字符串和字典混在一起
+    mixed = rng.integers(0, 1000, n_rows).astype(object)
+    mixed[::7] = '备注'
+    mixed[::101] = {'k': 1}
+
+    return pd.DataFrame({
+        '日期': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D'),
+        '产品类别': category,
+        '地区': regions[rng.integers(0, len(regions), n_rows)],
+        '单价': price,
+        '数量': rng.integers(1, 6, n_rows),
+        '订单号 ': np.char.add('SO', rng.integers(0, 10**8, n_rows).astype(str)).astype(object),
+        '备注': mixed,
+    })
+
+
+def legacy_clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """旧版app1.clean_dataframe的逐元素实现（仅用于对比）"""
+    df_clean = df.copy()
+    df_clean.columns = [str(col).strip().replace('\n', ' ').replace('\r', ' ') for col in df_clean.columns]
+
+    for col in df_clean.columns:
+        column_data = df_clean[col]
+        if column_data.dtype == 'object':
+            df_clean[col] = column_data.apply(lambda x: '' if pd.isna(x) or x is None else str(x))
+        elif column_data.dtype in ['int64', 'float64', 'int32', 'float32']:
+            df_clean[col] = column_data.fillna(0)
+        else:
+            df_clean[col] = column_data.astype(str)
+
+    for col in df_clean.columns:
+        import pyarrow as pa
+        pa.array(df_clean[col])
+
+    return df_clean.dropna(axis=1, how='all')
+
+
+def measure(fn, df: pd.DataFrame, repeat: int) -> float:
+    """返回多次运行中最快一次的耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据清理性能基准测试")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--legacy', action='store_true', help='同时运行旧的逐元素实现')
+    args = parser.parse_args()
+
+    print(f"{'行数':>10} {'实现':>8} {'耗时(s)':>10} {'行/秒':>14}")
+    for n_rows in args.rows:
+        df = make_frame(n_rows)
+
+        runs = [('向量化', lambda d: clean_dataframe(d, stringify_other=True))]
+        if args.legacy:
+            runs.append(('旧实现', legacy_clean_dataframe))
+
+        for label, fn in runs:
+            elapsed = measure(fn, df, args.repeat)
+            print(f"{n_rows:>10,} {label:>8} {elapsed:>10.3f} {n_rows / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
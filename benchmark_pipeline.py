@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+端到端性能基准测试（完全离线）
+
+在本地启动模拟的chat completions服务，用不同规模的合成数据集依次测量一次分析的各个阶段：
+读取文件、数据清理、数据摘要、提示词构建、LLM往返、代码执行、图表编码，
+输出每个阶段的耗时（多次运行取中位数）和峰值内存增量。
+使用本地执行进程池（--workers）时图在工作进程中编码，编码耗时计入代码执行。
+
+用法:
+    python benchmark_pipeline.py                           # 1k / 10k / 100k 行
+    python benchmark_pipeline.py --rows 50000 --latency 0.5 --token-delay 0.01
+    python benchmark_pipeline.py --output bench.json       # 保存结果
+    python benchmark_pipeline.py --baseline bench.json     # 与保存的结果对比，变慢超过容差时退出码为1
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from create_test_data import write_dataset
+from exec_memory import PeakRSSMonitor, current_rss
+from stub_llm_server import StubLLMServer
+
+STAGES = ("读取文件", "数据清理", "数据摘要", "提示词构建", "LLM往返", "代码执行", "图表编码")
+
+# 模拟服务收到含“分布”的问题时返回画图代码
+QUERY = "分析单价的分布"
+
+MB = 1024 * 1024
+
+
+def dataset_file(data_dir: str, n_rows: int, fmt: str) -> str:
+    """生成（或复用已生成的）合成数据文件"""
+    path = os.path.join(data_dir, f"bench_{n_rows}.{fmt}")
+    if not os.path.exists(path):
+        write_dataset(path, n_rows, fmt, null_ratio=0.05)
+    return path
+
+
+def read_file(path: str) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, memory_map=True)
+    return pd.read_csv(path) if path.endswith(".csv") else pd.read_excel(path)
+
+
+class StageTimer:
+    """记录每个阶段的耗时和峰值内存增量"""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.peak_mb: Dict[str, float] = {}
+
+    def run(self, stage: str, fn: Callable, *args):
+        monitor = PeakRSSMonitor()
+        started = time.perf_counter()
+        with monitor:
+            result = fn(*args)
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - started
+        self.peak_mb[stage] = max(self.peak_mb.get(stage, 0.0), monitor.report.peak_increase / MB)
+        return result
+
+
+def run_pipeline(app, path: str) -> StageTimer:
+    """对一个数据文件完整运行一次分析，按阶段计时"""
+    import figure_capture
+
+    timer = StageTimer()
+    explorer = app.DataExplorer()
+
+    df = timer.run("读取文件", read_file, path)
+    explorer.df = timer.run("数据清理", explorer._clean_dataframe, df)
+    del df
+
+    def summarize():
+        explorer._generate_data_overview()
+        return explorer.summary.as_dict(include_info=True)
+
+    timer.run("数据摘要", summarize)
+    messages = timer.run("提示词构建", explorer._build_messages, QUERY, [])
+
+    def round_trip():
+        return "".join(app.LLM_CLIENT.stream_chat(
+            messages, model=app.DEEPSEEK_MODEL, temperature=app.DEEPSEEK_TEMPERATURE))
+
+    response = timer.run("LLM往返", round_trip)
+    code = json.loads(app.extract_json_block(response))["code"]
+
+    # 图在执行结束时编码：单独统计编码耗时，从执行耗时中扣除
+    encode_seconds = []
+    original_encode = figure_capture.encode_figure
+
+    def timed_encode(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original_encode(*args, **kwargs)
+        finally:
+            encode_seconds.append(time.perf_counter() - started)
+
+    figure_capture.encode_figure = timed_encode
+    try:
+        result = timer.run("代码执行", explorer._execute_code_locally, code)
+    finally:
+        figure_capture.encode_figure = original_encode
+    if not result.ok:
+        raise RuntimeError(f"代码执行失败: {result.output}")
+
+    timer.run("图表编码", explorer._store_figures, result.figures)
+    timer.seconds["代码执行"] -= sum(encode_seconds)
+    timer.seconds["图表编码"] += sum(encode_seconds)
+
+    explorer.close()
+    return timer
+
+
+def benchmark(app, path: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    """重复运行，每个阶段取耗时中位数和最大的峰值内存增量"""
+    timers = [run_pipeline(app, path) for _ in range(repeat)]
+    return {
+        stage: {
+            "seconds": statistics.median(timer.seconds[stage] for timer in timers),
+            "peak_mb": max(timer.peak_mb[stage] for timer in timers),
+        }
+        for stage in STAGES
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_seconds: float) -> List[str]:
+    """列出比基准慢超过容差的阶段（忽略耗时都很短的阶段）"""
+    regressions = []
+    for rows, stages in results["scales"].items():
+        for stage, current in stages.items():
+            previous = baseline.get("scales", {}).get(rows, {}).get(stage)
+            if previous is None or current["seconds"] < min_seconds:
+                continue
+            if current["seconds"] > previous["seconds"] * (1 + tolerance):
+                regressions.append(
+                    f"{int(rows):,}行 {stage}: {previous['seconds']:.3f}s -> {current['seconds']:.3f}s"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端性能基准测试（离线）")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--format', choices=['xlsx', 'csv', 'parquet'], default='xlsx')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.2, help='模拟服务的首个token延迟（秒）')
+    parser.add_argument('--token-delay', type=float, default=0.0, help='模拟服务流式分块之间的间隔（秒）')
+    parser.add_argument('--workers', default='0', help='LOCAL_EXEC_WORKERS，0为进程内执行')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'oidiscover-bench'))
+    parser.add_argument('--output', help='把结果保存为JSON')
+    parser.add_argument('--baseline', help='与之前保存的JSON结果对比')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='允许比基准慢的比例')
+    parser.add_argument('--min-seconds', type=float, default=0.01, help='耗时低于此值的阶段不做对比')
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    server = StubLLMServer(latency=args.latency, token_delay=args.token_delay).start()
+
+    # 在导入应用前配置：使用模拟服务，关闭各级缓存，不使用沙箱
+    os.environ.update({
+        "DEEPSEEK_API_URL": server.url,
+        "DEEPSEEK_API_KEY": "benchmark",
+        "SANDBOX_BACKEND": "none",
+        "LOCAL_EXEC_WORKERS": args.workers,
+        "RESPONSE_CACHE_MAX_MB": "0",
+        "EXEC_CACHE_MAX_MB": "0",
+        "DATASET_CACHE_DIR": os.path.join(args.data_dir, "dataset-cache"),
+        "ARTIFACT_DIR": os.path.join(args.data_dir, "artifacts"),
+    })
+    import gradio_app as app
+
+    if app.EXEC_POOL is not None:
+        app.EXEC_POOL.start()
+
+    results = {"format": args.format, "latency": args.latency, "scales": {}}
+    try:
+        paths = {n_rows: dataset_file(args.data_dir, n_rows, args.format) for n_rows in args.rows}
+        # 预热一次（导入绘图模块、加载字体等一次性开销），不计入结果
+        run_pipeline(app, paths[min(paths)])
+
+        print(f"{'行数':>10} {'阶段':<8} {'耗时(ms)':>10} {'峰值内存(+MB)':>14}")
+        for n_rows, path in paths.items():
+            stages = benchmark(app, path, args.repeat)
+            results["scales"][str(n_rows)] = stages
+            for stage in STAGES:
+                print(f"{n_rows:>10,} {stage:<8} {stages[stage]['seconds'] * 1000:>10.1f} "
+                      f"{stages[stage]['peak_mb']:>14.1f}")
+            total = sum(stage["seconds"] for stage in stages.values())
+            print(f"{n_rows:>10,} {'合计':<8} {total * 1000:>10.1f}")
+        print(f"🧠 进程内存: {current_rss() / MB:.1f} MB")
+    finally:
+        server.stop()
+        if app.EXEC_POOL is not None:
+            app.EXEC_POOL.shutdown()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        if regressions:
+            print(f"❌ 以下阶段比基准慢超过 {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"   - {line}")
+            sys.exit(1)
+        print(f"✅ 所有阶段均在基准的 {args.tolerance:.0%} 容差内")
+
+
+if __name__ == "__main__":
+    main()
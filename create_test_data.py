@@ -1,79 +1,207 @@
-import pandas as pd
+#!/usr/bin/env python3
+"""
+测试数据生成器：向量化、可复现（固定随机种子），按块生成并写出，内存占用与总行数无关
+
+用法:
+    python create_test_data.py                                     # 约2千行的test_sales_data.xlsx
+    python create_test_data.py --rows 1000000 --format parquet
+    python create_test_data.py --rows 100000000 --format csv --wide-cols 50 --text-cols 5 --null-ratio 0.05
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, Iterator, Optional
+
 import numpy as np
-from datetime import datetime, timedelta
+import pandas as pd
+
+# 产品类别及其单价分布（均值, 标准差）
+CATEGORIES = np.array(['电子产品', '服装', '食品', '书籍', '家具'], dtype=object)
+PRICE_MEAN = np.array([800, 200, 50, 80, 1200], dtype=float)
+PRICE_STD = np.array([300, 80, 20, 30, 500], dtype=float)
+REGIONS = np.array(['北京', '上海', '广州', '深圳', '杭州'], dtype=object)
+
+START_DATE = np.datetime64('2023-01-01')
+DAYS = 365
+
+DEFAULT_ROWS = 2000
+DEFAULT_CHUNK_ROWS = 100_000
+# xlsx单个工作表最多1048576行（含表头）
+XLSX_MAX_ROWS = 1_048_575
+
+# 可以设置缺失值的列（日期和类别列始终完整）
+_NULLABLE_COLUMNS = ('单价', '数量', '总金额', '地区', '客户年龄')
+
+
+def generate_chunk(start: int, n_rows: int, total_rows: int, seed: int = 42,
+                   wide_cols: int = 0, text_cols: int = 0, text_cardinality: int = 100_000,
+                   null_ratio: float = 0.0) -> pd.DataFrame:
+    """
+    生成第start行起的n_rows行销售数据
+
+    每块使用由(seed, start)派生的独立随机数，结果只取决于种子和分块方式。
+    wide_cols为额外的数值列，text_cols为取值数量为text_cardinality的高基数文本列。
+    """
+    rng = np.random.default_rng([seed, start])
+    rows = np.arange(start, start + n_rows)
+
+    # 日期在一年内均匀递增，与原先每天若干条记录的分布一致
+    dates = START_DATE + (rows * DAYS // max(total_rows, 1)).astype('timedelta64[D]')
+    category = rng.integers(0, len(CATEGORIES), n_rows)
+    price = np.maximum(10, rng.normal(PRICE_MEAN[category], PRICE_STD[category])).round(2)
+    quantity = rng.integers(1, 6, n_rows)
+
+    columns: Dict[str, np.ndarray] = {
+        '日期': dates,
+        '产品类别': CATEGORIES[category],
+        '单价': price,
+        '数量': quantity,
+        '总金额': (price * quantity).round(2),
+        '地区': REGIONS[rng.integers(0, len(REGIONS), n_rows)],
+        '客户年龄': rng.integers(18, 66, n_rows),
+    }
+    for i in range(wide_cols):
+        columns[f'指标_{i + 1}'] = rng.normal(100, 25, n_rows).round(3)
+    for i in range(text_cols):
+        ids = rng.integers(0, text_cardinality, n_rows)
+        columns[f'标签_{i + 1}'] = np.char.add(f'T{i + 1}-', ids.astype(str)).astype(object)
+
+    if null_ratio > 0:
+        nullable = list(_NULLABLE_COLUMNS) + [name for name in columns if name.startswith(('指标_', '标签_'))]
+        for name in nullable:
+            values = columns[name]
+            mask = rng.random(n_rows) < null_ratio
+            # 数值列统一为float，保证各块的列类型一致
+            values = values.astype(float) if values.dtype.kind in 'iuf' else values.copy()
+            values[mask] = np.nan if values.dtype.kind == 'f' else None
+            columns[name] = values
+
+    return pd.DataFrame(columns)
+
+
+def generate_chunks(total_rows: int, chunk_rows: int = DEFAULT_CHUNK_ROWS, **options) -> Iterator[pd.DataFrame]:
+    """按块依次生成total_rows行数据"""
+    for start in range(0, total_rows, chunk_rows):
+        yield generate_chunk(start, min(chunk_rows, total_rows - start), total_rows, **options)
+
 
-def create_test_excel():
+class _Stats:
+    """写出过程中累计的数据概览，不保留已写出的数据"""
+
+    def __init__(self):
+        self.rows = 0
+        self.sales = 0.0
+        self.first_date = None
+        self.last_date = None
+
+    def update(self, chunk: pd.DataFrame):
+        self.rows += len(chunk)
+        self.sales += float(chunk['总金额'].sum())
+        if len(chunk):
+            self.first_date = self.first_date or chunk['日期'].iloc[0]
+            self.last_date = chunk['日期'].iloc[-1]
+
+
+def write_dataset(path: str, total_rows: int, fmt: Optional[str] = None,
+                  chunk_rows: int = DEFAULT_CHUNK_ROWS, **options) -> _Stats:
+    """按块生成并写出数据文件（xlsx/csv/parquet），返回数据概览"""
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    chunks = generate_chunks(total_rows, chunk_rows, **options)
+    stats = _Stats()
+
+    if fmt == 'csv':
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=i == 0, index=False)
+                stats.update(chunk)
+
+    elif fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, schema=writer.schema if writer else None,
+                                             preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                stats.update(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    elif fmt == 'xlsx':
+        if total_rows > XLSX_MAX_ROWS:
+            raise ValueError(f"xlsx最多{XLSX_MAX_ROWS:,}行，更大的数据请使用csv或parquet")
+        from openpyxl import Workbook
+
+        # 只写模式逐行写出，不在内存中保留整个工作表
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        header_written = False
+        for chunk in chunks:
+            if not header_written:
+                sheet.append(list(chunk.columns))
+                header_written = True
+            values = chunk.astype(object).where(chunk.notna(), None)
+            values['日期'] = chunk['日期'].dt.to_pydatetime()
+            for row in values.itertuples(index=False, name=None):
+                sheet.append(row)
+            stats.update(chunk)
+        workbook.save(path)
+
+    else:
+        raise ValueError(f"不支持的格式: {fmt}（可选 xlsx、csv、parquet）")
+
+    return stats
+
+
+def create_test_excel(path: str = 'test_sales_data.xlsx', rows: int = DEFAULT_ROWS) -> _Stats:
     """创建测试用的Excel文件"""
-    
-    # 生成销售数据
-    np.random.seed(42)
-    
-    # 日期范围
-    start_date = datetime(2023, 1, 1)
-    dates = [start_date + timedelta(days=i) for i in range(365)]
-    
-    # 产品类别
-    categories = ['电子产品', '服装', '食品', '书籍', '家具']
-    
-    # 生成数据
-    data = []
-    for i, date in enumerate(dates):
-        # 每天随机生成3-8条销售记录
-        daily_records = np.random.randint(3, 9)
-        
-        for _ in range(daily_records):
-            category = np.random.choice(categories)
-            
-            # 根据类别设置不同的价格范围
-            if category == '电子产品':
-                price = np.random.normal(800, 300)
-            elif category == '服装':
-                price = np.random.normal(200, 80)
-            elif category == '食品':
-                price = np.random.normal(50, 20)
-            elif category == '书籍':
-                price = np.random.normal(80, 30)
-            else:  # 家具
-                price = np.random.normal(1200, 500)
-            
-            price = max(10, price)  # 确保价格为正
-            
-            # 数量
-            quantity = np.random.randint(1, 6)
-            
-            # 总金额
-            total = price * quantity
-            
-            # 地区
-            region = np.random.choice(['北京', '上海', '广州', '深圳', '杭州'])
-            
-            # 客户年龄
-            age = np.random.randint(18, 66)
-            
-            data.append({
-                '日期': date.strftime('%Y-%m-%d'),
-                '产品类别': category,
-                '单价': round(price, 2),
-                '数量': quantity,
-                '总金额': round(total, 2),
-                '地区': region,
-                '客户年龄': age
-            })
-    
-    # 创建DataFrame
-    df = pd.DataFrame(data)
-    
-    # 保存为Excel
-    df.to_excel('test_sales_data.xlsx', index=False)
-    print(f"✅ 已生成测试数据文件: test_sales_data.xlsx")
-    print(f"📊 数据概览:")
-    print(f"   - 总记录数: {len(df):,}")
-    print(f"   - 日期范围: {df['日期'].min()} 到 {df['日期'].max()}")
-    print(f"   - 产品类别: {', '.join(df['产品类别'].unique())}")
-    print(f"   - 地区: {', '.join(df['地区'].unique())}")
-    print(f"   - 总销售额: ¥{df['总金额'].sum():,.2f}")
-    
-    return df
+    return write_dataset(path, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成测试用的销售数据")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help='总行数')
+    parser.add_argument('--format', choices=['xlsx', 'csv', 'parquet'], default='xlsx')
+    parser.add_argument('--output', help='输出文件（默认test_sales_data.<格式>）')
+    parser.add_argument('--wide-cols', type=int, default=0, help='额外的数值列数')
+    parser.add_argument('--text-cols', type=int, default=0, help='额外的高基数文本列数')
+    parser.add_argument('--text-cardinality', type=int, default=100_000, help='文本列的不同取值数')
+    parser.add_argument('--null-ratio', type=float, default=0.0, help='可空列中缺失值的比例')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='每块生成的行数')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    output = args.output or f"test_sales_data.{args.format}"
+    started = time.perf_counter()
+    stats = write_dataset(
+        output, args.rows, args.format,
+        chunk_rows=args.chunk_rows,
+        seed=args.seed,
+        wide_cols=args.wide_cols,
+        text_cols=args.text_cols,
+        text_cardinality=args.text_cardinality,
+        null_ratio=args.null_ratio,
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ 已生成测试数据文件: {output}")
+    print("📊 数据概览:")
+    print(f"   - 总记录数: {stats.rows:,}")
+    print(f"   - 列数: {7 + args.wide_cols + args.text_cols}")
+    if stats.rows:
+        print(f"   - 日期范围: {stats.first_date:%Y-%m-%d} 到 {stats.last_date:%Y-%m-%d}")
+    print(f"   - 产品类别: {', '.join(CATEGORIES)}")
+    print(f"   - 地区: {', '.join(REGIONS)}")
+    print(f"   - 总销售额: ¥{stats.sales:,.2f}")
+    print(f"⏱️ 耗时 {elapsed:.1f}s（{stats.rows / max(elapsed, 1e-9):,.0f} 行/秒），"
+          f"文件大小 {os.path.getsize(output) / 1024 / 1024:.1f} MB")
+
 
 if __name__ == "__main__":
-    create_test_excel()
\ No newline at end of file
+    main()
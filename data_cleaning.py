@@ -0,0 +1,130 @@
+"""
+数据清理引擎（Gradio和Streamlit两个前端共用）
+
+所有列按类型整列向量化处理，只有无法转换为Arrow数组的文本列才会走较慢的字符清洗路径。
+"""
+
+from typing import Callable, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# 清理逻辑变化时递增，使旧的数据集缓存条目失效
+# 2: 日期列保持原类型（不再填0），布尔列保持bool，清理后仍整列为空的列被删除，
+#    无法转为Arrow数组的文本列用_strip_unsafe_chars兜底
+CLEANING_VERSION = 2
+
+# 会导致Arrow/Parquet转换失败的字符：控制字符（保留\t）和孤立的代理字符
+_UNSAFE_CHARS = r"[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff]"
+_MAX_FALLBACK_LENGTH = 100
+
+
+def clean_column_name(name) -> str:
+    """列名统一为去除首尾空白、不含换行的字符串"""
+    return str(name).strip().replace('\n', ' ').replace('\r', ' ')
+
+
+def clean_dataframe(
+    df: pd.DataFrame,
+    stringify_other: bool = False,
+    on_column_error: Optional[Callable[[str, Exception], None]] = None,
+) -> pd.DataFrame:
+    """
+    清理数据框，返回新的DataFrame（不修改传入的df）
+
+    - 文本列：缺失值替换为空字符串，其余值转为str
+    - 数值列：缺失值填0；布尔列保持原样
+    - 日期等其他类型：stringify_other为True时转为字符串，否则保持原类型（整列为空时删除）
+    - 清理后仍无法转为Arrow数组的文本列去除控制字符并截断
+    """
+    names = [clean_column_name(col) for col in df.columns]
+    columns = {}
+    keep = []
+
+    for i, name in enumerate(names):
+        column_data = df.iloc[:, i]
+        try:
+            column_data = _clean_column(column_data, stringify_other)
+        except Exception as e:
+            if on_column_error:
+                on_column_error(name, e)
+            column_data = _strip_unsafe_chars(column_data)
+        else:
+            if pa is not None and not _arrow_compatible(column_data):
+                column_data = _strip_unsafe_chars(column_data)
+
+        columns[i] = column_data
+        # 文本和数值列已填充缺失值，只有日期等其他类型可能整列为空
+        keep.append(not (column_data.hasnans and column_data.isna().all()))
+
+    # 一次性构建，避免逐列赋值带来的块合并开销；按位置构建以兼容重名列。
+    # 写时复制开启时直接引用未改动的列（如内存映射读取的列），修改时才复制
+    df_clean = pd.DataFrame(columns, index=df.index, copy=not _copy_on_write())
+    df_clean.columns = names
+
+    # 删除全空的列
+    if not all(keep):
+        df_clean = df_clean.loc[:, keep]
+
+    return df_clean
+
+
+def _copy_on_write() -> bool:
+    """pandas 3起始终写时复制，pandas 2.x需显式开启"""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def _clean_column(column_data: pd.Series, stringify_other: bool) -> pd.Series:
+    dtype = column_data.dtype
+
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        return _to_text(column_data)
+
+    if pd.api.types.is_bool_dtype(dtype):
+        return column_data
+
+    if pd.api.types.is_numeric_dtype(dtype):
+        return column_data.fillna(0) if column_data.hasnans else column_data
+
+    if stringify_other:
+        return column_data.astype(str)
+
+    return column_data
+
+
+def _to_text(column_data: pd.Series) -> pd.Series:
+    """缺失值替换为空字符串后整列转为str"""
+    if column_data.hasnans:
+        column_data = column_data.fillna('')
+    # 已经是字符串类型（如Arrow字符串列）时无需再转换
+    if isinstance(column_data.dtype, pd.StringDtype):
+        return column_data
+    return column_data.astype(str)
+
+
+def _arrow_compatible(column_data: pd.Series) -> bool:
+    # 数值、日期和Arrow字符串列总能转换，只需检查object列
+    if not pd.api.types.is_object_dtype(column_data.dtype):
+        return True
+    try:
+        pa.array(column_data, from_pandas=True)
+        return True
+    except Exception:
+        return False
+
+
+def _strip_unsafe_chars(column_data: pd.Series) -> pd.Series:
+    """较慢的兜底清洗：逐个值转为str，去除控制字符和换行，并限制长度"""
+    values = column_data.astype(object).where(column_data.notna(), '')
+    text = pd.Series([str(x) for x in values], index=column_data.index, dtype=object)
+    return (
+        text.str.replace(_UNSAFE_CHARS, '', regex=True)
+        .str.replace(r'[\r\n]', ' ', regex=True)
+        .str.slice(0, _MAX_FALLBACK_LENGTH)
+    )
@@ -0,0 +1,92 @@
+"""
+已解析数据集缓存：以上传文件的内容哈希为键，将清理后的DataFrame以Parquet格式保存在本地磁盘
+"""
+
+import hashlib
+import importlib.util
+import os
+import sys
+from typing import Dict, Optional
+
+import pandas as pd
+
+from disk_cache import DiskLRUCache
+
+# Parquet读写依赖pyarrow，未安装时缓存自动停用（只检查是否安装，不在导入时加载）
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+
+def file_sha256(path, chunk_size: int = 1024 * 1024) -> str:
+    """分块计算文件内容的SHA-256，避免一次性读入大文件"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stat_fingerprint(path) -> str:
+    """由路径、大小和修改时间得到的文件指纹，不读取文件内容（用于内存映射读取的大文件）"""
+    stat = os.stat(path)
+    text = f"{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    return "stat-" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DatasetCache:
+    """清理后数据集的Parquet缓存，容量按字节数限制并按LRU淘汰"""
+
+    def __init__(self, directory, max_bytes: int):
+        self.store = DiskLRUCache(directory, max_bytes, suffix=".parquet")
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        """读取缓存的数据集，未命中或文件损坏时返回None"""
+        path = self.store.get(key)
+        if path is None:
+            return None
+
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"⚠️ 数据集缓存读取失败，已丢弃: {str(e)}")
+            self.store.discard(key)
+            return None
+
+    def save(self, key: str, df: pd.DataFrame) -> bool:
+        """写入缓存，无法序列化为Parquet时（如列名重复）跳过"""
+        try:
+            self.store.put(key, lambda p: df.to_parquet(p, index=False))
+            return True
+        except Exception as e:
+            print(f"⚠️ 数据集缓存写入失败: {str(e)}")
+            return False
+
+    def stats(self) -> Dict[str, float]:
+        """命中/未命中次数和磁盘占用"""
+        return self.store.stats()
+
+    def clear(self):
+        self.store.clear()
+
+
+def format_stats(stats: Dict[str, float]) -> str:
+    """将缓存统计格式化为一行文字"""
+    return (
+        f"命中 {stats['hits']} 次 / 未命中 {stats['misses']} 次 "
+        f"(命中率 {stats['hit_rate']:.0%})，"
+        f"{stats['entries']} 个条目，占用 {stats['bytes_on_disk'] / 1024 / 1024:.1f} MB"
+        f" / {stats['max_bytes'] / 1024 / 1024:.0f} MB"
+    )
+
+
+if __name__ == "__main__":
+    # 用法: python dataset_cache.py [stats|clear]
+    from gradio_app import DATASET_CACHE
+
+    if DATASET_CACHE is None:
+        print("数据集缓存未启用")
+    elif len(sys.argv) > 1 and sys.argv[1] == "clear":
+        DATASET_CACHE.clear()
+        print("✅ 数据集缓存已清空")
+    else:
+        print(f"📦 数据集缓存: {DATASET_CACHE.store.directory}")
+        print(format_stats(DATASET_CACHE.stats()))
@@ -0,0 +1,94 @@
+"""
+数据集摘要：每个数据版本只计算一次，供每轮提问构建提示词时复用
+"""
+
+import io
+from functools import cached_property
+from typing import Any, Dict, Hashable
+
+import pandas as pd
+
+
+class DatasetSummary:
+    """
+    绑定到某个数据版本的摘要，各项统计在首次访问时计算并缓存
+
+    数据变化时不修改已有摘要，而是为新版本创建新的DatasetSummary。
+    按列名索引的字典中，重名的列以"列名 (第N列)"区分，不会互相覆盖。
+    """
+
+    def __init__(self, df: pd.DataFrame, version: Hashable):
+        self.df = df
+        self.version = version
+        self._column_stats: Dict[int, Dict[str, Any]] = {}
+
+    @cached_property
+    def columns(self) -> list:
+        return self.df.columns.tolist()
+
+    @property
+    def shape(self) -> tuple:
+        return self.df.shape
+
+    @cached_property
+    def _labeled(self) -> pd.DataFrame:
+        """列名唯一的df（共享数据，不复制），用于生成按列名索引的字典"""
+        labels = _unique_labels(self.columns)
+        if labels == self.columns:
+            return self.df
+        labeled = self.df.copy(deep=False)
+        labeled.columns = labels
+        return labeled
+
+    @cached_property
+    def dtypes(self) -> Dict[str, str]:
+        return self._labeled.dtypes.astype(str).to_dict()
+
+    @cached_property
+    def non_null_counts(self) -> Dict[str, int]:
+        return self._labeled.count().to_dict()
+
+    @cached_property
+    def sample_data(self) -> Dict[str, Any]:
+        return self._labeled.head(3).to_dict()
+
+    @cached_property
+    def description(self) -> Dict[str, Any]:
+        """数值列的describe()统计，没有数值列时为空"""
+        if self.df.select_dtypes(include=['number']).shape[1] == 0:
+            return {}
+        return self._labeled.describe().to_dict()
+
+    def column_stats(self, position: int) -> Dict[str, Any]:
+        """第position列的describe()统计（按列缓存，宽表只为用到的列计算）"""
+        if position not in self._column_stats:
+            self._column_stats[position] = self.df.iloc[:, position].describe().to_dict()
+        return self._column_stats[position]
+
+    @cached_property
+    def info(self) -> str:
+        buffer = io.StringIO()
+        self.df.info(buf=buffer)
+        return buffer.getvalue()
+
+    def as_dict(self, include_info: bool = False) -> Dict[str, Any]:
+        """用于提示词的摘要字典"""
+        summary = {
+            'columns': self.columns,
+            'shape': self.shape,
+            'dtypes': self.dtypes,
+            'sample_data': self.sample_data,
+            'description': self.description,
+        }
+        if include_info:
+            summary['info'] = self.info
+        return summary
+
+
+def _unique_labels(columns: list) -> list:
+    """重名的列加上位置，如 "金额 (第3列)"；不重名的列保持原名"""
+    counts: Dict[Hashable, int] = {}
+    for name in columns:
+        counts[name] = counts.get(name, 0) + 1
+    return [f"{name} (第{position + 1}列)" if counts[name] > 1 else name
+            for position, name in enumerate(columns)]
@@ -0,0 +1,157 @@
+"""
+本地磁盘LRU缓存（按总字节数限制容量）
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class DiskLRUCache:
+    """
+    以文件为单位的磁盘缓存，按最近访问时间(atime)淘汰，可选按写入时间(mtime)TTL过期
+
+    目录在第一次写入时才创建。各条目的大小在首次需要时扫描一次目录得到，之后随写入和删除更新，
+    stats()和未超出容量时的写入不再扫描目录。
+    """
+
+    def __init__(self, directory, max_bytes: int, suffix: str = "",
+                 ttl_seconds: Optional[float] = None):
+        self.directory = Path(directory).expanduser()
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._directory_ready = False
+        # 文件名 -> 大小（None表示尚未扫描目录）
+        self._sizes: Optional[Dict[str, int]] = None
+        self._total_bytes = 0
+
+    def path_for(self, key: str) -> Path:
+        """缓存键对应的文件路径"""
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[Path]:
+        """命中则返回文件路径并刷新访问时间，否则返回None"""
+        path = self.path_for(key)
+        with self._lock:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+
+            if self._expired(stat.st_mtime):
+                self._remove(path)
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            # 显式写入atime记录最近访问时间，mtime保留为写入时间用于TTL判断
+            os.utime(path, (time.time(), stat.st_mtime))
+            self.hits += 1
+            return path
+
+    def put(self, key: str, writer: Callable[[Path], None]) -> Path:
+        """通过writer写入临时文件，原子替换后按容量淘汰旧条目"""
+        path = self.path_for(key)
+        if not self._directory_ready:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._directory_ready = True
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            writer(tmp_path)
+            size = tmp_path.stat().st_size
+            with self._lock:
+                sizes = self._index()
+                os.replace(tmp_path, path)
+                self._total_bytes += size - sizes.get(path.name, 0)
+                sizes[path.name] = size
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        self.evict()
+        return path
+
+    def put_bytes(self, key: str, data: bytes) -> Path:
+        """写入一段字节内容"""
+        return self.put(key, lambda p: p.write_bytes(data))
+
+    def discard(self, key: str):
+        """删除一个条目（如读取时发现文件已损坏）"""
+        with self._lock:
+            self._remove(self.path_for(key))
+
+    def evict(self):
+        """删除过期条目，并按LRU顺序淘汰直到总大小不超过上限"""
+        with self._lock:
+            # 没有TTL且未超出容量时无需扫描目录
+            if self.ttl_seconds is None and self._sizes is not None and self._total_bytes <= self.max_bytes:
+                return
+
+            # 扫描时按磁盘上的实际情况重建索引（其他进程也可能写入同一目录）
+            entries = self._entries()
+            self._sizes = {path.name: size for path, size, _, _ in entries}
+            self._total_bytes = sum(self._sizes.values())
+
+            for path, size, _, mtime in sorted(entries, key=lambda e: e[2]):
+                if not self._expired(mtime) and self._total_bytes <= self.max_bytes:
+                    continue
+                self._remove(path)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存目录"""
+        with self._lock:
+            for path, _, _, _ in self._entries():
+                path.unlink(missing_ok=True)
+            self._sizes = {}
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """命中率和磁盘占用统计"""
+        with self._lock:
+            sizes = self._index()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(sizes),
+                'bytes_on_disk': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _index(self) -> Dict[str, int]:
+        """各条目的大小，首次调用时扫描目录（需持有锁）"""
+        if self._sizes is None:
+            self._sizes = {path.name: size for path, size, _, _ in self._entries()}
+            self._total_bytes = sum(self._sizes.values())
+        return self._sizes
+
+    def _remove(self, path: Path):
+        """删除条目文件并更新索引（需持有锁）"""
+        path.unlink(missing_ok=True)
+        if self._sizes is not None:
+            self._total_bytes -= self._sizes.pop(path.name, 0)
+
+    def _expired(self, mtime: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - mtime > self.ttl_seconds
+
+    def _entries(self) -> List[Tuple[Path, int, float, float]]:
+        entries = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_atime, stat.st_mtime))
+        return entries
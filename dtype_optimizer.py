@@ -0,0 +1,127 @@
+"""
+省内存的列类型：低基数文本列转为category，其余文本列使用Arrow字符串，数值列在不损失精度时缩小位宽
+
+只做无损转换：数值在转换前后完全相同，文本列的取值不变；转换后占用反而更大的列保持原类型。
+"""
+
+import importlib.util
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Arrow字符串类型需要pyarrow（只检查是否安装，不在导入时加载）
+ARROW_STRINGS = importlib.util.find_spec("pyarrow") is not None
+
+# 不同取值数不超过行数的该比例时转为category
+DEFAULT_CATEGORY_MAX_RATIO = 0.5
+
+# 整数最小缩到int32：生成的代码对小位宽整数做乘法等运算时会静默溢出（如int8的 50 * 3）
+_MIN_INT_ITEMSIZE = 4
+
+
+class DtypeReport(NamedTuple):
+    bytes_before: int
+    bytes_after: int
+    # (列名, 原类型, 新类型)
+    changes: List[Tuple[str, str, str]]
+
+    @property
+    def saved(self) -> int:
+        return max(self.bytes_before - self.bytes_after, 0)
+
+    def format(self) -> str:
+        mb = 1024 * 1024
+        ratio = self.bytes_after / self.bytes_before if self.bytes_before else 1.0
+        return (
+            f"{self.bytes_before / mb:.1f} MB -> {self.bytes_after / mb:.1f} MB "
+            f"({ratio:.0%})，转换 {len(self.changes)} 列"
+        )
+
+
+def optimize_dtypes(
+    df: pd.DataFrame,
+    category_max_ratio: float = DEFAULT_CATEGORY_MAX_RATIO,
+) -> Tuple[pd.DataFrame, DtypeReport]:
+    """返回转换列类型后的新DataFrame（不修改传入的df）和转换前后的内存占用"""
+    columns = {}
+    changes = []
+    before = after = 0
+
+    for i in range(df.shape[1]):
+        column = df.iloc[:, i]
+        size = _memory(column)
+        optimized = _optimize_column(column, category_max_ratio)
+        optimized_size = _memory(optimized) if optimized is not None else size
+
+        if optimized is not None and optimized_size < size:
+            changes.append((str(df.columns[i]), str(column.dtype), str(optimized.dtype)))
+            column, optimized_size = optimized, optimized_size
+        else:
+            optimized_size = size
+
+        columns[i] = column
+        before += size
+        after += optimized_size
+
+    # 按位置构建以兼容重名列
+    result = pd.DataFrame(columns, index=df.index)
+    result.columns = df.columns
+    return result, DtypeReport(before, after, changes)
+
+
+def _memory(column: pd.Series) -> int:
+    return int(column.memory_usage(index=False, deep=True))
+
+
+def _optimize_column(column: pd.Series, category_max_ratio: float):
+    """返回转换后的列，没有合适的转换时返回None"""
+    dtype = column.dtype
+
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(dtype):
+        return None
+
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        return _optimize_text(column, category_max_ratio)
+
+    if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        return _downcast_integer(column)
+
+    if pd.api.types.is_float_dtype(dtype) and isinstance(dtype, np.dtype):
+        return _downcast_float(column)
+
+    return None
+
+
+def _optimize_text(column: pd.Series, category_max_ratio: float):
+    # 含非字符串值（如混合类型的object列）时保持原样，避免改变取值
+    if pd.api.types.is_object_dtype(column.dtype) and pd.api.types.infer_dtype(column, skipna=True) != "string":
+        return None
+
+    if len(column) and column.nunique(dropna=False) <= len(column) * category_max_ratio:
+        return column.astype("category")
+
+    if ARROW_STRINGS and pd.api.types.is_object_dtype(column.dtype):
+        return column.astype("string[pyarrow]")
+    return None
+
+
+def _downcast_integer(column: pd.Series):
+    if column.dtype.itemsize <= _MIN_INT_ITEMSIZE or not len(column):
+        return None
+    info = np.iinfo(np.int32)
+    if info.min <= column.min() and column.max() <= info.max:
+        return column.astype(np.int32)
+    return None
+
+
+def _downcast_float(column: pd.Series):
+    """float64中的值都能用float32精确表示时（如整数值、0.5）才转换"""
+    if column.dtype.itemsize <= 4:
+        return None
+    values = column.to_numpy()
+    with np.errstate(over="ignore", invalid="ignore"):
+        narrowed = values.astype(np.float32)
+    if not np.array_equal(narrowed.astype(values.dtype), values, equal_nan=True):
+        return None
+    return pd.Series(narrowed, index=column.index, name=column.name)
@@ -0,0 +1,77 @@
+"""
+代码执行结果缓存：同一份数据上再次执行相同的代码（忽略注释和格式差异）时，
+直接返回上次的输出和图，不再执行
+
+缓存键为 (数据集指纹, 规范化代码的哈希, 图表编码设置)；只缓存执行成功的结果，
+按估算的内存占用做LRU淘汰。
+"""
+
+import ast
+import hashlib
+import sys
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from figure_capture import CapturedFigure
+from memory_cache import MemoryLRUCache
+
+
+class ExecutionOutput(NamedTuple):
+    output: str
+    figures: List[CapturedFigure]
+    ok: bool = True
+    # 代码直接显示在界面上的内容（Streamlit版中print改为st.write），命中缓存时重新显示
+    messages: Tuple[str, ...] = ()
+
+    def size(self) -> int:
+        return sys.getsizeof(self.output) + sum(len(figure.data) for figure in self.figures) \
+            + sum(sys.getsizeof(message) for message in self.messages)
+
+
+def normalize_code(code: str) -> str:
+    """规范化代码：按语法树比较，注释、空行、缩进和引号风格不同的代码视为相同"""
+    try:
+        return ast.dump(ast.parse(code))
+    except SyntaxError:
+        return "\n".join(line.rstrip() for line in code.strip().splitlines() if line.strip())
+
+
+def code_hash(code: str) -> str:
+    return hashlib.sha256(normalize_code(code).encode("utf-8")).hexdigest()
+
+
+class ExecutionCache:
+    """按数据集指纹和代码哈希缓存执行结果"""
+
+    def __init__(self, max_bytes: int):
+        self.store = MemoryLRUCache(max_bytes, sizeof=ExecutionOutput.size)
+
+    @staticmethod
+    def make_key(fingerprint: Hashable, code: str, *settings: Hashable) -> tuple:
+        return (fingerprint, code_hash(code)) + settings
+
+    def get(self, key: tuple) -> Optional[ExecutionOutput]:
+        return self.store.get(key)
+
+    def put(self, key: tuple, result: ExecutionOutput) -> bool:
+        """缓存执行结果，执行失败的结果不缓存"""
+        if not result.ok:
+            return False
+        return self.store.put(key, result)
+
+    def evict(self, fingerprint: Hashable) -> int:
+        """删除某个数据集的所有执行结果，返回删除的条目数"""
+        return self.store.discard_where(lambda key: key[0] == fingerprint)
+
+    def stats(self) -> Dict[str, float]:
+        return self.store.stats()
+
+    def clear(self):
+        self.store.clear()
+
+
+def format_stats(stats: Dict[str, float]) -> str:
+    return (
+        f"命中 {stats['hits']} / 未命中 {stats['misses']} "
+        f"(命中率 {stats['hit_rate']:.0%})，{stats['entries']} 条，"
+        f"约 {stats['bytes'] / 1024 / 1024:.1f} MB"
+    )
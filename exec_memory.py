@@ -0,0 +1,113 @@
+"""
+代码执行的内存管理：数据集以写时复制方式交给生成的代码，并监控每次执行的峰值RSS
+"""
+
+import os
+import sys
+import threading
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+# cow: 浅拷贝 + pandas写时复制，只有被修改的列才会复制；copy: 每次执行前深拷贝整个数据集
+EXEC_DATA_MODES = ("cow", "copy")
+
+_PANDAS_MAJOR = int(pd.__version__.split(".")[0])
+
+
+def enable_copy_on_write():
+    """pandas 2.x需要显式开启写时复制，pandas 3起始终开启"""
+    if _PANDAS_MAJOR < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+def frame_for_execution(df: pd.DataFrame, mode: str = "cow") -> pd.DataFrame:
+    """返回交给生成代码使用的df，保证代码中的修改不会影响原数据"""
+    if mode == "copy":
+        return df.copy()
+    # 写时复制开启后，浅拷贝与原数据共享内存，修改时才复制对应的列
+    return df.copy(deep=False)
+
+
+class MemoryReport(NamedTuple):
+    rss_before: int
+    rss_peak: int
+    rss_after: int
+
+    @property
+    def peak_increase(self) -> int:
+        return max(self.rss_peak - self.rss_before, 0)
+
+    def format(self) -> str:
+        mb = 1024 * 1024
+        return (
+            f"执行前 {self.rss_before / mb:.1f} MB，峰值 {self.rss_peak / mb:.1f} MB "
+            f"(+{self.peak_increase / mb:.1f} MB)，执行后 {self.rss_after / mb:.1f} MB"
+        )
+
+
+class PeakRSSMonitor:
+    """
+    在with块执行期间后台采样进程RSS，退出后report给出执行前、峰值和执行后的内存
+
+    进程历史峰值(ru_maxrss)在执行期间上升时，用它作为精确峰值，弥补采样间隔的遗漏。
+
+    测量的是整个进程的RSS：在服务进程内多线程并发执行时，同时进行的其他执行和请求处理
+    也计入其中，结果只是上限；只有在独立工作进程中逐次执行（执行进程池）时才是单次执行的内存。
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.report: Optional[MemoryReport] = None
+        self._stop = threading.Event()
+        self._peak = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self._before = current_rss()
+        self._max_before = _lifetime_peak_rss()
+        self._peak = self._before
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        after = current_rss()
+
+        peak = max(self._peak, after)
+        max_after = _lifetime_peak_rss()
+        if max_after > self._max_before:
+            peak = max(peak, max_after)
+
+        self.report = MemoryReport(self._before, peak, after)
+        return False
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, current_rss())
+
+
+def current_rss() -> int:
+    """当前进程的常驻内存（字节）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return _lifetime_peak_rss()
+
+
+def _lifetime_peak_rss() -> int:
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return peak if sys.platform == "darwin" else peak * 1024
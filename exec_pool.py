@@ -0,0 +1,222 @@
+"""
+本地代码执行进程池：预先启动的工作进程已导入pandas/matplotlib，
+数据集以Arrow IPC格式放在共享内存中，工作进程直接挂载而不复制
+"""
+
+import contextlib
+import io
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Hashable, List, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from exec_memory import MemoryReport, PeakRSSMonitor, enable_copy_on_write, frame_for_execution
+from figure_capture import CapturedFigure, collect_figures
+from font_config import apply_cjk_font
+
+CHART_FILE = "chart.png"
+
+# 每个工作进程最多同时挂载的数据集数量（多个会话的数据集交替使用时避免反复挂载）
+_WORKER_DATASET_SLOTS = 4
+
+
+class SharedDataset:
+    """写入共享内存的数据集，工作进程按名称挂载；对象被回收时自动释放共享内存"""
+
+    def __init__(self, df: pd.DataFrame, version: Hashable):
+        self.version = version
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        # 先计算序列化后的大小，再直接写入共享内存，避免中间缓冲区
+        sizer = pa.MockOutputStream()
+        _write_table(sizer, table)
+        self.size = sizer.size()
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(self.size, 1))
+        _write_table(pa.FixedSizeBufferWriter(pa.py_buffer(self._shm.buf)), table)
+        self.name = self._shm.name
+        self._finalizer = weakref.finalize(self, _release_shared_memory, self._shm)
+
+    def close(self):
+        self._finalizer()
+
+
+def _write_table(sink, table: pa.Table):
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _release_shared_memory(shm: shared_memory.SharedMemory):
+    shm.close()
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class ExecutionResult(NamedTuple):
+    output: str
+    error: Optional[str]
+    figures: List[CapturedFigure]
+    memory: Optional[MemoryReport] = None
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ExecutionPool:
+    """固定大小的工作进程池，每次执行占用一个空闲进程，超时的进程被终止并替换"""
+
+    def __init__(self, size: int, timeout: Optional[float] = None, data_mode: str = "cow",
+                 figure_format: str = "png", figure_dpi: float = 100):
+        self.size = size
+        self.timeout = timeout
+        self.data_mode = data_mode
+        self.figure_format = figure_format
+        self.figure_dpi = figure_dpi
+        self._ctx = _mp_context()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启动全部工作进程"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._idle.put(_Worker(self._ctx))
+
+    def run(self, dataset: SharedDataset, code: str) -> ExecutionResult:
+        """在空闲工作进程中执行代码；超时抛出TimeoutError"""
+        self.start()
+        worker = self._idle.get()
+        try:
+            worker.conn.send((dataset.name, dataset.version, code, self.data_mode,
+                              self.figure_format, self.figure_dpi))
+            if not worker.conn.poll(self.timeout):
+                worker.kill()
+                worker = _Worker(self._ctx)
+                raise TimeoutError(f"代码执行超过 {self.timeout:.0f} 秒")
+            return worker.conn.recv()
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            # 工作进程异常退出，换一个新进程
+            worker.kill()
+            worker = _Worker(self._ctx)
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def shutdown(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            worker.kill()
+
+
+def _mp_context():
+    """优先使用forkserver：从预先导入了重型库的干净进程fork，启动快且不继承服务器线程"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        os.environ.setdefault("MPLBACKEND", "Agg")
+        ctx.set_forkserver_preload(["pandas", "pyarrow", "matplotlib.pyplot", "seaborn"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _worker_main(conn):
+    """工作进程：循环接收 (共享内存名, 数据版本, 代码, 数据交接方式, 图片格式, DPI)，执行后返回输出、图表和内存报告"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    enable_copy_on_write()
+    # 中文字体的查找结果已由主进程保存，这里直接读取
+    apply_cjk_font()
+    os.chdir(tempfile.mkdtemp(prefix="oid-worker-"))
+    attached = OrderedDict()
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        name, version, code, data_mode, figure_format, figure_dpi = message
+
+        try:
+            base_df = _attach(attached, name, version)
+        except Exception as e:
+            conn.send(ExecutionResult("", f"挂载共享数据失败: {str(e)}", []))
+            continue
+
+        if os.path.exists(CHART_FILE):
+            os.remove(CHART_FILE)
+
+        local_vars = {
+            'df': frame_for_execution(base_df, data_mode),
+            'pd': pd,
+            'plt': plt,
+            'sns': sns
+        }
+        output_buffer = io.StringIO()
+        error = None
+        monitor = PeakRSSMonitor()
+        with contextlib.redirect_stdout(output_buffer), monitor:
+            try:
+                exec(code, {'__name__': '__main__'}, local_vars)
+            except Exception as e:
+                error = str(e)
+
+        # 收集所有打开的图；代码已关闭所有图时使用其保存的chart.png
+        figures = []
+        if error is None:
+            figures = collect_figures(figure_format, figure_dpi)
+            if not figures and os.path.isfile(CHART_FILE):
+                with open(CHART_FILE, "rb") as f:
+                    figures = [CapturedFigure(f.read(), ".png")]
+        plt.close('all')
+
+        conn.send(ExecutionResult(output_buffer.getvalue(), error, figures, monitor.report))
+
+
+def _attach(attached: OrderedDict, name: str, version: Hashable) -> pd.DataFrame:
+    """挂载共享内存中的数据集；数值列直接引用共享内存（只读、零拷贝）"""
+    key = (name, version)
+    if key in attached:
+        attached.move_to_end(key)
+        return attached[key][1]
+
+    shm = shared_memory.SharedMemory(name=name)
+    table = pa.ipc.open_stream(pa.py_buffer(shm.buf)).read_all()
+    df = table.to_pandas(split_blocks=True)
+    attached[key] = (shm, df)
+
+    while len(attached) > _WORKER_DATASET_SLOTS:
+        _, (old_shm, old_df) = attached.popitem(last=False)
+        del old_df
+        with contextlib.suppress(BufferError):
+            old_shm.close()
+
+    return df
@@ -0,0 +1,61 @@
+"""
+执行结束后收集生成代码画出的所有图：在内存中编码为图片，随后关闭以释放内存
+
+生成的代码不再需要调用plt.savefig，画完留在pyplot中的图都会被展示。
+"""
+
+import io
+from typing import List, NamedTuple
+
+# 可直接在界面中显示的格式
+FIGURE_FORMATS = ("png", "jpeg", "webp")
+
+# 沙箱中执行：把所有非空的图保存为文件，文件名写入清单
+_SANDBOX_SCRIPT = """
+__figure_files__ = []
+for __number__ in plt.get_fignums():
+    __figure__ = plt.figure(__number__)
+    if __figure__.axes:
+        __figure_files__.append(f"figure-{{len(__figure_files__)}}{extension}")
+        __figure__.savefig(__figure_files__[-1], format='{fmt}', dpi={dpi}, bbox_inches='tight')
+plt.close('all')
+with open('{manifest}', 'w') as __manifest__:
+    __manifest__.write('\\n'.join(__figure_files__))
+"""
+
+
+class CapturedFigure(NamedTuple):
+    data: bytes
+    extension: str
+
+
+def figure_extension(fmt: str) -> str:
+    return ".jpg" if fmt == "jpeg" else f".{fmt}"
+
+
+def encode_figure(figure, fmt: str = "png", dpi: float = 100) -> bytes:
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=fmt, dpi=dpi, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def collect_figures(fmt: str = "png", dpi: float = 100) -> List[CapturedFigure]:
+    """按创建顺序编码当前所有打开且非空的图，然后关闭全部图"""
+    import matplotlib.pyplot as plt
+    from matplotlib._pylab_helpers import Gcf
+
+    images = []
+    try:
+        for manager in sorted(Gcf.get_all_fig_managers(), key=lambda m: m.num):
+            figure = manager.canvas.figure
+            # 只调用了plt.figure()而没有画任何内容的空白图不展示
+            if figure.axes:
+                images.append(CapturedFigure(encode_figure(figure, fmt, dpi), figure_extension(fmt)))
+    finally:
+        plt.close("all")
+    return images
+
+
+def sandbox_script(fmt: str, dpi: float, manifest: str) -> str:
+    """在沙箱中收集图的代码（需已导入plt），图的文件名写入manifest"""
+    return _SANDBOX_SCRIPT.format(fmt=fmt, dpi=dpi, extension=figure_extension(fmt), manifest=manifest)
@@ -0,0 +1,148 @@
+"""
+按线程隔离的pyplot状态：多个请求在同一进程的不同线程中并行绘图时互不干扰
+
+pyplot把所有图保存在全局的Gcf.figs中，rcParams也是全局字典。isolated_figures()期间，
+当前线程的Gcf.figs和rcParams读写都指向该线程自己的副本：
+- plt.figure()/gca()/close('all')等只看到本线程创建的图
+- 代码中修改rcParams（如设置字体）只在本次执行内生效，退出时丢弃
+不在isolated_figures()中的线程仍使用全局状态。
+
+matplotlib在首次使用时才导入，导入本模块不会拖慢启动。
+"""
+
+import contextlib
+import threading
+from collections import OrderedDict
+from typing import Iterator, Optional
+
+_local = threading.local()
+_install_lock = threading.Lock()
+_installed = False
+
+
+def isolation_supported() -> bool:
+    """
+    当前matplotlib是否支持隔离
+
+    需要RcParams._get/_set/_update_raw（所有读写都经过这三个方法）；
+    旧版本的rc_context会绕过它们直接写全局字典。
+    """
+    from matplotlib import RcParams
+    from matplotlib._pylab_helpers import Gcf
+
+    return all(hasattr(RcParams, name) for name in ("_get", "_set", "_update_raw")) \
+        and isinstance(getattr(Gcf, "figs", None), (OrderedDict, _ThreadFigs))
+
+
+class _ThreadFigs:
+    """代替Gcf.figs：处于隔离中的线程使用自己的OrderedDict，其他线程使用全局的"""
+
+    def __init__(self, shared: OrderedDict):
+        self._shared = shared
+
+    def _current(self) -> OrderedDict:
+        figs = getattr(_local, "figs", None)
+        return self._shared if figs is None else figs
+
+    def __getattr__(self, name):
+        return getattr(self._current(), name)
+
+    def __getitem__(self, key):
+        return self._current()[key]
+
+    def __setitem__(self, key, value):
+        self._current()[key] = value
+
+    def __delitem__(self, key):
+        del self._current()[key]
+
+    def __contains__(self, key):
+        return key in self._current()
+
+    def __iter__(self):
+        return iter(self._current())
+
+    def __len__(self):
+        return len(self._current())
+
+    def __bool__(self):
+        return bool(self._current())
+
+    def __repr__(self):
+        return repr(self._current())
+
+
+def _scoped_rc_params_class():
+    import matplotlib
+    from matplotlib import RcParams
+
+    class _ScopedRcParams(RcParams):
+        """全局rcParams的替代类：处于隔离中的线程读写自己的副本"""
+
+        def _scope(self) -> Optional[dict]:
+            if self is not matplotlib.rcParams:
+                return None
+            return getattr(_local, "rc", None)
+
+        def _get(self, key):
+            scope = self._scope()
+            if scope is None:
+                return super()._get(key)
+            return scope[key]
+
+        def _set(self, key, val):
+            scope = self._scope()
+            if scope is None:
+                return super()._set(key, val)
+            scope[key] = val
+
+        def _update_raw(self, other_params):
+            scope = self._scope()
+            if scope is None:
+                return super()._update_raw(other_params)
+            scope.update(other_params)
+
+    return _ScopedRcParams
+
+
+def _install():
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        import matplotlib
+        from matplotlib._pylab_helpers import Gcf
+
+        Gcf.figs = _ThreadFigs(Gcf.figs)
+        matplotlib.rcParams.__class__ = _scoped_rc_params_class()
+        _installed = True
+
+
+@contextlib.contextmanager
+def isolated_figures(rc: Optional[dict] = None) -> Iterator[None]:
+    """
+    在with块内，当前线程使用独立的图列表和rcParams副本（可用rc覆盖部分参数）
+
+    退出时关闭本线程在块内创建的所有图，并丢弃对rcParams的修改。
+    """
+    import matplotlib
+    from matplotlib._pylab_helpers import Gcf
+
+    if not isolation_supported():
+        raise RuntimeError(f"matplotlib {matplotlib.__version__} 不支持按线程隔离绘图状态")
+    _install()
+
+    previous = (getattr(_local, "figs", None), getattr(_local, "rc", None))
+    params = matplotlib.rcParams
+    # 以进入时（可能是外层隔离中）的参数为起点
+    snapshot = {key: params._get(key) for key in dict.keys(params)}
+    _local.figs, _local.rc = OrderedDict(), snapshot
+    try:
+        if rc:
+            params.update(rc)
+        yield
+    finally:
+        try:
+            Gcf.destroy_all()
+        finally:
+            _local.figs, _local.rc = previous
@@ -0,0 +1,156 @@
+"""
+中文字体配置：可用的中文字体只查找一次，结果保存在本地，重启后直接使用；
+每次执行只需把缓存的字体设置写入rcParams，字体的加载和预热在后台线程中完成
+"""
+
+import json
+import os
+import threading
+import warnings
+from typing import Dict, Optional, Tuple
+
+# 按优先级排列的中文字体
+CJK_FONT_CANDIDATES = (
+    'SimHei',  # Windows
+    'Microsoft YaHei',  # Windows
+    'STHeiti',  # macOS
+    'PingFang SC',  # macOS
+    'Hiragino Sans GB',  # macOS
+    'WenQuanYi Micro Hei',  # Linux
+    'Noto Sans CJK SC',  # Linux
+    'Source Han Sans SC',  # Linux
+)
+
+DEFAULT_FONT_CACHE_FILE = os.path.expanduser("~/.cache/oidiscover/cjk_font.json")
+
+# 沙箱中执行：在沙箱自己的字体中查找（每个沙箱启动时一次）
+_SANDBOX_FONT_CODE = """
+import matplotlib.font_manager as __fm__
+__fonts__ = {{f.name for f in __fm__.fontManager.ttflist}}
+__cjk__ = next((name for name in {candidates!r} if name in __fonts__), None)
+if __cjk__:
+    plt.rcParams['font.sans-serif'] = [__cjk__] + [f for f in plt.rcParams['font.sans-serif'] if f != __cjk__]
+    plt.rcParams['font.family'] = 'sans-serif'
+plt.rcParams['axes.unicode_minus'] = False
+"""
+
+_lock = threading.Lock()
+_font_rc: Optional[Dict[str, object]] = None
+_warm_thread: Optional[threading.Thread] = None
+
+
+def resolve_cjk_font(cache_file: str = DEFAULT_FONT_CACHE_FILE) -> Optional[str]:
+    """返回可用的中文字体名称（没有时为None）；优先读取保存的结果，否则扫描一次并保存"""
+    return _resolve(cache_file)[0]
+
+
+def _resolve(cache_file: str) -> Tuple[Optional[str], Optional[str]]:
+    import matplotlib
+
+    # 只信任找到了字体的结果：没找到时每次重新扫描，之后安装的字体可以被用上
+    cached = _load(cache_file)
+    if cached is not None \
+            and cached.get("matplotlib") == matplotlib.__version__ \
+            and cached.get("candidates") == list(CJK_FONT_CANDIDATES) \
+            and cached.get("name") and cached.get("path") and os.path.exists(cached["path"]):
+        return cached["name"], cached["path"]
+
+    name, path = _scan()
+    if name is None:
+        return None, None
+    _save(cache_file, {
+        "matplotlib": matplotlib.__version__,
+        "candidates": list(CJK_FONT_CANDIDATES),
+        "name": name,
+        "path": path,
+    })
+    return name, path
+
+
+def _scan() -> Tuple[Optional[str], Optional[str]]:
+    import matplotlib.font_manager as fm
+
+    fonts = {font.name: font.fname for font in fm.fontManager.ttflist}
+    for name in CJK_FONT_CANDIDATES:
+        if name in fonts:
+            return name, fonts[name]
+    return None, None
+
+
+def _load(cache_file: str) -> Optional[dict]:
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save(cache_file: str, data: dict):
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"⚠️ 字体查找结果保存失败: {str(e)}")
+
+
+def cjk_font_rc(cache_file: str = DEFAULT_FONT_CACHE_FILE) -> Dict[str, object]:
+    """中文字体对应的rcParams设置（进程内只计算一次）"""
+    global _font_rc
+    with _lock:
+        if _font_rc is None:
+            import matplotlib
+
+            name = resolve_cjk_font(cache_file)
+            rc: Dict[str, object] = {'axes.unicode_minus': False}
+            if name:
+                fallback = [f for f in matplotlib.rcParams['font.sans-serif'] if f != name]
+                rc.update({'font.sans-serif': [name] + fallback, 'font.family': 'sans-serif'})
+            else:
+                # 没有中文字体时不再为每个缺失的字形输出警告
+                warnings.filterwarnings('ignore', message=r'Glyph \d+ .* missing from font', category=UserWarning)
+            _font_rc = rc
+        return _font_rc
+
+
+def apply_cjk_font(cache_file: str = DEFAULT_FONT_CACHE_FILE):
+    """把中文字体设置写入全局rcParams"""
+    import matplotlib
+
+    matplotlib.rcParams.update(cjk_font_rc(cache_file))
+
+
+def warm_up_fonts(cache_file: str = DEFAULT_FONT_CACHE_FILE):
+    """应用中文字体，并预先加载字体文件、渲染一次文字，首次绘图不再等待字体加载"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    apply_cjk_font(cache_file)
+    figure = Figure(figsize=(1, 1))
+    figure.text(0.5, 0.5, "中文 ABC 123")
+    FigureCanvasAgg(figure).draw()
+
+
+def warm_up_fonts_async(cache_file: str = DEFAULT_FONT_CACHE_FILE) -> threading.Thread:
+    """在后台线程中预热字体（重复调用只启动一次）"""
+    global _warm_thread
+    with _lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(target=_warm_up_quietly, args=(cache_file,),
+                                            name="font-warmup", daemon=True)
+            _warm_thread.start()
+        return _warm_thread
+
+
+def _warm_up_quietly(cache_file: str):
+    try:
+        warm_up_fonts(cache_file)
+    except Exception as e:
+        print(f"⚠️ 字体预热失败: {str(e)}")
+
+
+def sandbox_font_code() -> str:
+    """在沙箱中设置中文字体的代码（需已导入plt）"""
+    return _SANDBOX_FONT_CODE.format(candidates=CJK_FONT_CANDIDATES)
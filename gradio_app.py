@@ -1,7 +1,14 @@
 import os
+import sys
 import json
 import io
-from typing import List, Tuple, Optional
+import contextlib
+import importlib.util
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Tuple, Optional
 
 # 设置环境变量以避免代理问题
 os.environ.pop('HTTPS_PROXY', None)
@@ -13,35 +20,314 @@ os.environ.pop('ALL_PROXY', None)
 
 import gradio as gr
 import pandas as pd
-import requests
-import matplotlib.pyplot as plt
-import seaborn as sns
 from dotenv import load_dotenv
 
-# 尝试导入E2B，如果失败则跳过
-try:
-    from e2b import Sandbox
-    E2B_AVAILABLE = True
-except ImportError:
-    E2B_AVAILABLE = False
+from data_cleaning import CLEANING_VERSION, clean_dataframe
+from dtype_optimizer import DtypeReport, optimize_dtypes
+from dataset_summary import DatasetSummary
+from prompt_builder import build_data_context, estimate_tokens
+from dataset_cache import DatasetCache, PARQUET_AVAILABLE, file_sha256, file_stat_fingerprint, format_stats
+from ingest import COLUMNAR_EXTENSIONS, columnar_type, ingest, read_columnar
+from sandbox_pool import CHART_FILE, LocalSandbox, SandboxPool
+from exec_pool import ExecutionPool, SharedDataset
+from artifact_store import DEFAULT_ARTIFACT_DIR, ArtifactStore, capture_savefig
+from figure_capture import FIGURE_FORMATS, CapturedFigure, collect_figures
+from figure_isolation import isolated_figures, isolation_supported
+from font_config import apply_cjk_font, cjk_font_rc, warm_up_fonts_async
+from startup import prewarm_imports_async
+from llm_client import DeepseekClient
+import metrics
+from response_parser import extract_json_block, partial_json_string
+from response_cache import ResponseCache, format_stats as format_response_cache_stats
+from exec_cache import ExecutionCache, ExecutionOutput, format_stats as format_exec_cache_stats
+from exec_memory import EXEC_DATA_MODES, PeakRSSMonitor, enable_copy_on_write, frame_for_execution
+
+# 只检查E2B是否安装，创建沙箱时才导入
+E2B_AVAILABLE = importlib.util.find_spec("e2b") is not None
+if not E2B_AVAILABLE:
     print("⚠️ E2B未安装，将使用本地代码执行")
 
+# 绘图模块在首次执行代码时（或界面启动后由后台线程预先）导入
+plt = None
+sns = None
+_PLOTTING_LOCK = threading.Lock()
+
+def _load_plotting():
+    global plt, sns
+    with _PLOTTING_LOCK:
+        if sns is None:
+            import matplotlib.pyplot as pyplot
+            import seaborn
+            plt, sns = pyplot, seaborn
+
+def _create_e2b_sandbox():
+    from e2b import Sandbox
+    return Sandbox()
+
 # Load environment variables
 load_dotenv()
 
 # Configuration
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY", "sk-5b8931fa8b954025a3443faa16867476")
 E2B_API_KEY = os.getenv("E2B_API_KEY", "e2b_57ae96f0d05b0238e0c3c50c144df93f8347ac53")  # 需要设置E2B API密钥
-DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
+DEEPSEEK_API_URL = os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/v1/chat/completions")
+
+# Deepseek请求的连接/读取超时（秒）和失败重试次数
+DEEPSEEK_CONNECT_TIMEOUT = float(os.getenv("DEEPSEEK_CONNECT_TIMEOUT", "5"))
+DEEPSEEK_READ_TIMEOUT = float(os.getenv("DEEPSEEK_READ_TIMEOUT", "120"))
+DEEPSEEK_MAX_RETRIES = int(os.getenv("DEEPSEEK_MAX_RETRIES", "2"))
+
+DEEPSEEK_MODEL = "deepseek-chat"
+DEEPSEEK_TEMPERATURE = 0.1
+
+# 所有会话共用的HTTP连接池
+LLM_CLIENT = DeepseekClient(
+    DEEPSEEK_API_KEY,
+    DEEPSEEK_API_URL,
+    connect_timeout=DEEPSEEK_CONNECT_TIMEOUT,
+    read_timeout=DEEPSEEK_READ_TIMEOUT,
+    max_retries=DEEPSEEK_MAX_RETRIES,
+)
+
+# 流式输出：逐步显示分析结论，code字段生成完毕即开始执行（设为0使用一次性返回的接口）
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "1") != "0"
+# 流式输出时对话框的最小刷新间隔（秒）
+STREAM_UPDATE_INTERVAL = float(os.getenv("STREAM_UPDATE_INTERVAL", "0.05"))
+
+# 流式输出时提前执行代码的线程
+CODE_EXECUTOR = ThreadPoolExecutor(thread_name_prefix="code-exec")
+
+# 已解析数据集缓存（设为0可关闭）
+DATASET_CACHE_DIR = os.getenv("DATASET_CACHE_DIR", "~/.cache/oidiscover/datasets")
+DATASET_CACHE_MAX_MB = int(os.getenv("DATASET_CACHE_MAX_MB", "1024"))
+
+DATASET_CACHE = None
+if PARQUET_AVAILABLE and DATASET_CACHE_MAX_MB > 0:
+    DATASET_CACHE = DatasetCache(DATASET_CACHE_DIR, DATASET_CACHE_MAX_MB * 1024 * 1024)
+
+# 提示词中数据信息的token预算，以及给出统计和示例值的最多列数（按与问题的相关度选取）
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+PROMPT_MAX_DETAILED_COLUMNS = int(os.getenv("PROMPT_MAX_DETAILED_COLUMNS", "30"))
+
+# 模型回答缓存：同一数据集上的相同问题直接返回（RESPONSE_CACHE_MAX_MB=0 关闭，TTL为0表示不过期）
+RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", "~/.cache/oidiscover/responses")
+RESPONSE_CACHE_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", "64"))
+RESPONSE_CACHE_TTL_HOURS = float(os.getenv("RESPONSE_CACHE_TTL_HOURS", "24"))
+
+RESPONSE_CACHE = None
+if RESPONSE_CACHE_MAX_MB > 0:
+    RESPONSE_CACHE = ResponseCache(
+        RESPONSE_CACHE_DIR,
+        RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+        ttl_seconds=RESPONSE_CACHE_TTL_HOURS * 3600 or None,
+    )
+
+# 大文件流式导入：超过阈值的xlsx分块读取；设置行数上限时超出部分随机抽样（0表示不限制）
+STREAMING_INGEST_MIN_MB = float(os.getenv("STREAMING_INGEST_MIN_MB", "20"))
+INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "50000"))
+INGEST_MAX_ROWS = int(os.getenv("INGEST_MAX_ROWS", "0"))
+
+# 省内存的列类型：清理后把低基数文本列转为category（不同取值数不超过行数的CATEGORY_MAX_RATIO），
+# 数值列在不损失精度时缩小位宽，同一实例可以容纳更多会话的数据集
+OPTIMIZE_DTYPES = os.getenv("OPTIMIZE_DTYPES", "0") != "0"
+CATEGORY_MAX_RATIO = float(os.getenv("CATEGORY_MAX_RATIO", "0.5"))
+
+# 会话级沙箱池：e2b（默认，需E2B_API_KEY）或 local（本地子进程替身，可离线使用）
+SANDBOX_BACKEND = os.getenv("SANDBOX_BACKEND", "e2b")
+SANDBOX_IDLE_TTL = float(os.getenv("SANDBOX_IDLE_TTL", "300"))
+SANDBOX_PREWARM = int(os.getenv("SANDBOX_PREWARM", "1"))
+# 沙箱单次执行超时秒数，超时后终止并换一个新的沙箱
+SANDBOX_EXEC_TIMEOUT = float(os.getenv("SANDBOX_EXEC_TIMEOUT", "120"))
+
+SANDBOX_POOL = None
+if SANDBOX_BACKEND == "local":
+    SANDBOX_POOL = SandboxPool(LocalSandbox, idle_ttl=SANDBOX_IDLE_TTL, spare=SANDBOX_PREWARM,
+                               exec_timeout=SANDBOX_EXEC_TIMEOUT)
+elif E2B_AVAILABLE and E2B_API_KEY:
+    SANDBOX_POOL = SandboxPool(_create_e2b_sandbox, idle_ttl=SANDBOX_IDLE_TTL, spare=SANDBOX_PREWARM,
+                               exec_timeout=SANDBOX_EXEC_TIMEOUT)
+
+# 本地执行进程池：工作进程数（0为在服务进程内执行，auto为CPU核数），单次执行超时秒数
+LOCAL_EXEC_WORKERS = os.getenv("LOCAL_EXEC_WORKERS", "0")
+LOCAL_EXEC_TIMEOUT = float(os.getenv("LOCAL_EXEC_TIMEOUT", "120"))
+
+# 交给生成代码的df：cow为写时复制（默认，不复制整个数据集），copy为每次深拷贝
+EXEC_DATA_MODE = os.getenv("EXEC_DATA_MODE", "cow")
+if EXEC_DATA_MODE not in EXEC_DATA_MODES:
+    raise ValueError(f"EXEC_DATA_MODE必须是 {', '.join(EXEC_DATA_MODES)} 之一")
+if EXEC_DATA_MODE == "cow":
+    enable_copy_on_write()
+
+# 生成的图表：按内容哈希保存在临时目录，相同的图只保存一份，超过有效期或容量时淘汰
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", DEFAULT_ARTIFACT_DIR)
+ARTIFACT_MAX_MB = int(os.getenv("ARTIFACT_MAX_MB", "256"))
+ARTIFACT_TTL_MINUTES = float(os.getenv("ARTIFACT_TTL_MINUTES", "60"))
+
+ARTIFACT_STORE = ArtifactStore(
+    ARTIFACT_DIR,
+    ARTIFACT_MAX_MB * 1024 * 1024,
+    ttl_seconds=ARTIFACT_TTL_MINUTES * 60 or None,
+)
+
+# 执行后收集所有打开的图：编码格式（png/jpeg/webp）和DPI，用于在清晰度和体积之间取舍
+FIGURE_FORMAT = os.getenv("FIGURE_FORMAT", "png")
+FIGURE_DPI = float(os.getenv("FIGURE_DPI", "100"))
+if FIGURE_FORMAT not in FIGURE_FORMATS:
+    raise ValueError(f"FIGURE_FORMAT必须是 {', '.join(FIGURE_FORMATS)} 之一")
+
+# 执行结果缓存：同一份数据上执行相同代码（忽略注释和格式）时直接返回上次的输出和图（0为关闭）
+EXEC_CACHE_MAX_MB = int(os.getenv("EXEC_CACHE_MAX_MB", "128"))
+EXEC_CACHE = ExecutionCache(EXEC_CACHE_MAX_MB * 1024 * 1024) if EXEC_CACHE_MAX_MB > 0 else None
+
+# 进程内执行时每个请求使用独立的pyplot图列表和rcParams，可并行绘图（0为串行执行）
+ISOLATED_FIGURES = os.getenv("ISOLATED_FIGURES", "1") != "0"
+
+# 各阶段耗时统计（默认关闭）：Prometheus指标（METRICS_PORT为0时不提供/metrics接口）
+# 和每个请求一行的JSON日志（METRICS_LOG为空时输出到控制台）
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") != "0"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+METRICS_LOG = os.getenv("METRICS_LOG", "")
+metrics.configure(METRICS_ENABLED, METRICS_LOG)
+_METRICS_SERVER = None
+
+# 界面开始监听后在后台预先导入的模块
+PREWARM_MODULES = ["matplotlib.pyplot", "seaborn"]
+if SANDBOX_BACKEND == "e2b" and E2B_AVAILABLE and E2B_API_KEY:
+    PREWARM_MODULES.append("e2b")
+
+# 并发：同时进行的分析/文件加载数量上限，以及排队请求数上限（超出后新请求被拒绝）
+# 分析并发一般与LOCAL_EXEC_WORKERS或沙箱数量相当
+ANALYZE_CONCURRENCY = int(os.getenv("ANALYZE_CONCURRENCY", "8"))
+LOAD_CONCURRENCY = int(os.getenv("LOAD_CONCURRENCY", "2"))
+QUEUE_MAX_SIZE = int(os.getenv("QUEUE_MAX_SIZE", "64"))
+
+_exec_workers = os.cpu_count() if LOCAL_EXEC_WORKERS == "auto" else int(LOCAL_EXEC_WORKERS)
+EXEC_POOL = None
+if _exec_workers > 0:
+    EXEC_POOL = ExecutionPool(
+        _exec_workers,
+        timeout=LOCAL_EXEC_TIMEOUT,
+        data_mode=EXEC_DATA_MODE,
+        figure_format=FIGURE_FORMAT,
+        figure_dpi=FIGURE_DPI,
+    )
+
+# 未隔离绘图状态时，进程内执行使用全局的matplotlib状态，同一时间只允许一个
+_INPROCESS_EXEC_LOCK = threading.Lock()
+_STDOUT_INSTALL_LOCK = threading.Lock()
+
+class _ThreadStdout(io.TextIOBase):
+    """按线程重定向print：执行代码的线程写入自己的缓冲区，其他会话的输出不会混入"""
+
+    def __init__(self, target):
+        self._target = target
+        self._local = threading.local()
+
+    def write(self, text):
+        return (getattr(self._local, 'buffer', None) or self._target).write(text)
+
+    def flush(self):
+        self._target.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    @contextlib.contextmanager
+    def capture(self, buffer: io.StringIO):
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+
+def _figure_scope():
+    """进程内执行的绘图状态：按线程隔离，matplotlib不支持时改为串行执行"""
+    global ISOLATED_FIGURES
+    if ISOLATED_FIGURES and not isolation_supported():
+        print("⚠️ 当前matplotlib版本不支持按线程隔离绘图状态，进程内执行将串行进行")
+        ISOLATED_FIGURES = False
+    return isolated_figures(cjk_font_rc()) if ISOLATED_FIGURES else _serial_figures()
+
+@contextlib.contextmanager
+def _serial_figures():
+    """未隔离绘图状态时：串行执行，并在全局rcParams中设置中文字体"""
+    with _INPROCESS_EXEC_LOCK:
+        apply_cjk_font()
+        yield
+
+def _thread_stdout() -> _ThreadStdout:
+    """首次使用时把sys.stdout替换为按线程重定向的版本"""
+    with _STDOUT_INSTALL_LOCK:
+        if not isinstance(sys.stdout, _ThreadStdout):
+            sys.stdout = _ThreadStdout(sys.stdout)
+        return sys.stdout
+
+def _message_text(content) -> str:
+    """对话框消息的文本内容（新版Gradio中content可能是分段列表）"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, dict):
+        return str(content.get("text", ""))
+    if isinstance(content, (list, tuple)):
+        return "".join(_message_text(part) for part in content)
+    return "" if content is None else str(content)
 
 class DataExplorer:
+    """单个会话的数据和分析状态（每个浏览器会话一个实例）"""
+
     def __init__(self):
-        self.df = None
+        self._df = None
+        self._summary = None
+        self.data_version = 0
+        # 数据集内容指纹（上传文件的哈希），用作回答缓存键的一部分
+        self.data_fingerprint = None
         self.conversation_history = []
-        self.sandbox = None
+        # 用于在沙箱池中定位本会话的沙箱
+        self.session_id = uuid.uuid4().hex
+        # 放在共享内存中供本地执行进程池使用的数据集
+        self._shared_dataset = None
+        # 最近一次本地执行的内存报告
+        self.last_memory_report = None
+        # 最近一次流式回答的首个token耗时（秒）
+        self.last_ttft = None
+
+    @property
+    def df(self) -> Optional[pd.DataFrame]:
+        return self._df
+
+    @df.setter
+    def df(self, df: Optional[pd.DataFrame]):
+        # 每次替换数据都产生新版本，旧摘要随之失效
+        self._df = df
+        self.data_version += 1
+        self._summary = None
+        self.data_fingerprint = None
+
+    @property
+    def summary(self) -> Optional[DatasetSummary]:
+        """当前数据版本的摘要（首次使用时创建）"""
+        if self._df is None:
+            return None
+        if self._summary is None or self._summary.version != self.data_version:
+            self._summary = DatasetSummary(self._df, self.data_version)
+        return self._summary
+
+    def load_excel(self, file_path, progress=gr.Progress()) -> Tuple[str, str]:
+        """加载Excel文件（也支持Parquet和Feather文件）"""
+        trace = metrics.start_trace("load_excel")
+        trace.set(session_id=self.session_id)
+        try:
+            overview, preview = self._load_excel(file_path, progress, trace)
+            if not preview:
+                # 加载失败时返回错误提示和空的预览
+                trace.fail(overview)
+            else:
+                trace.set(rows=len(self.df), columns=self.df.shape[1])
+            return overview, preview
+        finally:
+            trace.finish()
 
-    def load_excel(self, file_path) -> Tuple[str, str]:
-        """加载Excel文件"""
+    def _load_excel(self, file_path, progress, trace=metrics.NULL_TRACE) -> Tuple[str, str]:
         try:
             if file_path is None:
                 return "请先上传Excel文件", ""
@@ -56,20 +342,81 @@ class DataExplorer:
                 actual_path = file_path.name if hasattr(file_path, 'name') else str(file_path)
 
             # 检查文件扩展名
-            if not actual_path.lower().endswith(('.xlsx', '.xls')):
-                return "请上传Excel文件（.xlsx或.xls格式）", ""
+            file_type = columnar_type(actual_path)
+            if file_type is None and not actual_path.lower().endswith(('.xlsx', '.xls')):
+                return "请上传Excel文件（.xlsx或.xls格式）、Parquet或Feather文件", ""
+
+            # 相同内容的文件直接从缓存读取清理后的数据
+            # （列式文件内存映射读取，与读缓存一样快，不在缓存中另存一份；
+            # 其指纹只取路径、大小和修改时间，不为计算哈希读取整个文件）
+            use_cache = DATASET_CACHE is not None and file_type is None
+            with trace.span("dataset_cache_lookup"):
+                if file_type is not None:
+                    fingerprint = file_stat_fingerprint(actual_path)
+                else:
+                    fingerprint = file_sha256(actual_path)
+                cache_key = f"{fingerprint}-v{CLEANING_VERSION}"
+                if INGEST_MAX_ROWS:
+                    cache_key += f"-n{INGEST_MAX_ROWS}"
+                if OPTIMIZE_DTYPES:
+                    cache_key += f"-c{CATEGORY_MAX_RATIO:g}"
+                cached_df = DATASET_CACHE.load(cache_key) if use_cache else None
+            total_rows = None
+            dtype_report = None
+            trace.set(dataset_cached=cached_df is not None)
+
+            if cached_df is not None:
+                self.df = cached_df
+            else:
+                # 读取文件（Parquet/Feather内存映射读取；大的Excel文件或设置了行数上限时分块流式读取，
+                # 逐块清理的耗时计入读取）
+                with trace.span("file_load"):
+                    if file_type is not None:
+                        result = read_columnar(actual_path, file_type, max_rows=INGEST_MAX_ROWS or None)
+                        self.df, total_rows = result.df, result.total_rows
+                    elif self._use_streaming(actual_path):
+                        result = ingest(
+                            actual_path, 'xlsx',
+                            chunk_rows=INGEST_CHUNK_ROWS,
+                            max_rows=INGEST_MAX_ROWS or None,
+                            progress=lambda fraction, desc: progress(fraction, desc=desc),
+                        )
+                        self.df, total_rows = result.df, result.total_rows
+                    else:
+                        self.df = pd.read_excel(actual_path)
+
+                if self.df.empty:
+                    return "文件为空", ""
+
+                # 数据清理（流式导入和列式文件读取时已清理）
+                if total_rows is None:
+                    with trace.span("cleaning"):
+                        self.df = self._clean_dataframe(self.df)
+
+                if OPTIMIZE_DTYPES:
+                    with trace.span("dtype_optimize"):
+                        self.df, dtype_report = self._optimize_dtypes(self.df)
+
+                if use_cache:
+                    DATASET_CACHE.save(cache_key, self.df)
+
+            self.data_fingerprint = cache_key
 
-            # 读取Excel文件
-            self.df = pd.read_excel(actual_path)
+            # 生成数据概览
+            with trace.span("summary"):
+                overview = self._generate_data_overview()
 
-            if self.df.empty:
-                return "Excel文件为空", ""
+            if total_rows is not None and total_rows > len(self.df):
+                overview += f"\n\n⚠️ 原始数据共 {total_rows:,} 行，已随机抽样 {len(self.df):,} 行"
 
-            # 数据清理
-            self.df = self._clean_dataframe(self.df)
+            if dtype_report is not None:
+                trace.set(bytes_before=dtype_report.bytes_before, bytes_after=dtype_report.bytes_after)
+                overview += f"\n\n🧠 内存占用: {dtype_report.format()}"
 
-            # 生成数据概览
-            overview = self._generate_data_overview()
+            if use_cache:
+                print(f"📦 数据集缓存: {format_stats(DATASET_CACHE.stats())}")
+                if cached_df is not None:
+                    overview += "\n\n⚡ 已从数据集缓存加载"
 
             # 显示前几行数据
             preview = self.df.head().to_html(classes='table table-striped', escape=False)
@@ -79,76 +426,158 @@ class DataExplorer:
         except Exception as e:
             return f"加载文件失败: {str(e)}", ""
 
+    def _use_streaming(self, path: str) -> bool:
+        """是否使用分块流式导入（.xls旧格式不支持只读流式读取）"""
+        if not path.lower().endswith('.xlsx'):
+            return False
+        if INGEST_MAX_ROWS:
+            return True
+        return os.path.getsize(path) >= STREAMING_INGEST_MIN_MB * 1024 * 1024
+
     def _clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """清理数据框"""
-        # 清理列名
-        df.columns = [str(col).strip() for col in df.columns]
+        return clean_dataframe(df)
 
-        # 处理缺失值和数据类型
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].fillna('').astype(str)
-            else:
-                df[col] = df[col].fillna(0)
-
-        return df
+    def _optimize_dtypes(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, DtypeReport]:
+        """转换为省内存的列类型，输出转换前后的内存占用"""
+        df, report = optimize_dtypes(df, CATEGORY_MAX_RATIO)
+        print(f"🧠 列类型优化: {report.format()}")
+        for name, before, after in report.changes:
+            print(f"   - {name}: {before} -> {after}")
+        return df, report
 
     def _generate_data_overview(self) -> str:
         """生成数据概览"""
         if self.df is None:
             return "没有加载数据"
 
+        summary = self.summary
         overview = f"""
         📊 **数据概览**
 
-        - 数据行数: {self.df.shape[0]:,}
-        - 数据列数: {self.df.shape[1]}
-        - 列名: {', '.join(self.df.columns.tolist())}
+        - 数据行数: {summary.shape[0]:,}
+        - 数据列数: {summary.shape[1]}
+        - 列名: {', '.join(summary.columns)}
 
         📋 **数据类型**
         """
 
-        for col in self.df.columns:
-            non_null_count = self.df[col].count()
-            overview += f"\n- {col}: {self.df[col].dtype} ({non_null_count:,} 非空值)"
+        for col, dtype in summary.dtypes.items():
+            overview += f"\n- {col}: {dtype} ({summary.non_null_counts[col]:,} 非空值)"
 
         return overview
 
     def call_deepseek_api(self, messages: List[dict]) -> Optional[str]:
         """调用Deepseek API"""
-        headers = {
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        data = {
-            "model": "deepseek-chat",
-            "messages": messages,
-            "temperature": 0.1
-        }
-
         try:
-            response = requests.post(DEEPSEEK_API_URL, headers=headers, json=data)
-            response.raise_for_status()
-            result = response.json()
+            result = LLM_CLIENT.chat(messages, model=DEEPSEEK_MODEL, temperature=DEEPSEEK_TEMPERATURE)
             return result['choices'][0]['message']['content']
         except Exception as e:
             return f"API调用失败: {str(e)}"
 
-    def analyze_data(self, user_query: str, history) -> Tuple[list, str]:
-        """分析数据并生成回答"""
+    def analyze_data(self, user_query: str, history) -> Iterator[Tuple[list, Optional[List[str]]]]:
+        """分析数据并生成回答（生成器：流式模式下逐步更新对话，最后一次产出完整回答和图表）"""
+        trace = metrics.start_trace("analyze_data")
+        trace.set(session_id=self.session_id, data_version=self.data_version)
+        try:
+            yield from self._analyze_data(user_query, history, trace)
+        except GeneratorExit:
+            # 用户中断或连接断开
+            trace.finish("cancelled")
+            raise
+        finally:
+            trace.finish()
+
+    def _analyze_data(self, user_query: str, history, trace) -> Iterator[Tuple[list, Optional[List[str]]]]:
+        user_turn = history + [{"role": "user", "content": user_query}]
         if self.df is None:
+            trace.fail("no data")
             new_message = {"role": "assistant", "content": "❌ 请先上传Excel文件"}
-            return history + [{"role": "user", "content": user_query}, new_message], None
+            yield user_turn + [new_message], None
+            return
+
+        with trace.span("prompt_build"):
+            messages = self._build_messages(user_query, history)
+
+        # 同一数据集上的相同问题直接使用缓存的回答
+        cache_key = self._response_cache_key(user_query, messages)
+        response = RESPONSE_CACHE.get(cache_key) if cache_key else None
+        cached = response is not None
+        trace.set(response_cached=cached)
+        execution = None
+        if cached:
+            print(f"💬 回答缓存: {format_response_cache_stats(RESPONSE_CACHE.stats())}")
+        else:
+            # 调用API（流式模式下code字段生成完毕即开始执行代码）
+            started = time.perf_counter()
+            with trace.span("llm_call"):
+                if STREAM_RESPONSES:
+                    response, execution = yield from self._stream_response(messages, user_turn, trace)
+                    trace.set(ttft_ms=round(self.last_ttft * 1000, 3) if self.last_ttft is not None else None)
+                else:
+                    response = self.call_deepseek_api(messages)
+            api_latency = time.perf_counter() - started
+
+        if not response or "API调用失败" in response:
+            trace.fail(str(response))
+            error_msg = {"role": "assistant", "content": f"❌ {response}"}
+            yield user_turn + [error_msg], None
+            return
+
+        try:
+            with trace.span("json_parse"):
+                result = json.loads(extract_json_block(response))
+            # 只缓存能正确解析的回答
+            if cache_key and not cached:
+                RESPONSE_CACHE.put(cache_key, response, api_latency)
 
-        # 准备数据摘要
-        data_summary = {
-            'columns': self.df.columns.tolist(),
-            'shape': self.df.shape,
-            'dtypes': self.df.dtypes.astype(str).to_dict(),
-            'sample_data': self.df.head(3).to_dict(),
-            'description': self.df.describe().to_dict() if self.df.select_dtypes(include=['number']).shape[1] > 0 else {}
-        }
+            analysis = result.get("analysis", "")
+            code = result.get("code", "")
+
+            # 执行代码并获取结果
+            trace.set(code_chars=len(code) if code else 0)
+            if execution is not None and execution[0] == code:
+                # 代码在流式读取时已开始执行
+                execution_result, chart_paths = execution[1].result()
+            else:
+                execution_result, chart_paths = self._execute_code(code, trace)
+            trace.set(output_chars=len(execution_result or ""), charts=len(chart_paths))
+
+            answer = self._format_answer(analysis, execution_result, code)
+            assistant_msg = {"role": "assistant", "content": answer}
+            # 只保留有效的文件路径，没有图时为None
+            valid_chart_paths = [path for path in chart_paths if os.path.isfile(path)]
+
+            yield user_turn + [assistant_msg], valid_chart_paths or None
+
+        except Exception as e:
+            trace.fail(f"处理响应失败: {str(e)}")
+            error_msg = f"❌ 处理响应失败: {str(e)}\n\n原始响应:\n{response}"
+            error_response = {"role": "assistant", "content": error_msg}
+            yield user_turn + [error_response], None
+
+    def _response_cache_key(self, user_query: str, messages: List[dict]) -> Optional[str]:
+        """回答缓存键；未启用缓存或数据不是来自上传文件时返回None"""
+        if RESPONSE_CACHE is None or self.data_fingerprint is None:
+            return None
+        return ResponseCache.make_key(
+            self.data_fingerprint,
+            user_query,
+            messages[1:-1],
+            messages[0]["content"],
+            DEEPSEEK_MODEL,
+            DEEPSEEK_TEMPERATURE,
+            {"token_budget": PROMPT_TOKEN_BUDGET, "max_detailed_columns": PROMPT_MAX_DETAILED_COLUMNS},
+        )
+
+    def _build_messages(self, user_query: str, history) -> List[dict]:
+        """构建发送给模型的消息列表"""
+        # 按token预算选取与问题相关的列（摘要和列索引每个数据版本只计算一次）
+        context = build_data_context(
+            self.summary, user_query,
+            token_budget=PROMPT_TOKEN_BUDGET,
+            max_detailed_columns=PROMPT_MAX_DETAILED_COLUMNS,
+        )
 
         # 构建提示词
         system_prompt = """你是一个专业的数据分析师。根据用户的需求分析Excel数据，并生成相应的Python代码。
@@ -158,7 +587,7 @@ class DataExplorer:
 2. 生成清晰、准确的分析结论
 3. 如果需要生成图表，请使用matplotlib和seaborn
 4. 代码中使用变量名 'df' 来引用数据
-5. 如果生成图表，必须在代码最后加上：plt.savefig('chart.png', dpi=150, bbox_inches='tight')
+5. 画完的图会自动展示（可以有多张），不需要调用plt.savefig或plt.show
 6. 设置图表标题和标签为中文
 7. 确保代码可以直接执行，处理可能的数据类型问题
 
@@ -186,12 +615,11 @@ plt.figure(figsize=(10, 6))
 plt.title('图表标题')
 plt.xlabel('X轴标签')
 plt.ylabel('Y轴标签')
-plt.savefig('chart.png', dpi=150, bbox_inches='tight')
 ```"""
 
         user_message = f"""
 数据信息：
-{json.dumps(data_summary, ensure_ascii=False, indent=2)}
+{context.text}
 
 用户需求：{user_query}
 
@@ -204,98 +632,119 @@ plt.savefig('chart.png', dpi=150, bbox_inches='tight')
         # 添加最近的对话历史
         for msg in history[-6:]:  # 只保留最近3轮对话(用户+助手)
             if isinstance(msg, dict) and "role" in msg:
-                messages.append(msg)
+                messages.append({"role": msg["role"], "content": _message_text(msg.get("content"))})
 
         messages.append({"role": "user", "content": user_message})
 
-        # 调用API
-        response = self.call_deepseek_api(messages)
+        prompt_tokens = sum(estimate_tokens(msg["content"]) for msg in messages)
+        print(
+            f"📝 提示词: 约 {prompt_tokens} tokens（数据信息 {context.tokens}），"
+            f"详细列 {len(context.detailed_columns)}/{context.total_columns}，"
+            f"构建耗时 {context.build_seconds * 1000:.1f} ms"
+        )
 
-        if not response or "API调用失败" in response:
-            error_msg = {"role": "assistant", "content": f"❌ {response}"}
-            return history + [{"role": "user", "content": user_query}, error_msg], None
+        return messages
 
-        try:
-            # 提取JSON内容
-            if '```json' in response:
-                json_start = response.find('```json') + 7
-                json_end = response.find('```', json_start)
-                if json_end != -1:
-                    json_content = response[json_start:json_end].strip()
-                else:
-                    json_content = response
-            else:
-                json_content = response
-
-            result = json.loads(json_content)
+    def _stream_response(self, messages: List[dict], user_turn: list, trace=metrics.NULL_TRACE):
+        """
+        流式读取模型回答，逐步产出对话更新；code字段完整后立即提交执行
 
-            analysis = result.get("analysis", "")
-            code = result.get("code", "")
+        通过yield from使用，返回 (完整回答, (代码, 执行Future)或None)
+        """
+        started = time.perf_counter()
+        self.last_ttft = None
+        chunks = []
+        execution = None
+        shown = None
+        last_yield = 0.0
 
-            # 执行代码并获取结果
-            print(f"🔍 Debug: 准备执行代码 - 长度: {len(code) if code else 0}")
-            execution_result, chart_path = self._execute_code_in_sandbox(code)
-            print(f"🔍 Debug: 执行结果 - 输出: {execution_result[:100] if execution_result else 'None'}")
-            print(f"🔍 Debug: 图表路径: {chart_path}")
+        try:
+            stream = LLM_CLIENT.stream_chat(messages, model=DEEPSEEK_MODEL, temperature=DEEPSEEK_TEMPERATURE)
+            for delta in stream:
+                now = time.perf_counter()
+                if self.last_ttft is None:
+                    # 此时代码还未开始执行，print不会混入执行输出
+                    self.last_ttft = now - started
+                    print(f"⏱️ 首个token: {self.last_ttft:.2f}s")
+                chunks.append(delta)
+                text = "".join(chunks)
+
+                if execution is None:
+                    code, complete = partial_json_string(text, "code")
+                    if complete:
+                        execution = (code, CODE_EXECUTOR.submit(self._execute_code, code, trace))
+
+                # 限制刷新频率，避免每个token都重绘对话框
+                if now - last_yield < STREAM_UPDATE_INTERVAL:
+                    continue
+                analysis, _ = partial_json_string(text, "analysis")
+                if analysis is not None and analysis != shown:
+                    shown = analysis
+                    last_yield = now
+                    yield user_turn + [{"role": "assistant", "content": self._format_answer(analysis + " ▌")}], None
+        except Exception as e:
+            return f"API调用失败: {str(e)}", None
 
-            # 构建回答
-            answer = f"📊 **分析结果**\n\n{analysis}"
+        if execution is not None:
+            yield user_turn + [{"role": "assistant", "content": self._format_answer(shown or "") + "\n\n⏳ 正在执行代码..."}], None
+        return "".join(chunks), execution
 
-            if execution_result:
-                answer += f"\n\n💻 **执行结果**\n```\n{execution_result}\n```"
+    def _format_answer(self, analysis: str, execution_result: str = "", code: str = "") -> str:
+        """构建回答"""
+        answer = f"📊 **分析结果**\n\n{analysis}"
 
-            if code:
-                answer += f"\n\n🔍 **生成的代码**\n```python\n{code}\n```"
+        if execution_result:
+            answer += f"\n\n💻 **执行结果**\n```\n{execution_result}\n```"
 
-            assistant_msg = {"role": "assistant", "content": answer}
-            # 确保chart_path是有效的文件路径或None
-            valid_chart_path = None
-            if chart_path and os.path.isfile(chart_path):
-                valid_chart_path = chart_path
-            
-            return history + [{"role": "user", "content": user_query}, assistant_msg], valid_chart_path
+        if code:
+            answer += f"\n\n🔍 **生成的代码**\n```python\n{code}\n```"
 
-        except Exception as e:
-            error_msg = f"❌ 处理响应失败: {str(e)}\n\n原始响应:\n{response}"
-            error_response = {"role": "assistant", "content": error_msg}
-            return history + [{"role": "user", "content": user_query}, error_response], None
+        return answer
 
-    def _execute_code_in_sandbox(self, code: str) -> Tuple[str, Optional[str]]:
-        """在E2B沙箱中执行代码"""
+    def _execute_code(self, code: str, trace=metrics.NULL_TRACE) -> Tuple[str, List[str]]:
+        """执行代码，返回输出和图表文件路径；相同数据上执行过相同代码时直接使用缓存的结果"""
         if not code.strip():
-            return "", None
-
+            return "", []
+
+        cache_key = self._execution_cache_key(code)
+        result = EXEC_CACHE.get(cache_key) if cache_key else None
+        trace.set(execution_cached=result is not None)
+        if result is not None:
+            print(f"⚡ 执行缓存: {format_exec_cache_stats(EXEC_CACHE.stats())}")
+        else:
+            result = self._execute_code_in_sandbox(code, trace)
+            if cache_key:
+                EXEC_CACHE.put(cache_key, result)
+        if not result.ok:
+            trace.set(execution_error=result.output[:500])
+
+        with trace.span("artifact_store"):
+            return result.output, self._store_figures(result.figures)
+
+    def _execution_cache_key(self, code: str) -> Optional[tuple]:
+        """执行缓存键：上传文件的数据用内容指纹（各会话共享），其他数据只在本会话的当前版本内有效"""
+        if EXEC_CACHE is None:
+            return None
+        fingerprint = self.data_fingerprint or (self.session_id, self.data_version)
+        return ExecutionCache.make_key(fingerprint, code, FIGURE_FORMAT, FIGURE_DPI)
+
+    def _execute_code_in_sandbox(self, code: str, trace=metrics.NULL_TRACE) -> ExecutionOutput:
+        """在E2B沙箱中执行代码，返回输出和代码画出的图"""
         try:
-            # 如果没有E2B或API密钥，使用本地执行
-            if not E2B_AVAILABLE or not E2B_API_KEY:
-                return self._execute_code_locally(code)
-
-            # 尝试使用E2B沙箱执行
-            with Sandbox() as sandbox:
-                # 上传数据到沙箱
-                df_csv = self.df.to_csv(index=False)
-                sandbox.filesystem.write("data.csv", df_csv)
-
-                # 准备执行代码
-                full_code = f"""
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import warnings
-warnings.filterwarnings('ignore')
+            # 如果没有可用的沙箱，使用本地执行
+            if SANDBOX_POOL is None:
+                return self._execute_code_locally(code, trace)
 
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
-
-# 读取数据
-df = pd.read_csv('data.csv')
-
-{code}
-"""
+            # 复用本会话的预热沙箱，数据只在版本变化时上传一次
+            with contextlib.ExitStack() as stack:
+                with trace.span("sandbox_acquire"):
+                    sandbox = stack.enter_context(SANDBOX_POOL.session(self.session_id))
+                with trace.span("data_upload"):
+                    sandbox.ensure_dataset(self.data_version, self._serialize_dataset)
 
                 # 执行代码
-                result = sandbox.run_code(full_code)
+                with trace.span("code_execution"):
+                    result = sandbox.run_code(code, FIGURE_FORMAT, FIGURE_DPI)
 
                 output = ""
                 if result.stdout:
@@ -303,31 +752,41 @@ df = pd.read_csv('data.csv')
                 if result.stderr:
                     output += f"错误: {result.stderr}"
 
-                # 检查是否生成了图片
-                chart_path = None
-                if sandbox.filesystem.exists("chart.png"):
-                    chart_content = sandbox.filesystem.read("chart.png")
-                    chart_path = "temp_chart.png"
-                    with open(chart_path, "wb") as f:
-                        f.write(chart_content)
-
-                return output, chart_path
+                # 读取代码画出的所有图
+                with trace.span("chart_encode"):
+                    figures = sandbox.read_figures()
+                return ExecutionOutput(output, figures, not getattr(result, "error", None))
 
         except Exception as e:
-            # 如果E2B执行失败，尝试本地执行
-            print(f"⚠️ E2B执行失败，尝试本地执行: {str(e)}")
-            return self._execute_code_locally(code)
+            # 如果沙箱执行失败，尝试本地执行
+            print(f"⚠️ 沙箱执行失败，尝试本地执行: {str(e)}")
+            return self._execute_code_locally(code, trace)
+
+    def _serialize_dataset(self) -> bytes:
+        """将数据集序列化为Parquet，上传到沙箱"""
+        buffer = io.BytesIO()
+        self.df.to_parquet(buffer, index=False)
+        return buffer.getvalue()
 
-    def _execute_code_locally(self, code: str) -> Tuple[str, Optional[str]]:
+    def _execute_code_locally(self, code: str, trace=metrics.NULL_TRACE) -> ExecutionOutput:
         """本地执行代码（备用方案）"""
+        if EXEC_POOL is not None:
+            try:
+                return self._execute_code_in_pool(code, trace)
+            except TimeoutError as e:
+                return ExecutionOutput(f"执行错误: {str(e)}", [], False)
+            except Exception as e:
+                print(f"⚠️ 进程池执行失败，改为进程内执行: {str(e)}")
+
         try:
             # 设置matplotlib后端
             import matplotlib
             matplotlib.use('Agg')
+            _load_plotting()
 
-            # 准备执行环境
+            # 准备执行环境（默认写时复制，不为每次执行复制整个数据集）
             local_vars = {
-                'df': self.df.copy(),
+                'df': frame_for_execution(self.df, EXEC_DATA_MODE),
                 'pd': pd,
                 'plt': plt,
                 'sns': sns
@@ -336,50 +795,123 @@ df = pd.read_csv('data.csv')
             # 捕获输出
             output_buffer = io.StringIO()
 
-            # 重定向print输出
-            import sys
-            old_stdout = sys.stdout
-            sys.stdout = output_buffer
+            # 重定向本线程的print输出
+            stdout = _thread_stdout()
 
+            monitor = PeakRSSMonitor()
             try:
                 # 执行代码
-                exec(code, globals(), local_vars)
-
-                # 恢复stdout
-                sys.stdout = old_stdout
+                # 每次执行使用独立的绘图状态和中文字体设置（或串行执行）；savefig保存的图截获到内存，不写入工作目录
+                with _figure_scope(), stdout.capture(output_buffer), capture_savefig() as saved, monitor:
+                    try:
+                        with trace.span("code_execution"):
+                            exec(code, globals(), local_vars)
+                    except Exception:
+                        plt.close('all')
+                        raise
+                    # 收集所有打开的图（在内存中编码后关闭）
+                    with trace.span("chart_encode"):
+                        figures = collect_figures(FIGURE_FORMAT, FIGURE_DPI)
 
                 output = output_buffer.getvalue()
 
-                # 检查是否生成了图片
-                chart_path = None
-                if os.path.exists("chart.png") and os.path.isfile("chart.png"):
-                    chart_path = os.path.abspath("chart.png")
+                # 代码已关闭所有图时，使用其通过savefig保存的图
+                if not figures and saved:
+                    name = CHART_FILE if CHART_FILE in saved else next(reversed(saved))
+                    figures = [CapturedFigure(saved[name], os.path.splitext(name)[1] or ".png")]
 
-                return output, chart_path
+                return ExecutionOutput(output, figures)
 
             except Exception as e:
-                sys.stdout = old_stdout
-                return f"执行错误: {str(e)}", None
-
-        except Exception as e:
-            return f"本地执行失败: {str(e)}", None
+                return ExecutionOutput(f"执行错误: {str(e)}", [], False)
 
-# 创建应用实例
-explorer = DataExplorer()
+            finally:
+                self._report_memory(monitor.report)
 
-def create_interface():
-    """创建Gradio界面"""
+        except Exception as e:
+            return ExecutionOutput(f"本地执行失败: {str(e)}", [], False)
+
+    def _execute_code_in_pool(self, code: str, trace=metrics.NULL_TRACE) -> ExecutionOutput:
+        """在本地执行进程池中执行代码，数据集通过共享内存传递"""
+        if self._shared_dataset is None or self._shared_dataset.version != self.data_version:
+            if self._shared_dataset is not None:
+                self._shared_dataset.close()
+            self._shared_dataset = SharedDataset(self.df, self.data_version)
+
+        # 图在工作进程中编码，编码耗时计入代码执行
+        with trace.span("code_execution"):
+            result = EXEC_POOL.run(self._shared_dataset, code)
+        self._report_memory(result.memory)
+        if result.error:
+            return ExecutionOutput(f"执行错误: {result.error}", [], False)
+
+        return ExecutionOutput(result.output, result.figures)
+
+    def _store_figures(self, figures: List[CapturedFigure]) -> List[str]:
+        """把图保存到图表存储，返回文件路径"""
+        return [ARTIFACT_STORE.put(figure.data, figure.extension) for figure in figures]
+
+    def _report_memory(self, report):
+        """记录并输出一次执行的峰值内存"""
+        if report is None:
+            return
+        self.last_memory_report = report
+        print(f"🧠 执行内存: {report.format()}")
+
+    def close(self):
+        """释放会话占用的沙箱和共享内存（会话结束时由Gradio调用）"""
+        if SANDBOX_POOL is not None:
+            SANDBOX_POOL.release(self.session_id)
+        if self._shared_dataset is not None:
+            self._shared_dataset.close()
+            self._shared_dataset = None
+
+# 事件处理函数：从会话状态中取出本会话的DataExplorer
+def load_excel(file_path, explorer: DataExplorer, progress=gr.Progress()) -> Tuple[str, str]:
+    return explorer.load_excel(file_path, progress)
+
+def analyze_data(user_query: str, history, explorer: DataExplorer):
+    yield from explorer.analyze_data(user_query, history)
+
+def prewarm():
+    """在后台导入绘图模块，预热字体、沙箱和本地执行进程（界面开始监听后调用，不拖慢启动）"""
+    prewarm_imports_async(PREWARM_MODULES)
+    warm_up_fonts_async()
+    if SANDBOX_POOL is not None:
+        SANDBOX_POOL.prewarm()
+    if EXEC_POOL is not None:
+        EXEC_POOL.start()
+
+def start_metrics_server():
+    """启用统计且设置了METRICS_PORT时，在后台提供Prometheus的/metrics接口（只启动一次）"""
+    global _METRICS_SERVER
+    if not METRICS_ENABLED or not METRICS_PORT or _METRICS_SERVER is not None:
+        return
+    try:
+        _METRICS_SERVER = metrics.start_http_server(METRICS_PORT)
+        print(f"📈 指标接口: http://0.0.0.0:{METRICS_PORT}/metrics")
+    except OSError as e:
+        print(f"⚠️ 指标接口启动失败: {str(e)}")
+
+def create_interface(prewarm_now: bool = True):
+    """创建Gradio界面（prewarm_now=False时由调用方在launch之后调用prewarm()）"""
+    if prewarm_now:
+        prewarm()
+    start_metrics_server()
 
     with gr.Blocks(title="AI数据探索器", theme=gr.themes.Soft()) as demo:
         gr.Markdown("# 🤖 AI数据探索器")
-        gr.Markdown("上传Excel文件，然后输入你的数据分析需求，AI将为你生成图表和解答！")
+        gr.Markdown("上传Excel、Parquet或Feather文件，然后输入你的数据分析需求，AI将为你生成图表和解答！")
+
+        # 每个浏览器会话独立的数据和对话状态，会话结束时释放沙箱
+        session_state = gr.State(DataExplorer, delete_callback=DataExplorer.close)
 
         with gr.Row():
             with gr.Column(scale=1):
                 # 文件上传区域
                 file_upload = gr.File(
-                    label="📁 上传Excel文件",
-                    file_types=[".xlsx", ".xls"],
+                    label="📁 上传Excel / Parquet / Feather文件",
+                    file_types=[".xlsx", ".xls", *COLUMNAR_EXTENSIONS],
                     type="filepath"
                 )
 
@@ -409,10 +941,11 @@ def create_interface():
                     submit_btn = gr.Button("🚀 分析", variant="primary")
                     clear_btn = gr.Button("🗑️ 清空对话")
 
-                # 图表显示
-                chart_output = gr.Image(
+                # 图表显示（代码画出的所有图）
+                chart_output = gr.Gallery(
                     label="📈 生成的图表",
-                    show_label=True
+                    show_label=True,
+                    columns=2
                 )
 
         # 示例问题
@@ -434,34 +967,33 @@ def create_interface():
 
         # 事件处理
         file_upload.change(
-            fn=explorer.load_excel,
-            inputs=[file_upload],
-            outputs=[data_overview, data_preview]
-        )
-
-        submit_btn.click(
-            fn=explorer.analyze_data,
-            inputs=[user_input, chatbot],
-            outputs=[chatbot, chart_output]
-        ).then(
-            fn=lambda: "",  # 清空输入框
-            outputs=user_input
+            fn=load_excel,
+            inputs=[file_upload, session_state],
+            outputs=[data_overview, data_preview],
+            api_name="load",
+            concurrency_limit=LOAD_CONCURRENCY,
+            concurrency_id="load"
         )
 
-        user_input.submit(
-            fn=explorer.analyze_data,
-            inputs=[user_input, chatbot],
-            outputs=[chatbot, chart_output]
+        gr.on(
+            triggers=[submit_btn.click, user_input.submit],
+            fn=analyze_data,
+            inputs=[user_input, chatbot, session_state],
+            outputs=[chatbot, chart_output],
+            api_name="analyze",
+            concurrency_limit=ANALYZE_CONCURRENCY,
+            concurrency_id="analyze"
         ).then(
             fn=lambda: "",  # 清空输入框
             outputs=user_input
         )
 
         clear_btn.click(
-            fn=lambda: ([], ""),
+            fn=lambda: ([], None),
             outputs=[chatbot, chart_output]
         )
 
+    demo.queue(max_size=QUEUE_MAX_SIZE)
     return demo
 
 if __name__ == "__main__":
@@ -470,10 +1002,14 @@ if __name__ == "__main__":
         print("⚠️  警告: 未设置E2B_API_KEY环境变量，将使用本地代码执行（功能受限）")
         print("请在 .env 文件中设置: E2B_API_KEY=your_api_key")
 
-    # 启动应用
-    demo = create_interface()
+    # 启动应用：界面开始监听后再在后台预热
+    demo = create_interface(prewarm_now=False)
     demo.launch(
         server_name="0.0.0.0",
-        server_port=7860,
-        share=False
-    )
\ No newline at end of file
+        server_port=int(os.getenv("GRADIO_SERVER_PORT", "7860")),
+        share=False,
+        prevent_thread_lock=True
+    )
+    prewarm()
+    # launch没有阻塞：保持主线程运行，直到服务停止
+    demo.block_thread()
\ No newline at end of file
@@ -0,0 +1,324 @@
+"""
+大文件流式导入：分块读取CSV/xlsx，逐块清理并转换为Arrow列式表，可选按行数上限随机抽样；
+Parquet/Feather文件内存映射读取，可只读取部分列
+"""
+
+import os
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from data_cleaning import clean_column_name, clean_dataframe
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+# 列式文件的扩展名 -> 文件类型（Feather v2即Arrow IPC文件格式）
+COLUMNAR_EXTENSIONS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+    '.ipc': 'feather',
+}
+
+# progress(完成比例 0~1, 描述文字)
+ProgressCallback = Callable[[float, str], None]
+
+
+class IngestResult(NamedTuple):
+    df: pd.DataFrame
+    total_rows: int  # 文件中的总行数（抽样前）
+
+    @property
+    def sampled(self) -> bool:
+        return self.total_rows > len(self.df)
+
+
+def ingest(
+    source,
+    file_type: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    max_rows: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    stringify_other: bool = False,
+    seed: int = 0,
+) -> IngestResult:
+    """
+    流式导入文件，source可以是路径或二进制文件对象，file_type为'csv'或'xlsx'
+
+    超过max_rows时对全部行做等概率无放回抽样，抽样结果保持文件中的原始顺序。
+    某块中整列为空的列不在该块中推断类型，合并后由其他块的非空值决定，与一次性读取的列类型一致。
+    """
+    if file_type == 'csv':
+        chunks = _iter_csv_chunks(source, chunk_rows)
+    elif file_type == 'xlsx':
+        chunks = _iter_xlsx_chunks(source, chunk_rows)
+    else:
+        raise ValueError(f"不支持流式导入的文件类型: {file_type}")
+
+    sampler = _BottomKSampler(max_rows, seed) if max_rows else None
+    tables: List[pa.Table] = []
+    total_rows = 0
+    # 在某一块中整列为空、需在合并后再清理的列（按位置）
+    deferred = set()
+
+    for chunk, fraction in chunks:
+        table, blank = _chunk_table(chunk, stringify_other)
+        deferred.update(blank)
+        total_rows += table.num_rows
+
+        if sampler:
+            sampler.add(table)
+        else:
+            tables.append(table)
+
+        if progress:
+            progress(fraction, f"已读取 {total_rows:,} 行")
+
+    if sampler:
+        table = sampler.result()
+    else:
+        table = _concat_tables(tables)
+
+    if progress:
+        progress(1.0, f"导入完成，共 {total_rows:,} 行")
+
+    df = table.to_pandas()
+    if deferred:
+        # 缺失值按合并后的列类型填充（数值列填0，文本列填空字符串）
+        positions = sorted(deferred)
+        refilled = clean_dataframe(df.iloc[:, positions], stringify_other=stringify_other)
+        for i, position in enumerate(positions):
+            df.isetitem(position, refilled.iloc[:, i])
+    return IngestResult(df, total_rows)
+
+
+def _chunk_table(chunk: pd.DataFrame, stringify_other: bool):
+    """
+    清理一块数据并转换为Arrow表，返回 (表, 整列为空的列位置)
+
+    整列为空的列不清理，保持为null类型：合并时随其他块中的类型提升，
+    不会因为这一块推断为文本而把整列转为字符串。
+    """
+    blank = np.flatnonzero(chunk.isna().all(axis=0).to_numpy())
+    if not len(blank):
+        cleaned = clean_dataframe(chunk, stringify_other=stringify_other)
+        return pa.Table.from_pandas(cleaned, preserve_index=False), []
+
+    filled = np.setdiff1d(np.arange(chunk.shape[1]), blank)
+    cleaned = pa.Table.from_pandas(
+        clean_dataframe(chunk.iloc[:, filled], stringify_other=stringify_other),
+        preserve_index=False,
+    )
+    columns = iter(cleaned.columns)
+    blank_set = set(blank.tolist())
+    arrays = [
+        pa.nulls(len(chunk)) if i in blank_set else next(columns)
+        for i in range(chunk.shape[1])
+    ]
+    names = [clean_column_name(name) for name in chunk.columns]
+    return pa.Table.from_arrays(arrays, names=names), sorted(blank_set)
+
+
+def columnar_type(path: str) -> Optional[str]:
+    """按扩展名判断列式文件类型，不是Parquet/Feather时返回None"""
+    return COLUMNAR_EXTENSIONS.get(os.path.splitext(str(path))[1].lower())
+
+
+def read_columnar(
+    source,
+    file_type: str,
+    columns: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+    stringify_other: bool = False,
+    seed: int = 0,
+) -> IngestResult:
+    """
+    读取Parquet或Feather文件，source为路径时内存映射读取，columns不为空时只读取这些列
+
+    未压缩的Feather文件中每列只有一个数据块时，没有缺失值的数值列直接引用映射的文件内容而不复制，
+    页面在被访问时才从磁盘读入，并且打开同一文件的各会话共享操作系统的页缓存。
+    超过max_rows时与ingest相同，对全部行等概率抽样。
+    """
+    table = _read_columnar_table(source, file_type, columns)
+    total_rows = table.num_rows
+
+    if max_rows and total_rows > max_rows:
+        sampler = _BottomKSampler(max_rows, seed)
+        sampler.add(table)
+        table = sampler.result()
+
+    # 每列单独成块，不合并为二维数组（合并会复制所有数值列）
+    df = table.to_pandas(split_blocks=True)
+    return IngestResult(clean_dataframe(df, stringify_other=stringify_other), total_rows)
+
+
+def _read_columnar_table(source, file_type: str, columns: Optional[List[str]]) -> pa.Table:
+    memory_map = isinstance(source, (str, os.PathLike))
+    if file_type == 'parquet':
+        import pyarrow.parquet as pq
+
+        return pq.read_table(source, columns=columns, memory_map=memory_map)
+    if file_type == 'feather':
+        import pyarrow.feather as feather
+
+        return feather.read_table(source, columns=columns, memory_map=memory_map)
+    raise ValueError(f"不支持的列式文件类型: {file_type}")
+
+
+def _iter_csv_chunks(source, chunk_rows: int) -> Iterator:
+    """按块读取CSV，进度按已读取的字节数估算"""
+    handle = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    try:
+        size = _stream_size(handle)
+        for chunk in pd.read_csv(handle, chunksize=chunk_rows):
+            yield chunk, _fraction(handle.tell(), size)
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+def _iter_xlsx_chunks(source, chunk_rows: int) -> Iterator:
+    """
+    用openpyxl只读模式逐行读取第一个工作表
+
+    进度按工作表记录的行数计算；write_only等方式写出的文件没有记录尺寸时，
+    按已读取的文件字节数估算（工作表XML通常占文件的绝大部分）。
+    """
+    from openpyxl import load_workbook
+
+    handle = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    try:
+        size = _stream_size(handle)
+        workbook = load_workbook(handle, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            total = sheet.max_row
+            rows = sheet.iter_rows(values_only=True)
+
+            def fraction(read: int) -> float:
+                return _fraction(read, total) if total else _fraction(handle.tell(), size)
+
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = _unique_columns(header)
+            width = len(columns)
+
+            batch = []
+            read = 1
+            for row in rows:
+                # 未记录尺寸的工作表中，每行末尾的空单元格会被省略，补齐为表头的列数
+                if len(row) != width:
+                    row = tuple(row[:width]) + (None,) * (width - len(row))
+                batch.append(row)
+                if len(batch) >= chunk_rows:
+                    read += len(batch)
+                    yield pd.DataFrame(batch, columns=columns), fraction(read)
+                    batch = []
+
+            if batch or read == 1:
+                read += len(batch)
+                yield pd.DataFrame(batch, columns=columns), fraction(read)
+        finally:
+            workbook.close()
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+def _unique_columns(header) -> List[str]:
+    """与pd.read_excel一致：空表头命名为Unnamed: i，重复列名追加.1、.2"""
+    columns = []
+    seen = {}
+    for i, name in enumerate(header):
+        name = f"Unnamed: {i}" if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def _stream_size(handle) -> int:
+    try:
+        return os.fstat(handle.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        # 内存文件对象（如Streamlit上传的文件）
+        position = handle.tell()
+        size = handle.seek(0, os.SEEK_END)
+        handle.seek(position)
+        return size
+
+
+def _fraction(done: int, total: int) -> float:
+    return min(done / total, 0.99) if total else 0.0
+
+
+def _concat_tables(tables: List[pa.Table]) -> pa.Table:
+    """合并各块，各块推断出的类型不一致时（如一块为数值、另一块为文本）统一转为字符串"""
+    if not tables:
+        return pa.table({})
+    try:
+        return pa.concat_tables(tables, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        pass
+
+    conflicting = set()
+    for name in tables[0].column_names:
+        types = {table.schema.field(name).type for table in tables}
+        if len(types) > 1:
+            conflicting.add(name)
+
+    unified = []
+    for table in tables:
+        for name in conflicting:
+            index = table.schema.get_field_index(name)
+            column = table.column(index).cast(pa.string())
+            table = table.set_column(index, name, column)
+        unified.append(table)
+
+    return pa.concat_tables(unified, promote_options="permissive")
+
+
+class _BottomKSampler:
+    """
+    分块抽样：给每行分配一个随机键，始终保留键最小的k行，
+    结果等价于在全部行中等概率无放回抽样k行，而内存只需保存k行
+    """
+
+    def __init__(self, k: int, seed: int):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.table: Optional[pa.Table] = None
+        self.keys = np.empty(0)
+        self.positions = np.empty(0, dtype=np.int64)
+        self.offset = 0
+
+    def add(self, table: pa.Table):
+        keys = self.rng.random(table.num_rows)
+        positions = np.arange(self.offset, self.offset + table.num_rows)
+        self.offset += table.num_rows
+
+        if self.table is not None:
+            table = _concat_tables([self.table, table])
+            keys = np.concatenate([self.keys, keys])
+            positions = np.concatenate([self.positions, positions])
+
+        if table.num_rows > self.k:
+            keep = np.argpartition(keys, self.k)[:self.k]
+            table = table.take(keep)
+            keys = keys[keep]
+            positions = positions[keep]
+
+        self.table, self.keys, self.positions = table, keys, positions
+
+    def result(self) -> pa.Table:
+        if self.table is None:
+            return pa.table({})
+        # 按原始行号排序，保持文件中的顺序
+        return self.table.take(np.argsort(self.positions))
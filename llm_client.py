@@ -0,0 +1,200 @@
+"""
+Deepseek API客户端（Gradio和Streamlit两个前端共用）
+
+- 复用HTTP连接池（keep-alive），避免每轮对话重新建立TLS连接
+- 连接/读取超时可配置，上游卡住时不会无限阻塞
+- 对连接错误、超时、429和5xx做有限次数的重试，退避时间带随机抖动
+- stream_chat以SSE方式流式返回生成的内容（重试只发生在收到第一个字节之前）
+"""
+
+import asyncio
+import json
+import random
+import time
+from typing import AsyncIterator, Iterator, List, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_URL = "https://api.deepseek.com/v1/chat/completions"
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LLMRequestError(Exception):
+    """重试用尽后仍然失败"""
+
+
+class _RetryPolicy:
+    def __init__(self, max_retries: int, backoff_base: float, backoff_max: float):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """指数退避 + 全抖动；服务端给出Retry-After时以其为准"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+class DeepseekClient:
+    """基于requests.Session的同步客户端，可在多线程间共享"""
+
+    def __init__(self, api_key: str, api_url: str = DEFAULT_API_URL,
+                 connect_timeout: float = 5.0, read_timeout: float = 120.0,
+                 max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 pool_size: int = 20):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.retry = _RetryPolicy(max_retries, backoff_base, backoff_max)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+
+    def chat(self, messages: List[dict], model: str = "deepseek-chat",
+             temperature: Optional[float] = None, **extra) -> dict:
+        """调用chat completions接口，返回完整的响应JSON"""
+        payload = _build_payload(messages, model, temperature, extra)
+        response = self._post(payload)
+        return response.json()
+
+    def stream_chat(self, messages: List[dict], model: str = "deepseek-chat",
+                    temperature: Optional[float] = None, **extra) -> Iterator[str]:
+        """流式调用chat completions接口，逐段返回生成的文本"""
+        payload = _build_payload(messages, model, temperature, {**extra, "stream": True})
+        response = self._post(payload, stream=True)
+        with response:
+            # SSE未声明charset时requests会按ISO-8859-1解码，中文会乱码
+            response.encoding = "utf-8"
+            for line in response.iter_lines(decode_unicode=True):
+                delta = _parse_sse_line(line)
+                if delta is _SSE_DONE:
+                    break
+                if delta:
+                    yield delta
+
+    def _post(self, payload: dict, stream: bool = False) -> requests.Response:
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout,
+                                             stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.retry.max_retries:
+                    raise LLMRequestError(f"请求失败（已重试{attempt}次）: {str(e)}") from e
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.retry.max_retries:
+                    if not response.ok:
+                        response.close()
+                    response.raise_for_status()
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                response.close()
+
+            time.sleep(self.retry.delay(attempt, retry_after))
+            attempt += 1
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncDeepseekClient:
+    """基于httpx.AsyncClient的异步客户端，重试和超时策略与同步版本一致"""
+
+    def __init__(self, api_key: str, api_url: str = DEFAULT_API_URL,
+                 connect_timeout: float = 5.0, read_timeout: float = 120.0,
+                 max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 pool_size: int = 20):
+        self.api_url = api_url
+        self.retry = _RetryPolicy(max_retries, backoff_base, backoff_max)
+        self.client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def chat(self, messages: List[dict], model: str = "deepseek-chat",
+                   temperature: Optional[float] = None, **extra) -> dict:
+        payload = _build_payload(messages, model, temperature, extra)
+        response = await self._send(payload)
+        return response.json()
+
+    async def stream_chat(self, messages: List[dict], model: str = "deepseek-chat",
+                          temperature: Optional[float] = None, **extra) -> AsyncIterator[str]:
+        payload = _build_payload(messages, model, temperature, {**extra, "stream": True})
+        response = await self._send(payload, stream=True)
+        try:
+            async for line in response.aiter_lines():
+                delta = _parse_sse_line(line)
+                if delta is _SSE_DONE:
+                    break
+                if delta:
+                    yield delta
+        finally:
+            await response.aclose()
+
+    async def _send(self, payload: dict, stream: bool = False) -> httpx.Response:
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                request = self.client.build_request("POST", self.api_url, json=payload)
+                response = await self.client.send(request, stream=stream)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                if attempt >= self.retry.max_retries:
+                    raise LLMRequestError(f"请求失败（已重试{attempt}次）: {str(e)}") from e
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.retry.max_retries:
+                    if response.is_error:
+                        await response.aclose()
+                    response.raise_for_status()
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                await response.aclose()
+
+            await asyncio.sleep(self.retry.delay(attempt, retry_after))
+            attempt += 1
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def _build_payload(messages: List[dict], model: str, temperature: Optional[float],
+                   extra: dict) -> dict:
+    payload = {"model": model, "messages": messages, **extra}
+    if temperature is not None:
+        payload["temperature"] = temperature
+    return payload
+
+
+_SSE_DONE = object()
+
+
+def _parse_sse_line(line: str):
+    """解析一行SSE：返回本行的增量文本，流结束时返回_SSE_DONE，其余情况返回None"""
+    if not line or not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return _SSE_DONE
+    try:
+        chunk = json.loads(data)
+    except json.JSONDecodeError:
+        return None
+    choices = chunk.get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content")
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+对话回放压测：模拟多位分析师同时使用Gradio应用
+
+每段对话为一次文件上传加若干个问题，每段对话使用独立的会话（gradio_client的Client）。
+对话按泊松过程到达（--rate，每秒到达的对话数；0为闭环：并发数个会话连续回放），
+同时进行的对话不超过--concurrency。结束后输出吞吐量，以及每类事件（load_excel / analyze_data）
+的p50/p95/p99延迟和错误率。
+
+对话文件为JSON列表，例如：
+    [{"file": "test_sales_data.xlsx", "questions": ["分析数据的基本统计信息", "生成销售额的趋势图"]}]
+
+用法:
+    # 压测已启动的应用（应用应指向模拟服务: python stub_llm_server.py ...）
+    python load_test.py --url http://127.0.0.1:7860 --conversations conversations.json --concurrency 8
+
+    # 自动启动模拟服务和应用，用合成数据回放
+    python load_test.py --launch --concurrency 8 --rate 2 --total 40 --latency 0.5
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+DEFAULT_QUESTIONS = [
+    "分析数据的基本统计信息",
+    "生成销售额的趋势图",
+    "显示各类别的分布情况",
+]
+
+# 自动启动应用时使用的脚本（界面开始监听后再预热）
+_APP_SCRIPT = (
+    "from gradio_app import create_interface, prewarm\n"
+    "demo = create_interface(prewarm_now=False)\n"
+    "demo.launch(server_name='127.0.0.1', server_port={port}, prevent_thread_lock=True)\n"
+    "prewarm()\n"
+    "demo.block_thread()\n"
+)
+
+
+class Sample(NamedTuple):
+    event: str
+    seconds: float
+    ok: bool
+
+
+def percentile(values: List[float], q: float) -> float:
+    """线性插值的百分位数（values已排序）"""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class LoadTest:
+    """回放对话并记录每个事件的延迟和结果"""
+
+    def __init__(self, url: str, conversations: List[dict]):
+        self.url = url
+        self.conversations = conversations
+        self.samples: List[Sample] = []
+        self.errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, event: str, started: float, ok: bool, error: Optional[str] = None):
+        with self._lock:
+            self.samples.append(Sample(event, time.perf_counter() - started, ok))
+            if error:
+                key = f"{event}: {error[:80]}"
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def replay(self, conversation: dict):
+        """在新会话中回放一段对话；上传失败时跳过后续问题"""
+        from gradio_client import Client, handle_file
+
+        try:
+            client = Client(self.url, verbose=False, download_files=False)
+        except Exception as e:
+            self._record("connect", time.perf_counter(), False, str(e))
+            return
+
+        started = time.perf_counter()
+        try:
+            overview, preview = client.predict(handle_file(conversation["file"]), api_name="/load")
+            # 加载失败时应用返回错误提示和空的预览
+            ok = bool(preview)
+            self._record("load_excel", started, ok, None if ok else str(overview))
+        except Exception as e:
+            self._record("load_excel", started, False, str(e))
+            return
+        if not ok:
+            return
+
+        history = []
+        for question in conversation["questions"]:
+            started = time.perf_counter()
+            try:
+                history, _ = client.predict(question, history, api_name="/analyze")
+                answer = history[-1]["content"] if history else ""
+                answer = answer if isinstance(answer, str) else json.dumps(answer, ensure_ascii=False)
+                # 应用把API和执行错误作为以❌开头的回答返回
+                ok = bool(history) and not answer.startswith("❌")
+                self._record("analyze_data", started, ok, None if ok else answer)
+            except Exception as e:
+                self._record("analyze_data", started, False, str(e))
+
+    def run(self, total: int, concurrency: int, rate: float, seed: int = 0) -> float:
+        """回放total段对话（循环使用对话列表），返回总耗时"""
+        rng = random.Random(seed)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="analyst") as executor:
+            futures = []
+            for i in range(total):
+                if rate > 0 and i:
+                    # 泊松到达：到达间隔服从指数分布；并发已满时新对话排队等待
+                    time.sleep(rng.expovariate(rate))
+                futures.append(executor.submit(self.replay, self.conversations[i % len(self.conversations)]))
+            for future in futures:
+                future.result()
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float, conversations: int) -> dict:
+        events = {}
+        for event in sorted({sample.event for sample in self.samples}):
+            samples = [sample for sample in self.samples if sample.event == event]
+            seconds = sorted(sample.seconds for sample in samples)
+            failures = sum(1 for sample in samples if not sample.ok)
+            events[event] = {
+                "count": len(samples),
+                "errors": failures,
+                "error_rate": failures / len(samples),
+                "throughput": len(samples) / elapsed,
+                "mean": sum(seconds) / len(seconds),
+                "p50": percentile(seconds, 0.50),
+                "p95": percentile(seconds, 0.95),
+                "p99": percentile(seconds, 0.99),
+                "max": seconds[-1],
+            }
+        return {
+            "elapsed": elapsed,
+            "conversations": conversations,
+            "conversations_per_second": conversations / elapsed,
+            "events": events,
+            "errors": self.errors,
+        }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"⏱️ 共 {report['conversations']} 段对话，耗时 {report['elapsed']:.1f}s，"
+        f"吞吐量 {report['conversations_per_second']:.2f} 段对话/秒",
+        f"{'事件':<14} {'次数':>6} {'错误率':>7} {'次/秒':>7} {'p50(s)':>8} {'p95(s)':>8} {'p99(s)':>8} {'最大(s)':>8}",
+    ]
+    for event, stats in report["events"].items():
+        lines.append(
+            f"{event:<14} {stats['count']:>6} {stats['error_rate']:>7.1%} {stats['throughput']:>7.2f} "
+            f"{stats['p50']:>8.2f} {stats['p95']:>8.2f} {stats['p99']:>8.2f} {stats['max']:>8.2f}"
+        )
+    if report["errors"]:
+        lines.append("❌ 错误:")
+        for error, count in sorted(report["errors"].items(), key=lambda item: -item[1]):
+            lines.append(f"   {count:>4} × {error}")
+    return "\n".join(lines)
+
+
+def wait_until_ready(url: str, timeout: float = 120, process: Optional[subprocess.Popen] = None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"应用启动失败（退出码 {process.returncode}）")
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise TimeoutError(f"应用在{timeout:.0f}秒内没有启动: {url}")
+
+
+def launch_app(port: int, llm_url: str) -> subprocess.Popen:
+    """以子进程启动应用，使用模拟服务并关闭回答和执行缓存（每次都完整执行）"""
+    env = dict(os.environ)
+    env.update({
+        "DEEPSEEK_API_URL": llm_url,
+        "DEEPSEEK_API_KEY": "load-test",
+        "RESPONSE_CACHE_MAX_MB": "0",
+        "EXEC_CACHE_MAX_MB": "0",
+    })
+    env.setdefault("SANDBOX_BACKEND", "none")
+    return subprocess.Popen(
+        [sys.executable, "-c", _APP_SCRIPT.format(port=port)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def load_conversations(path: Optional[str], data_file: str, questions: int) -> List[dict]:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return [{"file": data_file, "questions": DEFAULT_QUESTIONS[:questions]}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对话回放压测")
+    parser.add_argument("--url", default="http://127.0.0.1:7860", help="应用地址（--launch时忽略）")
+    parser.add_argument("--conversations", help="对话文件（JSON），默认使用合成数据和示例问题")
+    parser.add_argument("--total", type=int, default=20, help="回放的对话总数")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时进行的对话数上限")
+    parser.add_argument("--rate", type=float, default=0.0, help="每秒到达的对话数，0为闭环")
+    parser.add_argument("--questions", type=int, default=3, help="默认对话中的问题数")
+    parser.add_argument("--rows", type=int, default=2000, help="默认对话使用的合成数据行数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--launch", action="store_true", help="自动启动模拟服务和应用")
+    parser.add_argument("--port", type=int, default=7861, help="--launch时应用的端口")
+    parser.add_argument("--latency", type=float, default=0.5, help="--launch时模拟服务的首个token延迟（秒）")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="--launch时模拟服务流式分块的间隔（秒）")
+    parser.add_argument("--output", help="把结果保存为JSON")
+    args = parser.parse_args()
+
+    data_file = None
+    if not args.conversations:
+        from create_test_data import write_dataset
+
+        data_file = os.path.join(tempfile.gettempdir(), f"load_test_{args.rows}.xlsx")
+        if not os.path.exists(data_file):
+            write_dataset(data_file, args.rows)
+    conversations = load_conversations(args.conversations, data_file, args.questions)
+
+    server = process = None
+    url = args.url
+    try:
+        if args.launch:
+            from stub_llm_server import StubLLMServer
+
+            server = StubLLMServer(latency=args.latency, token_delay=args.token_delay).start()
+            process = launch_app(args.port, server.url)
+            url = f"http://127.0.0.1:{args.port}/"
+        print(f"🚀 等待应用就绪: {url}")
+        wait_until_ready(url, process=process)
+
+        mode = f"泊松到达 {args.rate}/s" if args.rate > 0 else "闭环"
+        print(f"📈 回放 {args.total} 段对话，并发上限 {args.concurrency}，{mode}")
+        test = LoadTest(url, conversations)
+        elapsed = test.run(args.total, args.concurrency, args.rate, args.seed)
+        report = test.report(elapsed, args.total)
+        print(format_report(report))
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"💾 结果已保存: {args.output}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
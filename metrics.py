@@ -0,0 +1,235 @@
+"""
+分析流程的耗时统计：按阶段记录span，导出Prometheus格式的指标，并为每个请求输出一行JSON日志
+
+    trace = start_trace("analyze_data")
+    with trace.span("llm_call"):
+        ...
+    trace.finish()
+
+未启用时start_trace返回空实现，span()只是返回同一个空的上下文管理器，几乎没有开销。
+Gradio的生成器函数每次迭代可能在不同线程中执行，因此trace作为对象显式传递，而不是放在线程/上下文变量中。
+"""
+
+import contextlib
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# 直方图分桶上限（秒）
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_PREFIX = "oidiscover"
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+
+class Registry:
+    """进程内的指标：各阶段及各类请求的耗时直方图，请求数和阶段错误数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], _Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self) -> str:
+        """Prometheus文本格式"""
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._histograms}):
+                lines.append(f"# TYPE {_PREFIX}_{name} histogram")
+                for (metric, labels), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{_PREFIX}_{name}_bucket{_labels(labels, le=repr(bound))} {cumulative}")
+                    lines.append(f"{_PREFIX}_{name}_bucket{_labels(labels, le='+Inf')} {histogram.count}")
+                    lines.append(f"{_PREFIX}_{name}_sum{_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{_PREFIX}_{name}_count{_labels(labels)} {histogram.count}")
+            for name in sorted({name for name, _ in self._counters}):
+                lines.append(f"# TYPE {_PREFIX}_{name} counter")
+                for (metric, labels), value in sorted(self._counters.items()):
+                    if metric == name:
+                        lines.append(f"{_PREFIX}_{name}{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], **extra: str) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Trace:
+    """一次请求的各阶段耗时；finish()时写入指标和JSON日志"""
+
+    def __init__(self, kind: str, registry: Registry, log_file: Optional[str]):
+        self.request_id = uuid.uuid4().hex[:16]
+        self.kind = kind
+        self.status = "ok"
+        self.attributes: Dict[str, object] = {}
+        self.spans: List[dict] = []
+        self._registry = registry
+        self._log_file = log_file
+        self._started = time.perf_counter()
+        self._timestamp = time.time()
+        self._lock = threading.Lock()
+        self._finished = False
+
+    @contextlib.contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except Exception:
+            # 取消（GeneratorExit等）不计为阶段错误，由请求状态体现
+            ok = False
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self._registry.observe("stage_seconds", elapsed, stage=stage)
+            if not ok:
+                self._registry.inc("stage_errors_total", stage=stage)
+            with self._lock:
+                self.spans.append({"stage": stage, "ms": round(elapsed * 1000, 3), "ok": ok,
+                                   "start_ms": round((started - self._started) * 1000, 3)})
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error: str):
+        self.status = "error"
+        self.attributes["error"] = error[:500]
+
+    def finish(self, status: Optional[str] = None):
+        """结束请求（重复调用只记录一次）"""
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+        if status:
+            self.status = status
+        elapsed = time.perf_counter() - self._started
+        self._registry.observe("request_seconds", elapsed, kind=self.kind)
+        self._registry.inc("requests_total", kind=self.kind, status=self.status)
+
+        record = {
+            "ts": round(self._timestamp, 3),
+            "request_id": self.request_id,
+            "kind": self.kind,
+            "status": self.status,
+            "ms": round(elapsed * 1000, 3),
+            "spans": self.spans,
+            **self.attributes,
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        if self._log_file:
+            with _LOG_LOCK, open(self._log_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        else:
+            print(line)
+
+
+class _NullTrace:
+    """未启用统计时使用的空实现"""
+
+    request_id = None
+    _span = contextlib.nullcontext()
+
+    def span(self, stage: str):
+        return self._span
+
+    def set(self, **attributes):
+        pass
+
+    def fail(self, error: str):
+        pass
+
+    def finish(self, status: Optional[str] = None):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+REGISTRY = Registry()
+
+_LOG_LOCK = threading.Lock()
+_enabled = False
+_log_file: Optional[str] = None
+
+
+def configure(enabled: bool, log_file: Optional[str] = None):
+    """启用/关闭统计；log_file为JSON日志文件（为空时输出到控制台）"""
+    global _enabled, _log_file
+    _enabled = enabled
+    _log_file = log_file or None
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def start_trace(kind: str):
+    """开始统计一次请求；未启用时返回NULL_TRACE"""
+    if not _enabled:
+        return NULL_TRACE
+    return Trace(kind, REGISTRY, _log_file)
+
+
+def start_http_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """在后台线程中提供 GET /metrics（Prometheus抓取）"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True).start()
+    return httpd
@@ -0,0 +1,217 @@
+"""
+按token预算构建提示词中的数据信息
+
+宽表（数百列）不再把所有列的统计和示例都放进提示词：按与问题的相关度给列排序，
+只为最相关的列给出统计和示例值，其余列只列出名称和类型，整体不超过token预算。
+"""
+
+import difflib
+import re
+import threading
+import time
+import unicodedata
+import weakref
+from typing import Dict, List, NamedTuple, Set
+
+import pandas as pd
+
+from dataset_summary import DatasetSummary
+
+DEFAULT_TOKEN_BUDGET = 3000
+DEFAULT_MAX_DETAILED_COLUMNS = 30
+
+# 建索引时每列读取的行数，以及文本列最多收录的不同取值
+_INDEX_SAMPLE_ROWS = 200
+_INDEX_MAX_VALUES = 20
+_MAX_VALUE_CHARS = 30
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CJK_RE = re.compile(r"[\u3400-\u9fff]+")
+_CAMEL_RE = re.compile(r"([a-z])([A-Z])")
+
+# 问题中常见、但与具体列无关的词
+_STOPWORDS = {
+    "分析", "数据", "生成", "一个", "显示", "帮我", "情况", "信息", "图表", "找出", "创建",
+    "请问", "哪些", "什么", "多少", "怎么", "如何", "一下", "每个", "各个", "基本",
+    "the", "a", "an", "of", "and", "or", "in", "on", "by", "for", "to", "me", "show",
+    "data", "analyze", "analysis", "chart", "plot", "please",
+}
+
+# 相关度打分权重
+_FULL_NAME_SCORE = 10.0
+_NAME_TERM_SCORE = 3.0
+_FUZZY_SCORE = 2.0
+_VALUE_TERM_SCORE = 1.0
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数：每个汉字约1个token，其余字符约4个一个token"""
+    cjk = sum(len(run) for run in _CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _terms(text: str) -> Set[str]:
+    """拆分为检索词：英文/数字按单词（含驼峰拆分），中文按单字和相邻两字"""
+    text = unicodedata.normalize("NFKC", _CAMEL_RE.sub(r"\1 \2", text)).lower()
+    terms = set(_WORD_RE.findall(text))
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            terms.add(run)
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+class PromptContext(NamedTuple):
+    text: str
+    tokens: int
+    detailed_columns: List[str]
+    total_columns: int
+    build_seconds: float
+
+
+class ColumnIndex:
+    """列名和文本列取值的倒排索引（每个数据版本建一次）"""
+
+    def __init__(self, summary: DatasetSummary):
+        df = summary.df
+        head = df.head(_INDEX_SAMPLE_ROWS)
+
+        self.names = [str(name) for name in df.columns]
+        self.normalized_names = [unicodedata.normalize("NFKC", name).lower() for name in self.names]
+        self.dtypes = [str(dtype) for dtype in df.dtypes]
+        self.non_null = df.count().tolist()
+        self.samples = [head.iloc[:3, i].tolist() for i in range(len(self.names))]
+
+        self.name_postings: Dict[str, List[int]] = {}
+        self.value_postings: Dict[str, List[int]] = {}
+        for position, name in enumerate(self.names):
+            for term in _terms(name):
+                self.name_postings.setdefault(term, []).append(position)
+
+            column = head.iloc[:, position]
+            if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_datetime64_any_dtype(column):
+                continue
+            values = column.dropna().astype(str).unique()[:_INDEX_MAX_VALUES]
+            value_terms = set()
+            for value in values:
+                if len(value) <= _MAX_VALUE_CHARS:
+                    value_terms |= _terms(value)
+            for term in value_terms:
+                self.value_postings.setdefault(term, []).append(position)
+
+        self.ascii_vocabulary = [term for term in self.name_postings if term.isascii()]
+
+    def rank(self, query: str) -> List[int]:
+        """按与问题的相关度返回列的位置，相关度相同的保持原有顺序"""
+        scores = [0.0] * len(self.names)
+        normalized_query = unicodedata.normalize("NFKC", query).lower()
+
+        for position, name in enumerate(self.normalized_names):
+            if len(name) >= 2 and name in normalized_query:
+                scores[position] += _FULL_NAME_SCORE
+
+        for term in _terms(query) - _STOPWORDS:
+            postings = self.name_postings.get(term)
+            if postings:
+                for position in postings:
+                    scores[position] += _NAME_TERM_SCORE
+            elif term.isascii() and len(term) >= 4:
+                # 英文拼写不完全一致时按相似度匹配列名中的单词
+                for match in difflib.get_close_matches(term, self.ascii_vocabulary, n=3, cutoff=0.8):
+                    ratio = difflib.SequenceMatcher(None, term, match).ratio()
+                    for position in self.name_postings[match]:
+                        scores[position] += _FUZZY_SCORE * ratio
+
+            for position in self.value_postings.get(term, ()):
+                scores[position] += _VALUE_TERM_SCORE
+
+        return sorted(range(len(self.names)), key=lambda position: -scores[position])
+
+
+_INDEXES: "weakref.WeakKeyDictionary[DatasetSummary, ColumnIndex]" = weakref.WeakKeyDictionary()
+_INDEX_LOCK = threading.Lock()
+
+
+def column_index(summary: DatasetSummary) -> ColumnIndex:
+    """摘要对应的列索引（与摘要同生命周期）"""
+    with _INDEX_LOCK:
+        index = _INDEXES.get(summary)
+        if index is None:
+            index = _INDEXES[summary] = ColumnIndex(summary)
+        return index
+
+
+def build_data_context(summary: DatasetSummary, query: str,
+                       token_budget: int = DEFAULT_TOKEN_BUDGET,
+                       max_detailed_columns: int = DEFAULT_MAX_DETAILED_COLUMNS) -> PromptContext:
+    """构建提示词中的数据信息，整体不超过token_budget（至少包含一列的详情）"""
+    started = time.perf_counter()
+    index = column_index(summary)
+    rows, total_columns = summary.shape
+
+    lines = [f"数据规模: {rows}行 × {total_columns}列"]
+    if total_columns > max_detailed_columns:
+        lines.append("列详情（按与问题的相关度排序）:")
+    else:
+        lines.append("列详情:")
+    used = estimate_tokens("\n".join(lines))
+
+    order = index.rank(query) if total_columns > 1 else list(range(total_columns))
+    detailed = []
+    for position in order[:max_detailed_columns]:
+        line = _column_line(summary, index, position)
+        cost = estimate_tokens(line) + 1
+        if detailed and used + cost > token_budget:
+            break
+        lines.append(line)
+        detailed.append(position)
+        used += cost
+
+    remaining = order[len(detailed):]
+    if remaining:
+        listed = []
+        prefix = "其他列（列名:类型）: "
+        used += estimate_tokens(prefix)
+        for position in remaining:
+            entry = f"{index.names[position]}:{index.dtypes[position]}"
+            cost = estimate_tokens(entry) + 1
+            if used + cost > token_budget:
+                break
+            listed.append(entry)
+            used += cost
+        if listed:
+            lines.append(prefix + ", ".join(listed))
+        omitted = len(remaining) - len(listed)
+        if omitted:
+            lines.append(f"……另有{omitted}列未列出")
+
+    text = "\n".join(lines)
+    return PromptContext(
+        text=text,
+        tokens=estimate_tokens(text),
+        detailed_columns=[index.names[position] for position in detailed],
+        total_columns=total_columns,
+        build_seconds=time.perf_counter() - started,
+    )
+
+
+def _column_line(summary: DatasetSummary, index: ColumnIndex, position: int) -> str:
+    """一列的紧凑描述：名称、类型、非空数、统计和示例值"""
+    stats = summary.column_stats(position)
+    stats_text = " ".join(
+        f"{key}={_format_value(value)}" for key, value in stats.items() if key != "count"
+    )
+    samples = "; ".join(_format_value(value) for value in index.samples[position])
+    return (
+        f"- {index.names[position]} [{index.dtypes[position]}, 非空{index.non_null[position]}] "
+        f"{stats_text} | 示例: {samples}"
+    )
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    text = str(value)
+    if len(text) > _MAX_VALUE_CHARS:
+        text = text[:_MAX_VALUE_CHARS] + "…"
+    return text
@@ -0,0 +1,124 @@
+"""
+模型回答缓存：以 (数据集内容指纹, 规范化后的问题, 对话上下文, 提示词, 模型, 温度) 为键，
+将解析成功的回答保存在本地磁盘，相同的问题再次提出时直接返回
+"""
+
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional
+
+from disk_cache import DiskLRUCache
+
+# 问题末尾不影响语义的标点
+_TRAILING_PUNCTUATION = "?？!！.。,，;；~～ "
+
+
+def normalize_query(query: str) -> str:
+    """统一全角/半角、大小写和空白，去掉末尾标点"""
+    text = unicodedata.normalize("NFKC", query).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(_TRAILING_PUNCTUATION)
+
+
+class ResponseCache:
+    """模型回答的磁盘缓存，容量按字节数限制并按LRU淘汰，超过TTL的回答不再使用"""
+
+    def __init__(self, directory, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.store = DiskLRUCache(directory, max_bytes, suffix=".json", ttl_seconds=ttl_seconds)
+        # 命中缓存省下的API耗时（按写入时记录的原始耗时累计）
+        self.latency_saved = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(fingerprint: str, query: str, context: List[dict], system_prompt: str,
+                 model: str, temperature: Optional[float],
+                 prompt_options: Optional[Dict[str, object]] = None) -> str:
+        """
+        计算缓存键
+
+        context为随问题一起发送的历史消息，system_prompt变化（如修改提示词）时旧回答自动失效。
+        prompt_options为构建数据信息的参数（token预算、详细列数等），这些参数决定提示词中给出哪些列，
+        变化时旧回答同样失效。
+        """
+        material = json.dumps({
+            "fingerprint": fingerprint,
+            "query": normalize_query(query),
+            "context": [
+                [msg.get("role"), re.sub(r"\s+", " ", str(msg.get("content", ""))).strip()]
+                for msg in context
+            ],
+            "system": hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+            "model": model,
+            "temperature": temperature,
+            "prompt_options": prompt_options or {},
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """命中则返回缓存的回答文本，否则返回None"""
+        path = self.store.get(key)
+        if path is None:
+            return None
+
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            response = entry["response"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 回答缓存读取失败，已丢弃: {str(e)}")
+            self.store.discard(key)
+            return None
+
+        with self._lock:
+            self.latency_saved += entry.get("latency", 0.0)
+        return response
+
+    def put(self, key: str, response: str, latency: float):
+        """写入回答及其API耗时"""
+        data = json.dumps({
+            "response": response,
+            "latency": latency,
+            "created": time.time(),
+        }, ensure_ascii=False).encode("utf-8")
+        try:
+            self.store.put_bytes(key, data)
+        except OSError as e:
+            print(f"⚠️ 回答缓存写入失败: {str(e)}")
+
+    def stats(self) -> Dict[str, float]:
+        """命中率、磁盘占用和节省的API耗时"""
+        stats = self.store.stats()
+        with self._lock:
+            stats['latency_saved'] = self.latency_saved
+        return stats
+
+    def clear(self):
+        self.store.clear()
+
+
+def format_stats(stats: Dict[str, float]) -> str:
+    """将回答缓存统计格式化为一行文字"""
+    return (
+        f"命中 {stats['hits']} 次 / 未命中 {stats['misses']} 次 "
+        f"(命中率 {stats['hit_rate']:.0%})，累计节省 {stats['latency_saved']:.1f}s，"
+        f"{stats['entries']} 个条目，占用 {stats['bytes_on_disk'] / 1024 / 1024:.1f} MB"
+        f" / {stats['max_bytes'] / 1024 / 1024:.0f} MB"
+    )
+
+
+if __name__ == "__main__":
+    # 用法: python response_cache.py [stats|clear]
+    from gradio_app import RESPONSE_CACHE
+
+    if RESPONSE_CACHE is None:
+        print("回答缓存未启用")
+    elif len(sys.argv) > 1 and sys.argv[1] == "clear":
+        RESPONSE_CACHE.clear()
+        print("✅ 回答缓存已清空")
+    else:
+        print(f"💬 回答缓存: {RESPONSE_CACHE.store.directory}")
+        print(format_stats(RESPONSE_CACHE.stats()))
@@ -0,0 +1,55 @@
+"""
+模型回答的解析：提取```json代码块，以及从尚未生成完的JSON中读取字符串字段（流式输出时使用）
+"""
+
+import json
+import re
+from typing import Optional, Tuple
+
+
+def extract_json_block(response: str) -> str:
+    """提取回答中```json ... ```之间的内容，没有代码块时返回原文"""
+    if '```json' in response:
+        json_start = response.find('```json') + 7
+        json_end = response.find('```', json_start)
+        if json_end != -1:
+            return response[json_start:json_end].strip()
+    return response
+
+
+def partial_json_string(text: str, key: str) -> Tuple[Optional[str], bool]:
+    """
+    从可能不完整的JSON文本中读取字符串字段key的值
+
+    返回 (目前已生成的值, 字段是否已完整)；字段尚未出现时返回 (None, False)。
+    """
+    match = re.search(r'"%s"\s*:\s*"' % re.escape(key), text)
+    if match is None:
+        return None, False
+
+    start = match.end()
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '"':
+            return json.loads(text[start - 1:i + 1]), True
+
+    return _decode_partial(text[start:]), False
+
+
+def _decode_partial(raw: str) -> str:
+    """解码未闭合的JSON字符串，丢弃末尾不完整的转义序列"""
+    # 末尾是半个\uXXXX
+    raw = re.sub(r'\\u[0-9a-fA-F]{0,3}$', '', raw)
+    # 末尾是单独的反斜杠
+    trailing = len(raw) - len(raw.rstrip('\\'))
+    if trailing % 2:
+        raw = raw[:-1]
+    try:
+        return json.loads(f'"{raw}"')
+    except json.JSONDecodeError:
+        return raw
@@ -7,6 +7,8 @@ import os
 import sys
 from pathlib import Path
 
+import startup
+
 def setup_environment():
     """设置环境"""
     # 添加当前目录到Python路径
@@ -27,19 +29,13 @@ def setup_environment():
     return True
 
 def check_dependencies():
-    """检查依赖"""
+    """检查依赖（只读取包的元数据，不导入包）"""
     required_packages = [
         "gradio", "pandas", "requests", "matplotlib", 
         "seaborn", "openpyxl", "python-dotenv"
     ]
     
-    missing_packages = []
-    
-    for package in required_packages:
-        try:
-            __import__(package.replace("-", "_"))
-        except ImportError:
-            missing_packages.append(package)
+    missing_packages = startup.missing_packages(required_packages)
     
     if missing_packages:
         print("❌ 缺少以下依赖包:")
@@ -57,6 +53,7 @@ def main():
     """主函数"""
     print("🚀 启动 AI数据探索器 (Gradio版本)")
     print("=" * 50)
+    timer = startup.StartupTimer()
     
     # 设置环境
     if not setup_environment():
@@ -65,25 +62,40 @@ def main():
     # 检查依赖
     if not check_dependencies():
         return
+    timer.mark("环境检查")
     
     # 导入并启动应用
     try:
-        from gradio_app import create_interface
+        from gradio_app import create_interface, prewarm
+        timer.mark("导入应用")
         
         print("✅ 正在启动Gradio应用...")
-        demo = create_interface()
-        
-        print("🌐 应用已启动!")
-        print("📱 本地访问: http://localhost:7860")
-        print("⏹️  按 Ctrl+C 停止应用")
-        print("=" * 50)
+        demo = create_interface(prewarm_now=False)
+        timer.mark("构建界面")
         
         demo.launch(
             server_name="0.0.0.0",
             server_port=7860,
             share=False,
-            show_error=True
+            show_error=True,
+            prevent_thread_lock=True
         )
+        timer.mark("开始监听")
+        
+        # 界面可以访问后，再在后台导入绘图模块并预热执行环境
+        prewarm()
+        
+        print("🌐 应用已启动!")
+        print(timer.format())
+        print("📱 本地访问: http://localhost:7860")
+        print("⏹️  按 Ctrl+C 停止应用")
+        print("=" * 50)
+        
+        # 启动耗时分析：列出导入gradio_app时最耗时的包
+        if os.getenv("STARTUP_PROFILE", "0") != "0":
+            print(startup.import_time_report("gradio_app"))
+        
+        demo.block_thread()
         
     except KeyboardInterrupt:
         print("\n👋 应用已停止")
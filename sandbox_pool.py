@@ -0,0 +1,402 @@
+"""
+会话级沙箱池：每个会话复用一个预热好的沙箱，数据集按版本只上传一次，空闲沙箱按TTL回收
+
+沙箱接口与gradio_app中使用的E2B Sandbox一致：
+    sandbox.filesystem.write(path, content) / read(path) / exists(path)
+    sandbox.run_code(code, timeout=秒数) -> 带 stdout / stderr / error 属性的结果（超时抛出TimeoutException）
+    sandbox.close()
+LocalSandbox是该接口的本地实现（子进程中的持久Python解释器），可在无网络环境下使用和测试。
+"""
+
+import contextlib
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+from typing import Callable, Dict, Hashable, List, Optional
+
+from figure_capture import CapturedFigure, sandbox_script
+from font_config import sandbox_font_code
+
+# 沙箱启动后执行一次：预先导入常用库并配置绘图（含中文字体）
+WARMUP_CODE = """
+import os
+import warnings
+warnings.filterwarnings('ignore')
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+""" + sandbox_font_code()
+
+DATASET_FILE = "data.parquet"
+CHART_FILE = "chart.png"
+# 执行后收集到的图的文件名清单
+FIGURES_MANIFEST = "figures.txt"
+
+# 数据集在沙箱内只读取一次，保存在__dataset__中；每次执行前恢复df并清理上一次的图表
+_LOAD_DATASET_CODE = f"__dataset__ = pd.read_parquet('{DATASET_FILE}')\n"
+_RUN_PRELUDE = f"""
+for __stale__ in ('{CHART_FILE}', '{FIGURES_MANIFEST}'):
+    if os.path.exists(__stale__):
+        os.remove(__stale__)
+plt.close('all')
+df = __dataset__.copy()
+"""
+
+
+class PooledSandbox:
+    """
+    租借给某个会话的沙箱，记录已上传的数据版本和最近使用时间
+
+    执行超过timeout秒时换一个新的沙箱（由factory创建并预热），返回带错误信息的结果，
+    卡住的代码不会一直占用会话的沙箱。
+    """
+
+    def __init__(self, sandbox, timeout: Optional[float] = None,
+                 factory: Optional[Callable[[], object]] = None):
+        self.sandbox = sandbox
+        self.timeout = timeout
+        self.factory = factory
+        self.dataset_version: Optional[Hashable] = None
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+    @property
+    def filesystem(self):
+        return self.sandbox.filesystem
+
+    def ensure_dataset(self, version: Hashable, serialize: Callable[[], bytes]):
+        """沙箱中的数据版本不同时才序列化并上传数据集"""
+        if self.dataset_version == version:
+            return
+        self.sandbox.filesystem.write(DATASET_FILE, serialize())
+        _check(self.sandbox.run_code(_LOAD_DATASET_CODE))
+        self.dataset_version = version
+
+    def run_code(self, code: str, figure_format: str = "png", figure_dpi: float = 100):
+        """在已加载的数据上执行代码，执行成功后把所有打开的图保存为文件（用read_figures读取）"""
+        script = _RUN_PRELUDE + code + "\n" + sandbox_script(figure_format, figure_dpi, FIGURES_MANIFEST)
+        try:
+            if self.timeout is None:
+                result = self.sandbox.run_code(script)
+            else:
+                result = self.sandbox.run_code(script, timeout=self.timeout)
+        except Exception as e:
+            if not _is_timeout(e):
+                raise
+            # 远程沙箱（E2B）超时：关闭卡住的沙箱，换一个新的
+            self._replace_sandbox()
+            return _timeout_result(self.timeout)
+
+        if getattr(result, "restarted", False):
+            # 本地沙箱超时后解释器已被替换：重新预热，数据集在下次执行前重新上传
+            self.dataset_version = None
+            _check(self.sandbox.run_code(WARMUP_CODE))
+        return result
+
+    def read_figures(self) -> List[CapturedFigure]:
+        """读取上一次执行收集的图；代码已关闭所有图时使用其保存的chart.png"""
+        filesystem = self.sandbox.filesystem
+        names = []
+        if filesystem.exists(FIGURES_MANIFEST):
+            manifest = filesystem.read(FIGURES_MANIFEST)
+            if isinstance(manifest, bytes):
+                manifest = manifest.decode("utf-8")
+            names = [name for name in manifest.splitlines() if name]
+        if not names and filesystem.exists(CHART_FILE):
+            names = [CHART_FILE]
+        return [CapturedFigure(filesystem.read(name), os.path.splitext(name)[1]) for name in names]
+
+    def close(self):
+        _close_sandbox(self.sandbox)
+
+    def _replace_sandbox(self):
+        """关闭当前沙箱并换成新建的预热沙箱；没有factory时抛出异常，由池丢弃本沙箱"""
+        _close_sandbox(self.sandbox)
+        if self.factory is None:
+            raise RuntimeError("沙箱执行超时，且无法创建新的沙箱")
+        self.sandbox = self.factory()
+        self.dataset_version = None
+        _check(self.sandbox.run_code(WARMUP_CODE))
+
+
+def _close_sandbox(sandbox):
+    try:
+        closer = getattr(sandbox, "close", None) or getattr(sandbox, "kill")
+        closer()
+    except Exception as e:
+        print(f"⚠️ 关闭沙箱失败: {str(e)}")
+
+
+def _is_timeout(error: Exception) -> bool:
+    """E2B超时抛出e2b.TimeoutException（不一定是TimeoutError的子类），按类名判断，无需导入e2b"""
+    return isinstance(error, TimeoutError) or type(error).__name__ == "TimeoutException"
+
+
+def _timeout_result(timeout: Optional[float]) -> "LocalExecution":
+    message = f"代码执行超过 {timeout:.0f} 秒，已终止"
+    return LocalExecution("", message, f"TimeoutError: {message}", restarted=True)
+
+
+class SandboxPool:
+    """按会话ID分配沙箱，并保留若干预热好的备用沙箱供新会话立即使用"""
+
+    def __init__(self, factory: Callable[[], object], idle_ttl: float = 300,
+                 spare: int = 1, exec_timeout: Optional[float] = None):
+        self.factory = factory
+        self.idle_ttl = idle_ttl
+        self.spare = spare
+        # 单次执行的超时秒数（None为不限制）
+        self.exec_timeout = exec_timeout
+        self._sessions: Dict[str, PooledSandbox] = {}
+        self._spares: List[PooledSandbox] = []
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._reaper: Optional[threading.Thread] = None
+
+    def prewarm(self):
+        """在后台补足备用沙箱，并启动空闲回收线程"""
+        self._start_reaper()
+        self._refill_async()
+
+    @contextlib.contextmanager
+    def session(self, session_id: str):
+        """获取会话的沙箱；同一会话的调用串行执行，出错的沙箱会被丢弃"""
+        pooled = self._lease(session_id)
+        with pooled.lock:
+            try:
+                yield pooled
+            except Exception:
+                self.release(session_id, pooled)
+                raise
+            finally:
+                pooled.last_used = time.monotonic()
+
+    def release(self, session_id: str, pooled: Optional[PooledSandbox] = None):
+        """关闭会话的沙箱（会话结束或沙箱异常时调用）"""
+        with self._lock:
+            current = self._sessions.get(session_id)
+            if current is None or (pooled is not None and current is not pooled):
+                return
+            del self._sessions[session_id]
+        current.close()
+
+    def reap_idle(self):
+        """关闭超过TTL未使用的会话沙箱和备用沙箱（远程沙箱闲置过久可能已被服务端回收），随后补足备用沙箱"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                (sid, pooled) for sid, pooled in self._sessions.items()
+                if now - pooled.last_used > self.idle_ttl and not pooled.lock.locked()
+            ]
+            for sid, _ in expired:
+                del self._sessions[sid]
+            stale_spares = [pooled for pooled in self._spares if now - pooled.last_used > self.idle_ttl]
+            self._spares = [pooled for pooled in self._spares if pooled not in stale_spares]
+        for pooled in [pooled for _, pooled in expired] + stale_spares:
+            pooled.close()
+        if stale_spares:
+            self._refill_async()
+
+    def shutdown(self):
+        """关闭所有沙箱"""
+        with self._lock:
+            pooled_all = list(self._sessions.values()) + self._spares
+            self._sessions.clear()
+            self._spares.clear()
+        for pooled in pooled_all:
+            pooled.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'sessions': len(self._sessions), 'spares': len(self._spares)}
+
+    def _lease(self, session_id: str) -> PooledSandbox:
+        # 在池的锁内刷新最近使用时间：取出后、获得沙箱锁之前不会被reap_idle回收
+        with self._lock:
+            pooled = self._sessions.get(session_id)
+            if pooled is None and self._spares:
+                pooled = self._spares.pop()
+                self._sessions[session_id] = pooled
+            if pooled is not None:
+                pooled.last_used = time.monotonic()
+        if pooled is not None:
+            self._refill_async()
+            return pooled
+
+        # 没有备用沙箱时同步创建
+        pooled = self._create()
+        with self._lock:
+            existing = self._sessions.setdefault(session_id, pooled)
+            existing.last_used = time.monotonic()
+        if existing is not pooled:
+            pooled.close()
+        self._start_reaper()
+        self._refill_async()
+        return existing
+
+    def _create(self) -> PooledSandbox:
+        pooled = PooledSandbox(self.factory(), self.exec_timeout, self.factory)
+        try:
+            _check(pooled.sandbox.run_code(WARMUP_CODE))
+        except Exception:
+            pooled.close()
+            raise
+        return pooled
+
+    def _refill_async(self):
+        with self._lock:
+            if self._refilling or len(self._spares) >= self.spare:
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill, daemon=True).start()
+
+    def _refill(self):
+        try:
+            while True:
+                with self._lock:
+                    if len(self._spares) >= self.spare:
+                        return
+                pooled = self._create()
+                with self._lock:
+                    self._spares.append(pooled)
+        except Exception as e:
+            print(f"⚠️ 预热沙箱失败: {str(e)}")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def _start_reaper(self):
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+        self._reaper.start()
+
+    def _reap_loop(self):
+        interval = max(1.0, min(self.idle_ttl / 2, 60.0))
+        while True:
+            time.sleep(interval)
+            self.reap_idle()
+
+
+def _check(result):
+    """预热和加载数据阶段出错时抛出异常（只看执行错误，stderr中的警告不算失败）"""
+    error = getattr(result, "error", None)
+    if error:
+        raise RuntimeError(f"沙箱初始化失败: {error}")
+
+
+class LocalExecution:
+    def __init__(self, stdout: str, stderr: str, error: Optional[str] = None, restarted: bool = False):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.error = error
+        # 执行超时，子进程已被替换为新的解释器（之前的变量都已丢失）
+        self.restarted = restarted
+
+
+class LocalFilesystem:
+    def __init__(self, root: str):
+        self.root = root
+
+    def write(self, path: str, content):
+        mode = "wb" if isinstance(content, bytes) else "w"
+        with open(self._resolve(path), mode) as f:
+            f.write(content)
+
+    def read(self, path: str) -> bytes:
+        with open(self._resolve(path), "rb") as f:
+            return f.read()
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(self._resolve(path))
+
+    def _resolve(self, path: str) -> str:
+        return os.path.join(self.root, path)
+
+
+class LocalSandbox:
+    """
+    E2B沙箱的本地替身：独立子进程中的持久解释器，工作目录为私有临时目录
+
+    单次执行超过timeout秒时终止子进程并换一个新的解释器，返回带错误信息的结果。
+    """
+
+    def __init__(self, timeout: Optional[float] = 120):
+        self.root = tempfile.mkdtemp(prefix="oid-sandbox-")
+        self.filesystem = LocalFilesystem(self.root)
+        self.timeout = timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._start()
+
+    def _start(self):
+        self._conn, child_conn = self._ctx.Pipe()
+        self._process = self._ctx.Process(target=_local_kernel, args=(child_conn, self.root), daemon=True)
+        self._process.start()
+        child_conn.close()
+
+    def run_code(self, code: str, timeout: Optional[float] = None) -> LocalExecution:
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self._conn.send(code)
+            if not self._conn.poll(timeout):
+                self._kill()
+                self._start()
+                return _timeout_result(timeout)
+            stdout, stderr, error = self._conn.recv()
+        return LocalExecution(stdout, stderr, error)
+
+    def close(self):
+        try:
+            self._conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self._process.join(timeout=5)
+        self._kill()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _kill(self):
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _local_kernel(conn, root: str):
+    """LocalSandbox子进程：循环接收代码，在同一个命名空间中执行"""
+    os.chdir(root)
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    namespace = {"__name__": "__main__"}
+
+    while True:
+        try:
+            code = conn.recv()
+        except EOFError:
+            break
+        if code is None:
+            break
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        error = None
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                exec(code, namespace)
+            except Exception as e:
+                traceback.print_exc()
+                error = f"{type(e).__name__}: {e}"
+        conn.send((stdout.getvalue(), stderr.getvalue(), error))
@@ -4,14 +4,17 @@
 """
 
 if __name__ == "__main__":
-    from gradio_app import create_interface
+    from gradio_app import create_interface, prewarm
     
     print("🚀 启动AI数据探索器...")
-    demo = create_interface()
+    demo = create_interface(prewarm_now=False)
     demo.launch(
         server_name="127.0.0.1",
         server_port=7860,
         share=False,
         show_error=True,
-        quiet=False
-    )
\ No newline at end of file
+        quiet=False,
+        prevent_thread_lock=True
+    )
+    prewarm()
+    demo.block_thread()
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+启动加速与启动耗时分析
+
+- 依赖检查只读取已安装包的元数据，不导入包本身
+- 绘图、沙箱SDK等重量级模块在界面开始监听后由后台线程导入
+- 导入耗时报告：用 python -X importtime 在子进程中导入指定模块，按顶层包汇总耗时
+
+命令行用法：
+    python startup.py [模块名，默认gradio_app] [--top N]
+"""
+
+import importlib
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from importlib import metadata
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def missing_packages(distributions: Iterable[str]) -> List[str]:
+    """返回未安装的发行包名（按pip中的名称，如python-dotenv）"""
+    missing = []
+    for name in distributions:
+        try:
+            metadata.version(name)
+        except metadata.PackageNotFoundError:
+            missing.append(name)
+    return missing
+
+
+class StartupTimer:
+    """记录启动各阶段的耗时"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.stages: List[Tuple[str, float]] = []
+
+    def mark(self, stage: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self.stages.append((stage, elapsed))
+        self._last = now
+        return elapsed
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def format(self) -> str:
+        parts = "，".join(f"{stage} {elapsed:.2f}s" for stage, elapsed in self.stages)
+        return f"⏱️ 启动耗时 {self.total:.2f}s（{parts}）"
+
+
+def prewarm_imports_async(modules: Sequence[str], name: str = "import-prewarm") -> threading.Thread:
+    """在后台线程中依次导入模块，首次使用时不再等待导入"""
+    def run():
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                print(f"⚠️ 预加载模块 {module} 失败: {str(e)}")
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def import_times(module: str, cwd: Optional[str] = None) -> List[Tuple[str, int, int, int]]:
+    """
+    在新的子进程中导入模块，返回 -X importtime 的逐项结果
+
+    每项为 (模块名, 自身耗时μs, 累计耗时μs, 嵌套深度)。
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd or os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    if result.returncode != 0 and not entries:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr[-2000:]}")
+    return entries
+
+
+def import_time_report(module: str = "gradio_app", top: int = 15) -> str:
+    """按顶层包汇总导入耗时，列出最耗时的包"""
+    entries = import_times(module)
+    by_package: Dict[str, int] = {}
+    for name, self_us, _, _ in entries:
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    total_us = next((cumulative for name, _, cumulative, _ in entries if name == module),
+                    sum(by_package.values()))
+    lines = [f"📦 导入 {module} 共 {total_us / 1e6:.2f}s（{len(entries)} 个模块），耗时最多的包："]
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"   {package:<24} {self_us / 1e3:8.1f} ms  {self_us / total_us:6.1%}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="导入耗时报告")
+    parser.add_argument("module", nargs="?", default="gradio_app")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    print(import_time_report(args.module, args.top))
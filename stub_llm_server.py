@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+本地模拟的chat completions服务，用于离线测试和压测（不调用真实的Deepseek API）
+
+用法:
+    python stub_llm_server.py --port 8765 --latency 0.5 --fail-rate 0.1 --token-delay 0.02
+    DEEPSEEK_API_URL=http://127.0.0.1:8765/v1/chat/completions python gradio_app.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 回答中的代码只使用df的通用属性，适用于任意数据集
+_TABLE_CODE = "print(df.shape)\nprint(df.describe())"
+_CHART_CODE = (
+    "import matplotlib.pyplot as plt\n"
+    "numeric = df.select_dtypes(include=['number'])\n"
+    "plt.figure(figsize=(10, 6))\n"
+    "numeric.iloc[:, 0].plot(kind='hist')\n"
+    "plt.title('分布')\n"
+    "plt.savefig('chart.png', dpi=150, bbox_inches='tight')"
+)
+
+
+def build_reply(query: str) -> str:
+    """根据用户消息生成与真实模型格式一致的回答（```json代码块）"""
+    wants_chart = any(word in query for word in ("图", "chart", "plot", "趋势", "分布"))
+    result = {
+        "analysis": "这是模拟服务返回的分析结论。",
+        "code": _CHART_CODE if wants_chart else _TABLE_CODE,
+        "has_visualization": wants_chart,
+    }
+    return f"```json\n{json.dumps(result, ensure_ascii=False, indent=2)}\n```"
+
+
+# 流式回答每个分块的字符数
+_STREAM_CHUNK_CHARS = 8
+
+
+class StubLLMServer:
+    """
+    可在进程内启动的模拟服务：latency为每次请求的固定延迟（流式时即首个token的延迟），
+    fail_rate为返回503的概率，token_delay为流式回答相邻分块之间的间隔
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, fail_rate: float = 0.0, token_delay: float = 0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.token_delay = token_delay
+        self.requests = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                server.requests += 1
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if random.random() < server.fail_rate:
+                    self._send_json(503, {"error": {"message": "stub overloaded"}})
+                    return
+
+                messages = payload.get("messages") or [{}]
+                content = build_reply(str(messages[-1].get("content", "")))
+                if payload.get("stream"):
+                    self._send_stream(content, payload.get("model", "deepseek-chat"))
+                    return
+                self._send_json(200, {
+                    "id": f"stub-{server.requests}",
+                    "object": "chat.completion",
+                    "model": payload.get("model", "deepseek-chat"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                })
+
+            def _send_json(self, status: int, body: dict):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, content: str, model: str):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                for start in range(0, len(content), _STREAM_CHUNK_CHARS):
+                    if start and server.token_delay:
+                        time.sleep(server.token_delay)
+                    self._send_event({
+                        "id": f"stub-{server.requests}",
+                        "object": "chat.completion.chunk",
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": content[start:start + _STREAM_CHUNK_CHARS]},
+                            "finish_reason": None,
+                        }],
+                    })
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def _send_event(self, body: dict):
+                data = json.dumps(body, ensure_ascii=False)
+                self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟的chat completions服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="每次请求的延迟（秒）")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="返回503的概率")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="流式回答分块之间的间隔（秒）")
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.host, args.port, args.latency, args.fail_rate, args.token_delay)
+    print(f"🧪 模拟LLM服务已启动: {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
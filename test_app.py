@@ -40,7 +40,8 @@ def test_basic_functionality():
         test_query = "显示数据的基本信息"
         try:
             history = []
-            result, chart = explorer.analyze_data(test_query, history)
+            # analyze_data是生成器，最后一次产出为完整回答
+            *_, (result, chart) = explorer.analyze_data(test_query, history)
             if result and len(result) > 0:
                 print("✅ AI分析功能正常")
             else:
@@ -23,14 +23,16 @@ def test_chart_generation():
         
         try:
             history = []
-            result, chart_path = explorer.analyze_data(test_query, history)
+            # analyze_data是生成器，最后一次产出为完整回答
+            *_, (result, chart_paths) = explorer.analyze_data(test_query, history)
             
             print(f"📊 返回结果: {len(result)} 条消息")
-            print(f"🖼️ 图表路径: {chart_path}")
+            print(f"🖼️ 图表路径: {chart_paths}")
             
-            if chart_path and os.path.isfile(chart_path):
-                print("✅ 图表生成成功！")
-                print(f"📁 图表文件: {chart_path}")
+            if chart_paths and all(os.path.isfile(path) for path in chart_paths):
+                print(f"✅ 图表生成成功！共 {len(chart_paths)} 张")
+                for path in chart_paths:
+                    print(f"📁 图表文件: {path}")
             else:
                 print("⚠️ 图表未生成或路径无效")
                 
@@ -0,0 +1,166 @@
+"""
+测试内容寻址的图表存储
+"""
+
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+import disk_cache
+from artifact_store import ArtifactStore, capture_savefig
+
+
+def test_same_bytes_give_the_same_key():
+    assert ArtifactStore.key_for(b"chart") == ArtifactStore.key_for(b"chart")
+    assert ArtifactStore.key_for(b"chart") != ArtifactStore.key_for(b"other")
+    assert ArtifactStore.key_for(b"chart", ".svg").endswith(".svg")
+
+
+def test_put_and_get_round_trip(tmp_path):
+    store = ArtifactStore(tmp_path)
+    path = store.put(b"chart", ".png")
+
+    assert Path(path).read_bytes() == b"chart"
+    assert Path(path).name == ArtifactStore.key_for(b"chart", ".png")
+    assert store.get(ArtifactStore.key_for(b"chart", ".png")) == path
+
+
+def test_same_content_is_stored_once(tmp_path):
+    store = ArtifactStore(tmp_path)
+    first = store.put(b"chart")
+    second = store.put(b"chart")
+
+    assert first == second
+    stats = store.stats()
+    assert (stats["hits"], stats["entries"]) == (1, 1)
+
+
+def test_missing_and_expired_keys(tmp_path):
+    store = ArtifactStore(tmp_path, ttl_seconds=60)
+    assert store.get(ArtifactStore.key_for(b"never stored")) is None
+
+    path = store.put(b"chart")
+    os.utime(path, (0, 0))
+    assert store.get(ArtifactStore.key_for(b"chart")) is None
+    assert not os.path.exists(path)
+    # 过期后再次保存得到新文件
+    assert Path(store.put(b"chart")).read_bytes() == b"chart"
+
+
+def test_failed_write_leaves_no_partial_file(tmp_path, monkeypatch):
+    store = ArtifactStore(tmp_path)
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(disk_cache.os, "replace", fail)
+    with pytest.raises(OSError):
+        store.put(b"chart")
+
+    assert list(tmp_path.iterdir()) == []
+    assert store.get(ArtifactStore.key_for(b"chart")) is None
+
+
+def test_concurrent_puts_of_the_same_chart(tmp_path):
+    store = ArtifactStore(tmp_path)
+    data = os.urandom(256 * 1024)
+    barrier = threading.Barrier(8)
+    paths = []
+
+    def put():
+        barrier.wait()
+        paths.append(store.put(data))
+
+    threads = [threading.Thread(target=put) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(paths)) == 1
+    assert Path(paths[0]).read_bytes() == data
+    # 只有最终文件，没有残留的临时文件
+    assert [p.name for p in tmp_path.iterdir()] == [Path(paths[0]).name]
+
+
+@pytest.fixture
+def counted_savefig(monkeypatch):
+    """把Figure.savefig换成计数的包装，检查截获时实际渲染的次数以及退出后是否恢复"""
+    matplotlib = pytest.importorskip("matplotlib")
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    calls = []
+    original = Figure.savefig
+
+    def savefig(self, fname, *args, **kwargs):
+        calls.append(fname)
+        return original(self, fname, *args, **kwargs)
+
+    monkeypatch.setattr(Figure, "savefig", savefig)
+    return savefig, calls
+
+
+def test_capture_savefig_in_generated_code(tmp_path, monkeypatch, counted_savefig):
+    from matplotlib.figure import Figure
+    import matplotlib.pyplot as plt
+
+    wrapped, calls = counted_savefig
+    monkeypatch.chdir(tmp_path)
+    code = "plt.plot([1, 2, 3])\nplt.savefig('chart.png')\nplt.close('all')"
+
+    with capture_savefig() as saved:
+        assert Figure.savefig is not wrapped
+        exec(code, {"__name__": "__main__"}, {"plt": plt})
+
+    assert list(saved) == ["chart.png"]
+    assert saved["chart.png"].startswith(b"\x89PNG")
+    assert len(calls) == 1
+    assert list(tmp_path.iterdir()) == []
+    # 退出后恢复原来的savefig，再保存就写到文件
+    assert Figure.savefig is wrapped
+    fig = plt.figure()
+    fig.savefig("after.png")
+    plt.close(fig)
+    assert (tmp_path / "after.png").exists()
+
+
+def test_capture_savefig_uses_the_extension_and_nests(tmp_path, monkeypatch, counted_savefig):
+    from matplotlib.figure import Figure
+    import matplotlib.pyplot as plt
+
+    wrapped, _ = counted_savefig
+    monkeypatch.chdir(tmp_path)
+    fig = plt.figure()
+    try:
+        with capture_savefig() as outer:
+            with capture_savefig() as inner:
+                fig.savefig("inner.svg")
+            assert Figure.savefig is not wrapped
+            fig.savefig("outer.jpg")
+    finally:
+        plt.close(fig)
+
+    assert list(inner) == ["inner.svg"] and b"<svg" in inner["inner.svg"]
+    assert list(outer) == ["outer.jpg"] and outer["outer.jpg"].startswith(b"\xff\xd8")
+    assert Figure.savefig is wrapped
+
+
+def test_capture_savefig_leaves_other_threads_alone(tmp_path, counted_savefig):
+    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    fig.add_subplot().plot([1, 2])
+    other = tmp_path / "other.png"
+
+    with capture_savefig() as saved:
+        thread = threading.Thread(target=fig.savefig, args=(other,))
+        thread.start()
+        thread.join()
+
+    assert saved == {}
+    assert other.read_bytes().startswith(b"\x89PNG")
+    plt.close("all")
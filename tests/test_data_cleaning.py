@@ -0,0 +1,114 @@
+"""
+测试两个前端共用的数据清理：Gradio按原类型保留日期列，Streamlit（app1）把日期等其他类型转为字符串
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_cleaning
+from data_cleaning import clean_dataframe
+
+# gradio_app 调用 clean_dataframe(df)，app1 调用 clean_dataframe(df, stringify_other=True)
+GRADIO = {}
+STREAMLIT = {"stringify_other": True}
+
+
+def _frame() -> pd.DataFrame:
+    df = pd.DataFrame({
+        " 名称\n": ["a", None, "c"],
+        "数量": [1, 2, 3],
+        "金额": [1.5, np.nan, 3.0],
+        "退货": [True, False, True],
+        "日期": pd.to_datetime(["2024-01-01", None, "2024-03-01"]),
+        "空日期": pd.Series([pd.NaT] * 3, dtype="datetime64[ns]"),
+        "空文本": [None, None, None],
+        "空数值": [np.nan] * 3,
+        # 孤立的代理字符无法转为Arrow数组，整列走字符清洗
+        "乱码": ["ok\x00x", "bad\ud800", "line\nbreak"],
+    })
+    return df.astype({"空文本": object, "乱码": object})
+
+
+def _values(df: pd.DataFrame) -> dict:
+    return {name: df[name].tolist() for name in df.columns}
+
+
+COMMON = {
+    "名称": ["a", "", "c"],
+    "数量": [1, 2, 3],
+    "金额": [1.5, 0.0, 3.0],
+    "退货": [True, False, True],
+    "空文本": ["", "", ""],
+    "空数值": [0.0, 0.0, 0.0],
+    "乱码": ["okx", "bad", "line break"],
+}
+
+
+def test_gradio_output():
+    df = _frame()
+    cleaned = clean_dataframe(df, **GRADIO)
+
+    # 日期列保持datetime，整列为空的日期列被删除
+    assert cleaned.columns.tolist() == ["名称", "数量", "金额", "退货", "日期", "空文本", "空数值", "乱码"]
+    assert pd.api.types.is_datetime64_any_dtype(cleaned["日期"])
+    assert cleaned["日期"].isna().tolist() == [False, True, False]
+    assert cleaned["退货"].dtype == bool
+    assert cleaned["数量"].dtype == np.int64
+    values = _values(cleaned)
+    del values["日期"]
+    assert values == COMMON
+    # 不修改传入的df
+    pd.testing.assert_frame_equal(df, _frame())
+
+
+def test_streamlit_output():
+    cleaned = clean_dataframe(_frame(), **STREAMLIT)
+
+    # 日期转为字符串后不再为空，空日期列保留；布尔列保持bool
+    assert cleaned.columns.tolist() == ["名称", "数量", "金额", "退货", "日期", "空日期", "空文本", "空数值", "乱码"]
+    assert cleaned["退货"].dtype == bool
+    assert _values(cleaned) == {
+        **COMMON,
+        "日期": ["2024-01-01", "NaT", "2024-03-01"],
+        "空日期": ["NaT", "NaT", "NaT"],
+    }
+
+
+@pytest.mark.parametrize("options", [GRADIO, STREAMLIT])
+def test_output_converts_to_arrow(options):
+    pa = pytest.importorskip("pyarrow")
+    pa.Table.from_pandas(clean_dataframe(_frame(), **options))
+
+
+@pytest.mark.parametrize("options", [GRADIO, STREAMLIT])
+def test_duplicate_column_names_are_cleaned_by_position(options):
+    df = pd.DataFrame([["x", 1.0], [None, None]], columns=["列", "列 "])
+    cleaned = clean_dataframe(df, **options)
+
+    assert cleaned.columns.tolist() == ["列", "列"]
+    assert cleaned.iloc[:, 0].tolist() == ["x", ""]
+    assert cleaned.iloc[:, 1].tolist() == [1.0, 0.0]
+
+
+def test_failed_column_falls_back_to_strip_unsafe_chars(monkeypatch):
+    clean_column = data_cleaning._clean_column
+
+    def failing(column_data, stringify_other):
+        if column_data.name == "乱码":
+            raise TypeError("boom")
+        return clean_column(column_data, stringify_other)
+
+    monkeypatch.setattr(data_cleaning, "_clean_column", failing)
+    errors = []
+    cleaned = clean_dataframe(_frame(), on_column_error=lambda name, e: errors.append((name, str(e))))
+
+    assert errors == [("乱码", "boom")]
+    assert cleaned["乱码"].tolist() == ["okx", "bad", "line break"]
+
+
+def test_fallback_truncates_long_values():
+    df = pd.DataFrame({"长文本": ["\ud800" + "x" * 500]}, dtype=object)
+    cleaned = clean_dataframe(df)
+
+    assert cleaned["长文本"].tolist() == ["x" * 100]
@@ -0,0 +1,75 @@
+"""
+测试数据集摘要：各项统计只计算一次，重名的列不会互相覆盖
+"""
+
+import warnings
+
+import pandas as pd
+
+from dataset_summary import DatasetSummary
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        [[1, "甲", 2.5, True, pd.Timestamp("2024-01-01")],
+         [None, "乙", 3.5, False, pd.NaT],
+         [3, None, None, True, pd.Timestamp("2024-03-01")]],
+        columns=["金额", "名称", "金额", "退货", "日期"],
+    )
+
+
+def test_duplicate_columns_are_kept_apart():
+    summary = DatasetSummary(_frame(), version=1)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert summary.columns == ["金额", "名称", "金额", "退货", "日期"]
+        assert summary.dtypes == {
+            "金额 (第1列)": "float64",
+            "名称": str(summary.df["名称"].dtype),
+            "金额 (第3列)": "float64",
+            "退货": "bool",
+            "日期": str(summary.df["日期"].dtype),
+        }
+        assert summary.non_null_counts == {"金额 (第1列)": 2, "名称": 2, "金额 (第3列)": 2, "退货": 3, "日期": 2}
+        assert summary.sample_data["金额 (第1列)"][0] == 1.0
+        assert summary.sample_data["金额 (第3列)"][0] == 2.5
+        assert summary.description["金额 (第1列)"]["mean"] == 2.0
+        assert summary.description["金额 (第3列)"]["mean"] == 3.0
+    # 摘要不修改原数据的列名
+    assert summary.df.columns.tolist() == ["金额", "名称", "金额", "退货", "日期"]
+
+
+def test_column_stats_by_position():
+    summary = DatasetSummary(_frame(), version=1)
+
+    assert summary.column_stats(0)["mean"] == 2.0
+    assert summary.column_stats(2)["mean"] == 3.0
+    assert summary.column_stats(1)["unique"] == 2
+    assert bool(summary.column_stats(3)["top"]) is True
+    # 同一列只计算一次
+    assert summary.column_stats(0) is summary.column_stats(0)
+
+
+def test_properties_are_computed_once():
+    summary = DatasetSummary(_frame(), version=1)
+
+    for name in ("columns", "dtypes", "non_null_counts", "sample_data", "description", "info"):
+        assert getattr(summary, name) is getattr(summary, name)
+    assert "5 columns" in summary.info
+
+
+def test_unique_columns_share_the_frame():
+    df = pd.DataFrame({"金额": [1.0, 2.0], "名称": ["甲", "乙"]})
+    summary = DatasetSummary(df, version="v1")
+
+    assert summary._labeled is df
+    assert summary.dtypes["金额"] == "float64"
+    assert summary.as_dict()["shape"] == (2, 2)
+    assert "info" in summary.as_dict(include_info=True)
+
+
+def test_no_numeric_columns():
+    summary = DatasetSummary(pd.DataFrame({"名称": ["甲", "乙"]}), version=1)
+
+    assert summary.description == {}
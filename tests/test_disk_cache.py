@@ -0,0 +1,168 @@
+"""
+测试磁盘LRU缓存和数据集缓存
+"""
+
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from dataset_cache import DatasetCache, file_sha256
+from disk_cache import DiskLRUCache
+
+
+def _touch(cache: DiskLRUCache, key: str, atime: float):
+    """把条目的访问时间设为指定值（不依赖文件系统的atime精度）"""
+    path = cache.path_for(key)
+    os.utime(path, (atime, path.stat().st_mtime))
+
+
+def test_put_and_get(tmp_path):
+    """写入后可以读到同一个文件，未写入的键未命中"""
+    cache = DiskLRUCache(tmp_path, max_bytes=1024, suffix=".bin")
+    path = cache.put_bytes("a", b"hello")
+
+    assert cache.get("a") == path
+    assert path.read_bytes() == b"hello"
+    assert cache.get("missing") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes_on_disk"] == 5
+
+
+def test_evicts_least_recently_used(tmp_path):
+    """超过容量时先淘汰最久未访问的条目"""
+    cache = DiskLRUCache(tmp_path, max_bytes=25)
+    cache.put_bytes("a", b"x" * 10)
+    cache.put_bytes("b", b"x" * 10)
+    now = time.time()
+    _touch(cache, "a", now)
+    _touch(cache, "b", now - 100)
+
+    cache.put_bytes("c", b"x" * 10)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expires_entries(tmp_path):
+    """超过TTL的条目读取时视为未命中并删除"""
+    cache = DiskLRUCache(tmp_path, max_bytes=1024, ttl_seconds=60)
+    path = cache.put_bytes("a", b"data")
+    old = time.time() - 120
+    os.utime(path, (old, old))
+
+    assert cache.get("a") is None
+    assert not path.exists()
+
+
+def test_failed_writer_leaves_no_entry(tmp_path):
+    """writer出错时不留下条目和临时文件"""
+    cache = DiskLRUCache(tmp_path, max_bytes=1024)
+
+    def writer(path):
+        path.write_bytes(b"partial")
+        raise RuntimeError("写入失败")
+
+    with pytest.raises(RuntimeError):
+        cache.put("a", writer)
+
+    assert cache.get("a") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_clear(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=1024)
+    cache.put_bytes("a", b"1")
+    cache.put_bytes("b", b"2")
+
+    cache.clear()
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_directory_is_created_on_first_write(tmp_path):
+    directory = tmp_path / "nested" / "cache"
+    cache = DiskLRUCache(directory, max_bytes=1024)
+
+    assert not directory.exists()
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+    assert not directory.exists()
+
+    cache.put_bytes("a", b"data")
+    assert cache.get("a").read_bytes() == b"data"
+
+
+def test_running_total_without_rescanning(tmp_path, monkeypatch):
+    """目录只在首次统计时扫描一次，之后的写入、覆盖和删除直接更新总大小"""
+    (tmp_path / "old").write_bytes(b"x" * 7)
+    cache = DiskLRUCache(tmp_path, max_bytes=1024)
+    assert (cache.stats()["entries"], cache.stats()["bytes_on_disk"]) == (1, 7)
+
+    def no_scan():
+        raise AssertionError("不应再扫描目录")
+
+    monkeypatch.setattr(cache, "_entries", no_scan)
+    cache.put_bytes("a", b"x" * 10)
+    cache.put_bytes("b", b"x" * 20)
+    cache.put_bytes("a", b"x" * 5)
+    cache.discard("b")
+    cache.discard("missing")
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes_on_disk"]) == (2, 12)
+
+
+def test_running_total_follows_eviction_and_expiry(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=25, ttl_seconds=60)
+    cache.put_bytes("a", b"x" * 10)
+    cache.put_bytes("b", b"x" * 10)
+    now = time.time()
+    _touch(cache, "a", now - 100)
+    _touch(cache, "b", now)
+    cache.put_bytes("c", b"x" * 10)
+    assert (cache.stats()["entries"], cache.stats()["bytes_on_disk"]) == (2, 20)
+
+    old = time.time() - 120
+    os.utime(cache.path_for("b"), (old, old))
+    assert cache.get("b") is None
+    assert (cache.stats()["entries"], cache.stats()["bytes_on_disk"]) == (1, 10)
+
+    cache.clear()
+    cache.put_bytes("d", b"x" * 3)
+    assert (cache.stats()["entries"], cache.stats()["bytes_on_disk"]) == (1, 3)
+
+
+def test_dataset_cache_round_trip(tmp_path):
+    """清理后的数据集写入Parquet后原样读回"""
+    cache = DatasetCache(tmp_path, max_bytes=10 * 1024 * 1024)
+    df = pd.DataFrame({"城市": ["北京", "上海"], "销售额": [1.5, 2.0], "数量": [1, 2]})
+
+    assert cache.load("k") is None
+    assert cache.save("k", df)
+    pd.testing.assert_frame_equal(cache.load("k"), df, check_dtype=False)
+
+
+def test_dataset_cache_drops_corrupt_entry(tmp_path):
+    """损坏的缓存文件读取失败时丢弃并返回None"""
+    cache = DatasetCache(tmp_path, max_bytes=1024)
+    cache.store.put_bytes("k", b"not parquet")
+
+    assert cache.load("k") is None
+    assert not cache.store.path_for("k").exists()
+
+
+def test_file_sha256_matches_content(tmp_path):
+    """分块哈希与内容有关，与文件名无关"""
+    a, b, c = tmp_path / "a", tmp_path / "b", tmp_path / "c"
+    a.write_bytes(b"x" * 3_000_000)
+    b.write_bytes(b"x" * 3_000_000)
+    c.write_bytes(b"y" * 3_000_000)
+
+    assert file_sha256(a, chunk_size=1024) == file_sha256(b)
+    assert file_sha256(a) != file_sha256(c)
@@ -0,0 +1,77 @@
+"""
+测试省内存的列类型转换：只做无损转换
+"""
+
+import numpy as np
+import pandas as pd
+
+from dtype_optimizer import optimize_dtypes
+
+
+def _frame(rows: int = 1000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "城市": rng.choice(["北京", "上海", "广州"], rows).astype(object),
+        "订单号": [f"ORD-{i:06d}" for i in range(rows)],
+        "数量": rng.integers(0, 1000, rows).astype(np.int64),
+        "大整数": np.full(rows, 2 ** 40, dtype=np.int64),
+        "单价": rng.integers(0, 100, rows) * 0.5,
+        "精确金额": rng.random(rows),
+        "是否退货": rng.random(rows) < 0.1,
+    })
+
+
+def _assert_same_values(before: pd.DataFrame, after: pd.DataFrame):
+    assert after.columns.tolist() == before.columns.tolist()
+    for i in range(before.shape[1]):
+        assert before.iloc[:, i].astype(object).tolist() == after.iloc[:, i].astype(object).tolist()
+
+
+def test_round_trip_keeps_every_value():
+    df = _frame()
+    optimized, report = optimize_dtypes(df)
+
+    _assert_same_values(df, optimized)
+    assert report.bytes_after < report.bytes_before
+    assert report.saved == report.bytes_before - report.bytes_after
+
+
+def test_chosen_dtypes():
+    optimized, report = optimize_dtypes(_frame())
+
+    assert isinstance(optimized["城市"].dtype, pd.CategoricalDtype)
+    assert optimized["数量"].dtype == np.int32
+    # 超出int32范围、不能用float32精确表示的列保持原类型
+    assert optimized["大整数"].dtype == np.int64
+    assert optimized["单价"].dtype == np.float32
+    assert optimized["精确金额"].dtype == np.float64
+    assert optimized["是否退货"].dtype == bool
+    assert {name for name, _, _ in report.changes} >= {"城市", "数量", "单价"}
+
+
+def test_input_is_not_modified():
+    df = _frame()
+    dtypes = df.dtypes.copy()
+
+    optimize_dtypes(df)
+
+    pd.testing.assert_series_equal(df.dtypes, dtypes)
+
+
+def test_mixed_object_column_is_left_alone():
+    df = pd.DataFrame({"混合": [1, "a", 2.5, None] * 10})
+
+    optimized, report = optimize_dtypes(df)
+
+    assert optimized["混合"].dtype == object
+    assert report.changes == []
+
+
+def test_duplicate_column_names_and_empty_frame():
+    df = pd.DataFrame([[1, 2], [3, 4]], columns=["a", "a"])
+    optimized, _ = optimize_dtypes(df)
+    _assert_same_values(df, optimized)
+
+    empty, report = optimize_dtypes(pd.DataFrame({"a": pd.Series([], dtype=np.int64)}))
+    assert empty.shape == (0, 1)
+    assert report.bytes_before == report.bytes_after
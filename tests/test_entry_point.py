@@ -0,0 +1,59 @@
+"""
+冒烟测试：python gradio_app.py 启动后持续提供服务，而不是预热后立即退出
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("gradio")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(process: subprocess.Popen, port: int, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        assert process.poll() is None, "应用在开始监听前退出"
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.5)
+    pytest.fail(f"应用在{timeout:.0f}秒内没有开始监听")
+
+
+def test_gradio_app_keeps_serving_after_prewarm():
+    port = _free_port()
+    env = dict(os.environ, GRADIO_SERVER_PORT=str(port), SANDBOX_BACKEND="none",
+               GRADIO_ANALYTICS_ENABLED="False", METRICS_ENABLED="0")
+    process = subprocess.Popen(
+        [sys.executable, "gradio_app.py"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for_port(process, port, timeout=120)
+        # 预热在开始监听后进行，完成后主线程仍应保持运行
+        time.sleep(3)
+        assert process.poll() is None
+        with socket.create_connection(("127.0.0.1", port), timeout=5):
+            pass
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
@@ -0,0 +1,64 @@
+"""
+测试代码执行结果缓存：代码规范化和按数据集淘汰
+"""
+
+from exec_cache import ExecutionCache, ExecutionOutput, code_hash, normalize_code
+from figure_capture import CapturedFigure
+
+
+def test_formatting_differences_share_a_hash():
+    """注释、空行、缩进和引号风格不影响代码哈希"""
+    a = "x = df['销售额'].sum()\nprint(x)"
+    b = '# 计算总销售额\nx = df["销售额"].sum()   \n\n\nprint( x )  # 输出\n'
+
+    assert normalize_code(a) == normalize_code(b)
+    assert code_hash(a) == code_hash(b)
+
+
+def test_semantic_changes_change_the_hash():
+    assert code_hash("print(df.head())") != code_hash("print(df.head(10))")
+    assert code_hash("x = 1") != code_hash("y = 1")
+
+
+def test_syntax_errors_fall_back_to_line_normalization():
+    a = "print(df.head(\n\n   "
+    b = "print(df.head(   "
+
+    assert normalize_code(a) == normalize_code(b) == "print(df.head("
+    assert code_hash(a) == code_hash(b)
+
+
+def test_key_includes_fingerprint_and_settings():
+    key = ExecutionCache.make_key("data-1", "print(1)", "png", 100)
+
+    assert key == ExecutionCache.make_key("data-1", "print( 1 )", "png", 100)
+    assert key != ExecutionCache.make_key("data-2", "print(1)", "png", 100)
+    assert key != ExecutionCache.make_key("data-1", "print(1)", "png", 150)
+
+
+def test_only_successful_results_are_cached():
+    cache = ExecutionCache(1024 * 1024)
+    ok = ExecutionOutput("1\n", [CapturedFigure(b"png-bytes", ".png")])
+    failed = ExecutionOutput("执行错误: boom", [], ok=False)
+
+    assert cache.put(("d", "a"), ok)
+    assert not cache.put(("d", "b"), failed)
+    assert cache.get(("d", "a")) == ok
+    assert cache.get(("d", "b")) is None
+
+
+def test_evict_drops_one_dataset():
+    cache = ExecutionCache(1024 * 1024)
+    for fingerprint, code in (("v1", "a"), ("v1", "b"), ("v2", "a")):
+        cache.put(ExecutionCache.make_key(fingerprint, code), ExecutionOutput(code, []))
+
+    assert cache.evict("v1") == 2
+    assert cache.get(ExecutionCache.make_key("v2", "a")) is not None
+    assert cache.stats()["entries"] == 1
+
+
+def test_size_counts_figures_and_messages():
+    small = ExecutionOutput("x", [])
+    large = ExecutionOutput("x", [CapturedFigure(b"0" * 10_000, ".png")], messages=("消息",))
+
+    assert large.size() > small.size() + 10_000
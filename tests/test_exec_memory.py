@@ -0,0 +1,88 @@
+"""
+测试交给生成代码的df与原数据隔离，以及峰值内存监控
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from exec_memory import EXEC_DATA_MODES, PeakRSSMonitor, enable_copy_on_write, frame_for_execution
+
+# 与gradio_app一致：cow模式依赖写时复制
+enable_copy_on_write()
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "销售额": np.arange(5, dtype=float),
+        "数量": np.arange(5),
+        "类别": list("甲乙丙丁戊"),
+    })
+
+
+MUTATIONS = [
+    "df['销售额'] = 0",
+    "df.loc[0, '数量'] = 100",
+    "df.iloc[1, 0] = -1.0",
+    "df['类别'].iloc[2] = '改'",
+    "df.fillna(0, inplace=True); df.drop(columns=['类别'], inplace=True)",
+    "df.sort_values('销售额', ascending=False, inplace=True)",
+    "df['新列'] = df['数量'] * 2",
+    "df.rename(columns={'数量': '件数'}, inplace=True)",
+]
+
+
+# 生成的代码常用链式赋值，写时复制下只会产生警告
+@pytest.mark.filterwarnings("ignore:A value is trying to be set on a copy")
+@pytest.mark.parametrize("mode", EXEC_DATA_MODES)
+@pytest.mark.parametrize("code", MUTATIONS)
+def test_generated_code_cannot_change_the_callers_frame(mode, code):
+    original = _frame()
+    df = frame_for_execution(original, mode)
+
+    exec(code, {"__name__": "__main__"}, {"df": df, "pd": pd})
+
+    pd.testing.assert_frame_equal(original, _frame())
+
+
+@pytest.mark.parametrize("mode", EXEC_DATA_MODES)
+def test_changes_to_the_callers_frame_do_not_reach_the_copy(mode):
+    original = _frame()
+    df = frame_for_execution(original, mode)
+
+    original.loc[0, "销售额"] = 99.0
+
+    assert df.loc[0, "销售额"] == 0.0
+
+
+def test_cow_shares_columns_until_written():
+    original = _frame()
+    df = frame_for_execution(original, "cow")
+
+    assert np.shares_memory(df["销售额"].to_numpy(), original["销售额"].to_numpy())
+    df.loc[0, "销售额"] = 5.0
+    assert not np.shares_memory(df["销售额"].to_numpy(), original["销售额"].to_numpy())
+
+
+def test_copy_mode_copies_every_column():
+    original = _frame()
+    df = frame_for_execution(original, "copy")
+
+    assert not np.shares_memory(df["销售额"].to_numpy(), original["销售额"].to_numpy())
+
+
+def test_peak_rss_covers_an_allocation():
+    size = 64 * 1024 * 1024
+    with PeakRSSMonitor() as monitor:
+        block = np.ones(size, dtype=np.uint8)
+        # 保持一段时间，保证采样线程能看到
+        time.sleep(0.2)
+        del block
+
+    report = monitor.report
+    assert report.rss_before > 0
+    assert report.rss_peak >= max(report.rss_before, report.rss_after)
+    assert report.peak_increase >= size // 2
+    assert "峰值" in report.format()
@@ -0,0 +1,129 @@
+"""
+测试本地代码执行进程池：共享内存中的Arrow数据集、按版本重新挂载、超时替换进程
+"""
+
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import pandas as pd
+import pytest
+
+from exec_pool import _WORKER_DATASET_SLOTS, ExecutionPool, SharedDataset, _attach
+
+
+def _frame(seed: int = 0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "销售额": [1.5 + seed, 2.5, None],
+        "数量": [1, 2, 3 + seed],
+        "类别": ["甲", None, "丙"],
+        "日期": pd.to_datetime(["2024-01-01", "2024-02-01", None]),
+        "退货": [True, False, True],
+    })
+
+
+@pytest.fixture
+def pool():
+    pool = ExecutionPool(size=1, timeout=20)
+    yield pool
+    pool.shutdown()
+
+
+def _release(attached: OrderedDict):
+    """测试进程中挂载后释放（数值列引用共享内存，先释放DataFrame再关闭）"""
+    while attached:
+        _, (shm, df) = attached.popitem()
+        del df
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+def test_arrow_ipc_round_trip_through_shared_memory():
+    df = _frame()
+    dataset = SharedDataset(df, version=1)
+    attached = OrderedDict()
+    try:
+        restored = _attach(attached, dataset.name, dataset.version)
+        pd.testing.assert_frame_equal(restored, df, check_dtype=False)
+        assert list(restored.dtypes.map(str))[:2] == ["float64", "int64"]
+        # 同一版本再次挂载直接复用
+        assert _attach(attached, dataset.name, dataset.version) is restored
+        del restored
+    finally:
+        _release(attached)
+        dataset.close()
+
+
+def test_attach_keeps_a_bounded_number_of_datasets():
+    datasets = [SharedDataset(_frame(i), version=i) for i in range(_WORKER_DATASET_SLOTS + 1)]
+    attached = OrderedDict()
+    try:
+        for dataset in datasets:
+            _attach(attached, dataset.name, dataset.version)
+        assert len(attached) == _WORKER_DATASET_SLOTS
+        # 最早挂载的数据集被移出
+        assert (datasets[0].name, 0) not in attached
+        assert (datasets[-1].name, len(datasets) - 1) in attached
+    finally:
+        _release(attached)
+        for dataset in datasets:
+            dataset.close()
+
+
+def test_close_unlinks_shared_memory():
+    dataset = SharedDataset(_frame(), version=1)
+    name = dataset.name
+    dataset.close()
+    dataset.close()  # 重复关闭不报错
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_worker_sees_the_shared_dataset(pool):
+    dataset = SharedDataset(_frame(), version=1)
+    try:
+        result = pool.run(dataset, "print(df.shape, df['数量'].sum(), df['类别'].isna().sum())")
+        assert result.error is None
+        assert result.output.strip() == "(3, 5) 6 1"
+    finally:
+        dataset.close()
+
+
+def test_worker_reattaches_when_version_changes(pool):
+    first = SharedDataset(_frame(0), version=1)
+    second = SharedDataset(_frame(10), version=2)
+    try:
+        assert pool.run(first, "print(df['数量'].sum())").output.strip() == "6"
+        assert pool.run(second, "print(df['数量'].sum())").output.strip() == "16"
+        # 切换回旧版本仍使用旧数据
+        assert pool.run(first, "print(df['数量'].sum())").output.strip() == "6"
+    finally:
+        first.close()
+        second.close()
+
+
+def test_df_changes_do_not_leak_between_runs(pool):
+    dataset = SharedDataset(_frame(), version=1)
+    try:
+        result = pool.run(dataset, "df['数量'] = 0\ndf.drop(columns=['类别'], inplace=True)")
+        assert result.error is None
+        result = pool.run(dataset, "print(df['数量'].sum(), len(df.columns))")
+        assert result.output.strip() == "6 5"
+    finally:
+        dataset.close()
+
+
+def test_timed_out_worker_is_replaced():
+    pool = ExecutionPool(size=1, timeout=2)
+    dataset = SharedDataset(_frame(), version=1)
+    try:
+        with pytest.raises(TimeoutError):
+            pool.run(dataset, "while True:\n    pass")
+        # 唯一的工作进程被替换后池仍可用
+        result = pool.run(dataset, "print(len(df))")
+        assert result.error is None
+        assert result.output.strip() == "3"
+    finally:
+        dataset.close()
+        pool.shutdown()
@@ -0,0 +1,102 @@
+"""
+测试按线程隔离的pyplot状态：两个线程同时绘图、修改rcParams和seaborn主题时互不干扰
+"""
+
+import threading
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pytest
+import seaborn as sns
+
+from figure_isolation import isolated_figures, isolation_supported
+
+pytestmark = pytest.mark.skipif(not isolation_supported(), reason="当前matplotlib不支持隔离")
+
+
+def _run_in_threads(*targets):
+    errors = []
+
+    def wrap(target):
+        def run():
+            try:
+                target()
+            except BaseException as e:  # 断言失败也要传回主线程
+                errors.append(e)
+        return run
+
+    threads = [threading.Thread(target=wrap(target)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    if errors:
+        raise errors[0]
+
+
+def test_figures_and_rc_params_stay_in_their_thread():
+    barrier = threading.Barrier(2, timeout=10)
+    seen = {}
+
+    def draw(name: str, count: int, font_size: float, style: str):
+        with isolated_figures({"savefig.dpi": font_size * 10}):
+            sns.set_theme(style=style)
+            plt.rcParams["font.size"] = font_size
+            for _ in range(count):
+                plt.figure()
+                plt.plot([1, 2, 3])
+            # 两个线程都画完、改完参数后再检查
+            barrier.wait()
+            seen[name] = {
+                "figures": len(plt.get_fignums()),
+                "font.size": plt.rcParams["font.size"],
+                "dpi": plt.rcParams["savefig.dpi"],
+                "grid": plt.rcParams["axes.grid"],
+                "facecolor": plt.rcParams["axes.facecolor"],
+            }
+            barrier.wait()
+            plt.close("all")
+            assert plt.get_fignums() == []
+
+    _run_in_threads(lambda: draw("a", 2, 20.0, "whitegrid"), lambda: draw("b", 3, 8.0, "dark"))
+
+    assert seen["a"]["figures"] == 2 and seen["b"]["figures"] == 3
+    assert (seen["a"]["font.size"], seen["b"]["font.size"]) == (20.0, 8.0)
+    assert (seen["a"]["dpi"], seen["b"]["dpi"]) == (200.0, 80.0)
+    assert seen["a"]["grid"] is True and seen["b"]["grid"] is False
+    assert seen["a"]["facecolor"] != seen["b"]["facecolor"]
+
+
+def test_global_state_is_restored_after_the_scope():
+    """隔离外的图和rcParams不受影响，块内创建的图在退出时关闭"""
+    plt.close("all")
+    outside = plt.figure()
+    before = dict(matplotlib.rcParams)
+
+    def draw():
+        with isolated_figures({"font.size": 30.0}):
+            assert plt.get_fignums() == []
+            sns.set_theme(style="darkgrid")
+            plt.rcParams["axes.unicode_minus"] = not before["axes.unicode_minus"]
+            plt.figure()
+            plt.plot([1, 2])
+
+    try:
+        _run_in_threads(draw)
+
+        assert plt.get_fignums() == [outside.number]
+        assert dict(matplotlib.rcParams) == before
+    finally:
+        plt.close("all")
+
+
+def test_nested_scope_starts_from_outer_settings():
+    linewidth = matplotlib.rcParams["lines.linewidth"]
+    with isolated_figures({"font.size": 15.0}):
+        plt.figure()
+        with isolated_figures({"lines.linewidth": 7.0}):
+            assert plt.rcParams["font.size"] == 15.0
+            assert plt.get_fignums() == []
+            plt.figure()
+        assert plt.rcParams["lines.linewidth"] == linewidth
+        assert len(plt.get_fignums()) == 1
@@ -0,0 +1,123 @@
+"""
+测试中文字体查找结果的缓存和后台预热
+"""
+
+import json
+import threading
+
+import pytest
+
+import font_config
+
+pytest.importorskip("matplotlib")
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    """每个测试使用未初始化的模块状态"""
+    monkeypatch.setattr(font_config, "_font_rc", None)
+    monkeypatch.setattr(font_config, "_warm_thread", None)
+
+
+@pytest.fixture
+def scans(monkeypatch, tmp_path):
+    """把字体扫描换成计数的假实现，返回找到的字体文件"""
+    font_file = tmp_path / "fake.ttf"
+    font_file.write_bytes(b"")
+    calls = []
+
+    def scan():
+        calls.append(1)
+        return "Fake Hei", str(font_file)
+
+    monkeypatch.setattr(font_config, "_scan", scan)
+    return calls
+
+
+def test_resolved_font_is_saved_and_reused(tmp_path, scans):
+    cache_file = str(tmp_path / "cache" / "font.json")
+
+    assert font_config.resolve_cjk_font(cache_file) == "Fake Hei"
+    assert font_config.resolve_cjk_font(cache_file) == "Fake Hei"
+
+    assert len(scans) == 1
+    with open(cache_file, encoding="utf-8") as f:
+        assert json.load(f)["name"] == "Fake Hei"
+
+
+def test_stale_cache_is_rescanned(tmp_path, scans):
+    cache_file = str(tmp_path / "font.json")
+    font_config.resolve_cjk_font(cache_file)
+
+    with open(cache_file, encoding="utf-8") as f:
+        cached = json.load(f)
+    cached["matplotlib"] = "0.0"
+    with open(cache_file, "w", encoding="utf-8") as f:
+        json.dump(cached, f)
+
+    assert font_config.resolve_cjk_font(cache_file) == "Fake Hei"
+    assert len(scans) == 2
+
+
+def test_missing_font_is_not_cached(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(font_config, "_scan", lambda: calls.append(1) or (None, None))
+    cache_file = tmp_path / "font.json"
+
+    assert font_config.resolve_cjk_font(str(cache_file)) is None
+    assert font_config.resolve_cjk_font(str(cache_file)) is None
+
+    # 没找到时不保存，之后安装的字体可以被用上
+    assert len(calls) == 2
+    assert not cache_file.exists()
+
+
+def test_font_rc_is_computed_once(tmp_path, scans):
+    cache_file = str(tmp_path / "font.json")
+    rc = font_config.cjk_font_rc(cache_file)
+
+    assert rc["font.sans-serif"][0] == "Fake Hei"
+    assert rc["axes.unicode_minus"] is False
+    assert font_config.cjk_font_rc(cache_file) is rc
+    assert len(scans) == 1
+
+
+def test_async_warm_up_starts_once(tmp_path, monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def warm_up(cache_file):
+        calls.append(cache_file)
+        release.wait(10)
+
+    monkeypatch.setattr(font_config, "warm_up_fonts", warm_up)
+    cache_file = str(tmp_path / "font.json")
+    barrier = threading.Barrier(8)
+    threads = []
+
+    def start():
+        barrier.wait()
+        threads.append(font_config.warm_up_fonts_async(cache_file))
+
+    callers = [threading.Thread(target=start) for _ in range(8)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    assert len({id(thread) for thread in threads}) == 1
+    release.set()
+    threads[0].join(10)
+    # 预热结束后再调用也不会重新启动
+    assert font_config.warm_up_fonts_async(cache_file) is threads[0]
+    assert calls == [cache_file]
+
+
+def test_warm_up_failure_is_reported_not_raised(tmp_path, monkeypatch, capsys):
+    def fail(cache_file):
+        raise RuntimeError("no fonts")
+
+    monkeypatch.setattr(font_config, "warm_up_fonts", fail)
+    font_config.warm_up_fonts_async(str(tmp_path / "font.json")).join(10)
+
+    assert "字体预热失败: no fonts" in capsys.readouterr().out
@@ -0,0 +1,136 @@
+"""
+测试流式导入：分块读取、抽样和列类型
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from data_cleaning import clean_dataframe
+from ingest import _BottomKSampler, ingest, read_columnar
+
+
+def _csv(df: pd.DataFrame) -> io.BytesIO:
+    return io.BytesIO(df.to_csv(index=False).encode("utf-8"))
+
+
+def test_sampler_keeps_k_rows_in_file_order():
+    """分块抽样保留k行，且按原始行号排序"""
+    sampler = _BottomKSampler(10, seed=1)
+    for start in range(0, 100, 7):
+        sampler.add(pa.table({"i": np.arange(start, min(start + 7, 100))}))
+
+    values = sampler.result().column("i").to_pylist()
+    assert len(values) == 10
+    assert len(set(values)) == 10
+    assert values == sorted(values)
+
+
+def test_sampler_is_uniform():
+    """每行被抽中的概率相同（多次抽样的频率接近k/n）"""
+    counts = np.zeros(20)
+    for seed in range(2000):
+        sampler = _BottomKSampler(5, seed)
+        for start in range(0, 20, 3):
+            sampler.add(pa.table({"i": np.arange(start, min(start + 3, 20))}))
+        counts[sampler.result().column("i").to_numpy()] += 1
+
+    frequencies = counts / 2000
+    assert np.allclose(frequencies, 5 / 20, atol=0.05)
+
+
+def test_sampler_without_rows():
+    assert _BottomKSampler(5, seed=0).result().num_rows == 0
+
+
+def test_streamed_csv_matches_one_shot_read():
+    """分块读取的结果与一次性读取再清理的结果一致"""
+    df = pd.DataFrame({
+        "id": range(23),
+        "价格": [i * 1.5 for i in range(23)],
+        "城市": ["北京", "上海", None] * 7 + ["广州", "深圳"],
+    })
+
+    streamed = ingest(_csv(df), "csv", chunk_rows=5).df
+    expected = clean_dataframe(pd.read_csv(_csv(df)))
+
+    pd.testing.assert_frame_equal(streamed, expected)
+
+
+def test_column_blank_in_first_chunk_keeps_numeric_type():
+    """第一块中整列为空的数值列，合并后仍为数值列，缺失值填0"""
+    values = [None] * 5 + [1.5, 2.5, 3.5, 4.5, 5.5]
+    df = pd.DataFrame({"id": range(10), "金额": values})
+
+    streamed = ingest(_csv(df), "csv", chunk_rows=5).df
+    expected = clean_dataframe(pd.read_csv(_csv(df)))
+
+    assert streamed["金额"].dtype == expected["金额"].dtype
+    assert streamed["金额"].tolist() == [0.0] * 5 + [1.5, 2.5, 3.5, 4.5, 5.5]
+
+
+def test_column_blank_in_first_xlsx_chunk_keeps_numeric_type(tmp_path):
+    """xlsx逐行读取时同样按非空值确定列类型"""
+    path = tmp_path / "data.xlsx"
+    pd.DataFrame({"id": range(10), "金额": [None] * 5 + [1.5] * 5}).to_excel(path, index=False)
+
+    streamed = ingest(str(path), "xlsx", chunk_rows=5).df
+    expected = clean_dataframe(pd.read_excel(path))
+
+    assert streamed.dtypes.tolist() == expected.dtypes.tolist()
+    assert streamed["金额"].tolist() == expected["金额"].tolist()
+
+
+def test_ingest_samples_down_to_max_rows():
+    df = pd.DataFrame({"id": range(1000)})
+
+    result = ingest(_csv(df), "csv", chunk_rows=100, max_rows=50)
+
+    assert result.total_rows == 1000
+    assert result.sampled
+    assert len(result.df) == 50
+    assert result.df["id"].is_monotonic_increasing
+
+
+def test_read_columnar_selects_columns(tmp_path):
+    """Parquet和Feather文件可以只读取部分列"""
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    df.to_parquet(tmp_path / "data.parquet")
+    df.to_feather(tmp_path / "data.feather")
+
+    for name, file_type in (("data.parquet", "parquet"), ("data.feather", "feather")):
+        result = read_columnar(str(tmp_path / name), file_type, columns=["a"])
+        assert result.df.columns.tolist() == ["a"]
+        assert result.df["a"].tolist() == [1, 2, 3]
+        assert not result.sampled
+
+
+def test_unsized_xlsx_with_trailing_blank_cells(tmp_path):
+    """write_only写出的工作表没有记录尺寸，行末的空单元格被省略：结果与pd.read_excel一致，进度持续增加"""
+    from openpyxl import Workbook
+
+    path = tmp_path / "unsized.xlsx"
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["id", "城市", "金额", "备注"])
+    for i in range(2000):
+        # 每隔几行最后一列或最后两列为空
+        row = [i, ["北京", "上海"][i % 2], i * 1.5, f"备注{i}"]
+        if i % 3 == 0:
+            row[3] = None
+        if i % 7 == 0:
+            row[2] = row[3] = None
+        sheet.append(row)
+    workbook.save(path)
+
+    fractions = []
+    streamed = ingest(str(path), "xlsx", chunk_rows=200,
+                      progress=lambda fraction, _: fractions.append(fraction)).df
+    expected = clean_dataframe(pd.read_excel(path))
+
+    pd.testing.assert_frame_equal(streamed, expected)
+    assert fractions == sorted(fractions)
+    assert len(set(fractions)) > 5
+    assert 0 < fractions[0] < 1 and fractions[-1] == 1.0
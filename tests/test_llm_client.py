@@ -0,0 +1,82 @@
+"""
+测试Deepseek客户端：请求、流式读取和重试（使用本地模拟服务，不调用真实API）
+"""
+
+import json
+import socket
+
+import pytest
+import requests
+
+from llm_client import DeepseekClient, LLMRequestError, _RetryPolicy, _SSE_DONE, _parse_sse_line
+from stub_llm_server import StubLLMServer, build_reply
+
+MESSAGES = [{"role": "user", "content": "画一张销售额分布图"}]
+
+
+def _client(url: str, **kwargs) -> DeepseekClient:
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("backoff_max", 0.01)
+    return DeepseekClient("test-key", url, **kwargs)
+
+
+def test_chat_returns_response_json():
+    with StubLLMServer() as server:
+        client = _client(server.url)
+        result = client.chat(MESSAGES, temperature=0.1)
+        client.close()
+
+    assert result["choices"][0]["message"]["content"] == build_reply(MESSAGES[-1]["content"])
+
+
+def test_stream_chat_yields_full_reply():
+    """流式分块拼接后与完整回答相同（含中文）"""
+    with StubLLMServer() as server:
+        client = _client(server.url)
+        chunks = list(client.stream_chat(MESSAGES))
+        client.close()
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == build_reply(MESSAGES[-1]["content"])
+
+
+def test_retries_then_raises_on_server_errors():
+    """5xx按次数重试，用尽后抛出HTTP错误"""
+    with StubLLMServer(fail_rate=1.0) as server:
+        client = _client(server.url, max_retries=2)
+        with pytest.raises(requests.HTTPError):
+            client.chat(MESSAGES)
+        client.close()
+
+        assert server.requests == 3
+
+
+def test_connection_error_raises_after_retries():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    client = _client(f"http://127.0.0.1:{port}/v1/chat/completions", max_retries=1)
+    with pytest.raises(LLMRequestError):
+        client.chat(MESSAGES)
+    client.close()
+
+
+def test_retry_delay_honours_retry_after():
+    policy = _RetryPolicy(max_retries=3, backoff_base=0.5, backoff_max=8.0)
+
+    assert policy.delay(0, "2") == 2.0
+    assert policy.delay(0, "100") == 8.0
+    for attempt in range(5):
+        assert 0 <= policy.delay(attempt, "invalid") <= min(8.0, 0.5 * 2 ** attempt)
+
+
+def test_parse_sse_line():
+    chunk = {"choices": [{"delta": {"content": "你好"}}]}
+
+    assert _parse_sse_line(f"data: {json.dumps(chunk)}") == "你好"
+    assert _parse_sse_line("data: [DONE]") is _SSE_DONE
+    assert _parse_sse_line("") is None
+    assert _parse_sse_line(": keep-alive") is None
+    assert _parse_sse_line("data: {not json") is None
+    assert _parse_sse_line('data: {"choices": [{"delta": {}}]}') is None
@@ -0,0 +1,68 @@
+"""
+测试进程内LRU缓存
+"""
+
+import pandas as pd
+
+from memory_cache import MemoryLRUCache, object_size
+
+
+def test_get_put_and_stats():
+    cache = MemoryLRUCache(100, sizeof=len)
+    assert cache.put("a", "x" * 10)
+
+    assert cache.get("a") == "x" * 10
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 1, 1, 10)
+
+
+def test_evicts_least_recently_used():
+    cache = MemoryLRUCache(25, sizeof=len)
+    cache.put("a", "x" * 10)
+    cache.put("b", "x" * 10)
+    cache.get("a")
+
+    cache.put("c", "x" * 10)
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 20
+
+
+def test_oversized_entry_is_not_cached():
+    cache = MemoryLRUCache(10, sizeof=len)
+    cache.put("a", "x" * 5)
+
+    assert not cache.put("big", "x" * 11)
+    assert "big" not in cache
+    assert "a" in cache
+
+
+def test_replacing_a_key_updates_size():
+    cache = MemoryLRUCache(100, sizeof=len)
+    cache.put("a", "x" * 40)
+    cache.put("a", "x" * 10)
+
+    assert len(cache) == 1
+    assert cache.stats()["bytes"] == 10
+
+
+def test_pop_and_discard_where():
+    cache = MemoryLRUCache(100, sizeof=len)
+    for key in (("v1", "x"), ("v1", "y"), ("v2", "x")):
+        cache.put(key, "abc")
+
+    assert cache.pop(("v2", "x")) == "abc"
+    assert cache.pop(("v2", "x")) is None
+    assert cache.discard_where(lambda key: key[0] == "v1") == 2
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_object_size_counts_dataframe_contents():
+    df = pd.DataFrame({"文本": ["销售额" * 100] * 100})
+
+    assert object_size(df) > 100 * 100
+    assert object_size((df, df)) > 2 * object_size(df)
@@ -0,0 +1,158 @@
+"""
+测试耗时统计：Prometheus文本格式、span记录和请求结束
+"""
+
+import json
+import urllib.request
+
+import pytest
+
+import metrics
+from metrics import BUCKETS, NULL_TRACE, Registry, Trace
+
+
+def _lines(registry: Registry) -> list:
+    return registry.render().splitlines()
+
+
+def test_counter_rendering():
+    registry = Registry()
+    registry.inc("requests_total", kind="analyze_data", status="ok")
+    registry.inc("requests_total", 2, kind="analyze_data", status="ok")
+    registry.inc("requests_total", kind="load_excel", status="error")
+
+    assert _lines(registry) == [
+        "# TYPE oidiscover_requests_total counter",
+        'oidiscover_requests_total{kind="analyze_data",status="ok"} 3',
+        'oidiscover_requests_total{kind="load_excel",status="error"} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    for value in (0.001, 0.02, 0.02, 3.0, 100.0):
+        registry.observe("stage_seconds", value, stage="llm_call")
+
+    lines = _lines(registry)
+    assert lines[0] == "# TYPE oidiscover_stage_seconds histogram"
+    buckets = {}
+    for line in lines[1:len(BUCKETS) + 2]:
+        labels, value = line.rsplit(" ", 1)
+        buckets[labels.split('le="')[1].rstrip('"}')] = int(value)
+
+    assert buckets["0.005"] == 1
+    assert buckets["0.01"] == 1
+    assert buckets["0.025"] == 3
+    assert buckets["2.5"] == 3
+    assert buckets["5.0"] == 4
+    assert buckets["60.0"] == 4
+    # 超过最大分桶的值只计入+Inf
+    assert buckets["+Inf"] == 5
+    assert 'oidiscover_stage_seconds_count{stage="llm_call"} 5' in lines
+    assert 'oidiscover_stage_seconds_sum{stage="llm_call"} 103.041000' in lines
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.inc("errors_total", stage='say "hi"\\\nbye')
+
+    assert _lines(registry)[1] == 'oidiscover_errors_total{stage="say \\"hi\\"\\\\\\nbye"} 1'
+
+
+def test_empty_registry_renders_a_newline():
+    assert Registry().render() == "\n"
+
+
+def test_trace_records_spans(tmp_path):
+    registry = Registry()
+    log_file = tmp_path / "trace.jsonl"
+    trace = Trace("analyze_data", registry, str(log_file))
+
+    with trace.span("prompt_build"):
+        pass
+    with pytest.raises(ValueError):
+        with trace.span("code_exec"):
+            raise ValueError("boom")
+    trace.set(cached=False)
+    trace.fail("boom")
+    trace.finish()
+
+    record = json.loads(log_file.read_text(encoding="utf-8"))
+    assert record["kind"] == "analyze_data"
+    assert record["status"] == "error"
+    assert record["error"] == "boom"
+    assert record["cached"] is False
+    assert [(span["stage"], span["ok"]) for span in record["spans"]] == [
+        ("prompt_build", True), ("code_exec", False)]
+    assert record["spans"][0]["start_ms"] <= record["spans"][1]["start_ms"]
+
+    lines = _lines(registry)
+    assert 'oidiscover_stage_seconds_count{stage="code_exec"} 1' in lines
+    assert 'oidiscover_stage_errors_total{stage="code_exec"} 1' in lines
+    assert 'oidiscover_requests_total{kind="analyze_data",status="error"} 1' in lines
+
+
+def test_cancelled_span_is_not_an_error():
+    registry = Registry()
+    trace = Trace("analyze_data", registry, None)
+
+    def stream():
+        with trace.span("llm_call"):
+            yield 1
+
+    generator = stream()
+    next(generator)
+    generator.close()
+
+    assert trace.spans[0]["ok"] is True
+    assert "stage_errors_total" not in registry.render()
+
+
+def test_finish_is_idempotent(tmp_path):
+    registry = Registry()
+    log_file = tmp_path / "trace.jsonl"
+    trace = Trace("load_excel", registry, str(log_file))
+
+    trace.finish()
+    trace.finish("cancelled")
+
+    assert len(log_file.read_text(encoding="utf-8").splitlines()) == 1
+    assert trace.status == "ok"
+    lines = _lines(registry)
+    assert 'oidiscover_request_seconds_count{kind="load_excel"} 1' in lines
+    assert 'oidiscover_requests_total{kind="load_excel",status="ok"} 1' in lines
+
+
+def test_null_trace_when_disabled(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", False)
+    trace = metrics.start_trace("analyze_data")
+
+    assert trace is NULL_TRACE
+    with trace.span("llm_call"):
+        pass
+    trace.finish()
+
+
+def test_start_trace_when_enabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(metrics, "_enabled", False)
+    monkeypatch.setattr(metrics, "_log_file", None)
+    metrics.configure(True, str(tmp_path / "trace.jsonl"))
+
+    trace = metrics.start_trace("analyze_data")
+    assert isinstance(trace, Trace)
+    assert trace.request_id != metrics.start_trace("analyze_data").request_id
+
+
+def test_metrics_endpoint(monkeypatch):
+    registry = Registry()
+    registry.inc("requests_total", kind="analyze_data", status="ok")
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    httpd = metrics.start_http_server(0, host="127.0.0.1")
+    try:
+        port = httpd.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert response.read().decode("utf-8") == registry.render()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
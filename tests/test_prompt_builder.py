@@ -0,0 +1,80 @@
+"""
+测试按token预算构建提示词中的数据信息
+"""
+
+import numpy as np
+import pandas as pd
+
+from dataset_summary import DatasetSummary
+from prompt_builder import build_data_context, column_index, estimate_tokens
+
+
+def _wide_summary(n_columns: int = 300) -> DatasetSummary:
+    data = {f"metric_{i}": np.arange(50) * i for i in range(n_columns)}
+    data["销售额"] = np.linspace(0, 100, 50)
+    data["城市"] = ["北京", "上海"] * 25
+    data["customerName"] = [f"客户{i}" for i in range(50)]
+    return DatasetSummary(pd.DataFrame(data), version=1)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("销售额") == 3
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("销售abcdefgh") == 4
+
+
+def test_rank_prefers_matching_column_names():
+    index = column_index(_wide_summary())
+
+    assert index.names[index.rank("各月的销售额趋势")[0]] == "销售额"
+    # 驼峰列名按单词匹配
+    assert index.names[index.rank("top customer by revenue")[0]] == "customerName"
+    # 英文拼写不完全一致时按相似度匹配
+    assert index.names[index.rank("custmer list")[0]] == "customerName"
+
+
+def test_rank_matches_text_values():
+    """问题中提到的取值使其所在的文本列排在前面"""
+    index = column_index(_wide_summary())
+
+    assert index.names[index.rank("只看上海的订单")[0]] == "城市"
+
+
+def test_rank_keeps_original_order_without_matches():
+    index = column_index(_wide_summary(5))
+
+    assert index.rank("随便问问") == list(range(len(index.names)))
+
+
+def test_index_is_built_once_per_summary():
+    summary = _wide_summary(5)
+
+    assert column_index(summary) is column_index(summary)
+
+
+def test_context_stays_within_budget():
+    summary = _wide_summary()
+    for budget in (200, 800, 3000):
+        context = build_data_context(summary, "销售额趋势", token_budget=budget, max_detailed_columns=30)
+
+        assert context.tokens <= budget
+        assert context.detailed_columns[0] == "销售额"
+        assert context.total_columns == 303
+        assert len(context.detailed_columns) <= 30
+
+
+def test_context_always_details_one_column():
+    context = build_data_context(_wide_summary(), "销售额", token_budget=1)
+
+    assert context.detailed_columns == ["销售额"]
+
+
+def test_small_table_lists_every_column():
+    summary = DatasetSummary(pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}), version=1)
+
+    context = build_data_context(summary, "a的平均值")
+
+    assert context.detailed_columns == ["a", "b"]
+    assert "其他列" not in context.text
+    assert "数据规模: 2行 × 2列" in context.text
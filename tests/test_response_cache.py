@@ -0,0 +1,67 @@
+"""
+测试模型回答缓存：问题规范化、缓存键和磁盘读写
+"""
+
+from response_cache import ResponseCache, normalize_query
+
+CONTEXT = [{"role": "user", "content": "上一个问题"}, {"role": "assistant", "content": "上一个回答"}]
+
+
+def _key(query="各城市的销售额是多少？", **overrides):
+    args = {
+        "fingerprint": "abc",
+        "query": query,
+        "context": CONTEXT,
+        "system_prompt": "系统提示词",
+        "model": "deepseek-chat",
+        "temperature": 0.1,
+        "prompt_options": {"token_budget": 3000, "max_detailed_columns": 30},
+    }
+    args.update(overrides)
+    return ResponseCache.make_key(**args)
+
+
+def test_normalize_query():
+    """全角/半角、大小写、空白和末尾标点不影响结果"""
+    assert normalize_query("  Show  ＴＯＰ 5？ ") == normalize_query("show top 5")
+    assert normalize_query("销售额趋势!!") == "销售额趋势"
+    assert normalize_query("销售额 趋势") != normalize_query("销售额趋势")
+
+
+def test_key_ignores_formatting_differences():
+    assert _key("各城市的销售额是多少？") == _key("各城市的销售额是多少")
+    assert _key(context=[{"role": "user", "content": "上一个问题 "}, CONTEXT[1]]) == _key()
+
+
+def test_key_depends_on_everything_that_changes_the_answer():
+    base = _key()
+    assert _key(fingerprint="other") != base
+    assert _key("每个城市的订单数") != base
+    assert _key(context=[]) != base
+    assert _key(system_prompt="新的提示词") != base
+    assert _key(model="deepseek-reasoner") != base
+    assert _key(temperature=0.7) != base
+    assert _key(prompt_options={"token_budget": 1500, "max_detailed_columns": 30}) != base
+    assert _key(prompt_options={"token_budget": 3000, "max_detailed_columns": 10}) != base
+
+
+def test_round_trip_and_latency_saved(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=1024 * 1024)
+    key = _key()
+
+    assert cache.get(key) is None
+    cache.put(key, '```json\n{"analysis": "结论"}\n```', latency=1.5)
+
+    assert cache.get(key) == '```json\n{"analysis": "结论"}\n```'
+    assert cache.get(key) is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["latency_saved"] == 3.0
+
+
+def test_corrupt_entry_is_discarded(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=1024)
+    cache.store.put_bytes("k", b"{broken")
+
+    assert cache.get("k") is None
+    assert not cache.store.path_for("k").exists()
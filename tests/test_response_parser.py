@@ -0,0 +1,53 @@
+"""
+测试模型回答的解析（含流式输出中未生成完的JSON）
+"""
+
+import json
+
+from response_parser import extract_json_block, partial_json_string
+
+REPLY = json.dumps({
+    "analysis": "销售额呈\"上升\"趋势\n按月汇总",
+    "code": "print(df['销售额'].sum())\nprint('a\\\\b')",
+    "has_visualization": False,
+}, ensure_ascii=False)
+
+
+def test_extract_json_block():
+    assert extract_json_block(f"说明\n```json\n{REPLY}\n```\n结尾") == REPLY
+    assert extract_json_block(REPLY) == REPLY
+    # 代码块未闭合时返回原文
+    assert extract_json_block("```json\n{") == "```json\n{"
+
+
+def test_complete_field_matches_json_loads():
+    expected = json.loads(REPLY)
+
+    assert partial_json_string(REPLY, "analysis") == (expected["analysis"], True)
+    assert partial_json_string(REPLY, "code") == (expected["code"], True)
+
+
+def test_missing_field():
+    assert partial_json_string('{"analysis": "x"', "code") == (None, False)
+    assert partial_json_string('{"code', "code") == (None, False)
+
+
+def test_every_prefix_decodes_to_a_prefix_of_the_value():
+    """流式输出的任意前缀都能解码，且结果是最终值的前缀；字段闭合后标记为完整"""
+    expected = json.loads(REPLY)["code"]
+    for end in range(len(REPLY) + 1):
+        value, complete = partial_json_string(REPLY[:end], "code")
+        if value is None:
+            continue
+        assert expected.startswith(value)
+        if complete:
+            assert value == expected
+    assert partial_json_string(REPLY, "code")[1]
+
+
+def test_partial_escapes_are_dropped():
+    """末尾不完整的转义序列不输出"""
+    assert partial_json_string('{"code": "a\\', "code") == ("a", False)
+    assert partial_json_string('{"code": "a\\u4e', "code") == ("a", False)
+    assert partial_json_string('{"code": "a\\u4e2d', "code") == ("a中", False)
+    assert partial_json_string('{"code": "a\\n', "code") == ("a\n", False)
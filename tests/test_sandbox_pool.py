@@ -0,0 +1,207 @@
+"""
+测试会话级沙箱池（使用LocalSandbox，无需网络）
+"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from sandbox_pool import LocalSandbox, SandboxPool
+
+
+def _serializer(df: pd.DataFrame, calls: list):
+    def serialize() -> bytes:
+        calls.append(1)
+        return df.to_parquet(index=False)
+    return serialize
+
+
+@pytest.fixture
+def pool():
+    pool = SandboxPool(LocalSandbox, idle_ttl=300, spare=0, exec_timeout=20)
+    yield pool
+    pool.shutdown()
+
+
+def _wait_for(condition, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.1)
+
+
+def test_dataset_uploaded_once_per_version(pool):
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    calls = []
+
+    with pool.session("s1") as sandbox:
+        sandbox.ensure_dataset(1, _serializer(df, calls))
+        sandbox.ensure_dataset(1, _serializer(df, calls))
+    with pool.session("s1") as sandbox:
+        sandbox.ensure_dataset(1, _serializer(df, calls))
+        assert len(calls) == 1
+
+        sandbox.ensure_dataset(2, _serializer(df.assign(b=1), calls))
+        assert len(calls) == 2
+        result = sandbox.run_code("print(list(df.columns))")
+        assert result.stdout.strip() == "['a', 'b']"
+
+
+def test_df_is_reset_between_runs(pool):
+    with pool.session("s1") as sandbox:
+        sandbox.ensure_dataset(1, _serializer(pd.DataFrame({"a": [1, 2, 3]}), []))
+        first = sandbox.run_code("df['a'] = 0\ndf.drop(index=0, inplace=True)\nprint(df['a'].sum())")
+        second = sandbox.run_code("print(len(df), df['a'].sum())")
+
+    assert first.stdout.strip() == "0"
+    assert second.stdout.strip() == "3 6"
+
+
+def test_figures_are_collected(pool):
+    with pool.session("s1") as sandbox:
+        sandbox.ensure_dataset(1, _serializer(pd.DataFrame({"a": [1, 2, 3]}), []))
+        sandbox.run_code("df.plot()\nplt.figure()\nplt.plot([1, 2])")
+        figures = sandbox.read_figures()
+
+    assert [figure.extension for figure in figures] == [".png", ".png"]
+    assert all(figure.data.startswith(b"\x89PNG") for figure in figures)
+
+
+def test_timeout_restarts_and_rewarms_the_sandbox():
+    """超时后子进程被替换并重新预热，数据集在下次执行前重新上传"""
+    pool = SandboxPool(LocalSandbox, idle_ttl=300, spare=0, exec_timeout=2)
+    calls = []
+    serialize = _serializer(pd.DataFrame({"a": [1, 2]}), calls)
+    try:
+        with pool.session("s1") as sandbox:
+            sandbox.ensure_dataset(1, serialize)
+            old_process = sandbox.sandbox._process
+
+            result = sandbox.run_code("import time\ntime.sleep(60)")
+
+            assert result.error.startswith("TimeoutError")
+            assert not old_process.is_alive()
+            assert sandbox.dataset_version is None
+
+            sandbox.ensure_dataset(1, serialize)
+            # 预热代码重新执行过：plt和中文字体设置都可用
+            result = sandbox.run_code("print(len(df), plt.rcParams['axes.unicode_minus'])")
+            assert result.error is None
+            assert result.stdout.strip() == "2 False"
+        assert len(calls) == 2
+    finally:
+        pool.shutdown()
+
+
+def test_idle_sessions_and_spares_are_reaped():
+    pool = SandboxPool(LocalSandbox, idle_ttl=0.5, spare=1)
+    try:
+        pool._refill()
+        with pool.session("s1") as session_sandbox:
+            pass
+        pool._refill()
+        spare = pool._spares[0]
+        time.sleep(0.6)
+
+        pool.reap_idle()
+
+        assert not session_sandbox.sandbox._process.is_alive()
+        assert not spare.sandbox._process.is_alive()
+        assert pool.stats()["sessions"] == 0
+        # 回收备用沙箱后补足一个新的
+        _wait_for(lambda: pool.stats()["spares"] == 1)
+        assert pool._spares[0] is not spare
+    finally:
+        pool.shutdown()
+
+
+def test_leased_sandbox_is_not_reaped_while_in_use():
+    pool = SandboxPool(LocalSandbox, idle_ttl=0.5, spare=0)
+    try:
+        with pool.session("s1") as sandbox:
+            sandbox.ensure_dataset(1, _serializer(pd.DataFrame({"a": [1]}), []))
+            time.sleep(0.6)
+            pool.reap_idle()
+            assert sandbox.run_code("print(1)").stdout.strip() == "1"
+        assert pool.stats()["sessions"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_each_session_gets_its_own_lease_under_concurrency(pool):
+    """不同会话并行使用各自的沙箱；同一会话的调用串行执行"""
+    pids = {}
+    intervals = []
+    lock = threading.Lock()
+
+    def use(session_id: str):
+        with pool.session(session_id) as sandbox:
+            started = time.monotonic()
+            sandbox.ensure_dataset(1, _serializer(pd.DataFrame({"a": [1]}), []))
+            pid = sandbox.run_code("import os\nprint(os.getpid())").stdout.strip()
+            time.sleep(0.2)
+            with lock:
+                pids.setdefault(session_id, set()).add(pid)
+                if session_id == "shared":
+                    intervals.append((started, time.monotonic()))
+
+    threads = [threading.Thread(target=use, args=(sid,)) for sid in ("a", "b", "c", "shared", "shared")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=120)
+
+    assert all(len(values) == 1 for values in pids.values())
+    assert len({next(iter(values)) for values in pids.values()}) == 4
+    assert pool.stats()["sessions"] == 4
+    (start1, end1), (start2, end2) = sorted(intervals)
+    assert end1 <= start2
+
+
+class TimeoutException(Exception):
+    """与e2b.TimeoutException同名的异常"""
+
+
+class _RemoteSandbox:
+    """模拟E2B沙箱：执行超时抛出TimeoutException，记录收到的超时参数"""
+
+    def __init__(self):
+        self.local = LocalSandbox()
+        self.filesystem = self.local.filesystem
+        self.timeouts = []
+        self.closed = False
+
+    def run_code(self, code: str, timeout=None):
+        self.timeouts.append(timeout)
+        if "hang()" in code:
+            raise TimeoutException("execution timed out")
+        return self.local.run_code(code)
+
+    def close(self):
+        self.closed = True
+        self.local.close()
+
+
+def test_remote_timeout_replaces_the_sandbox():
+    """远程沙箱执行时传入超时，超时后关闭卡住的沙箱并换一个新的预热沙箱"""
+    pool = SandboxPool(_RemoteSandbox, idle_ttl=300, spare=0, exec_timeout=5)
+    try:
+        with pool.session("s1") as sandbox:
+            sandbox.ensure_dataset(1, _serializer(pd.DataFrame({"a": [1, 2]}), []))
+            stuck = sandbox.sandbox
+
+            result = sandbox.run_code("hang()")
+
+            assert 5 in stuck.timeouts
+            assert stuck.closed
+            assert result.error.startswith("TimeoutError")
+            assert sandbox.sandbox is not stuck
+            assert sandbox.dataset_version is None
+
+            sandbox.ensure_dataset(1, _serializer(pd.DataFrame({"a": [1, 2]}), []))
+            assert sandbox.run_code("print(len(df))").stdout.strip() == "2"
+        assert pool.stats()["sessions"] == 1
+    finally:
+        pool.shutdown()
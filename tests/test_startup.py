@@ -0,0 +1,51 @@
+"""
+测试启动加速工具：依赖检查、启动计时、后台预加载和导入耗时报告
+"""
+
+import sys
+
+from startup import StartupTimer, import_time_report, import_times, missing_packages, prewarm_imports_async
+
+
+def test_missing_packages_reads_metadata_only():
+    assert missing_packages(["pytest", "surely-not-an-installed-package"]) == \
+        ["surely-not-an-installed-package"]
+
+
+def test_startup_timer_records_stages():
+    timer = StartupTimer()
+    first = timer.mark("导入")
+    second = timer.mark("界面")
+
+    assert [stage for stage, _ in timer.stages] == ["导入", "界面"]
+    assert abs(timer.total - (first + second)) < 1e-9
+    assert timer.format().startswith("⏱️ 启动耗时")
+
+
+def test_prewarm_imports_in_background(tmp_path, monkeypatch, capsys):
+    """后台线程导入模块，导入失败只输出警告"""
+    (tmp_path / "prewarm_target.py").write_text("VALUE = 42\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "prewarm_target", raising=False)
+
+    thread = prewarm_imports_async(["not_a_real_module_xyz", "prewarm_target"])
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert sys.modules["prewarm_target"].VALUE == 42
+    assert "not_a_real_module_xyz" in capsys.readouterr().out
+
+
+def test_import_times_parses_importtime_output():
+    entries = import_times("json")
+
+    names = [name for name, _, _, _ in entries]
+    assert "json" in names
+    assert all(self_us >= 0 and cumulative_us >= self_us for _, self_us, cumulative_us, _ in entries)
+
+
+def test_import_time_report_lists_packages():
+    report = import_time_report("json", top=3)
+
+    assert report.startswith("📦 导入 json")
+    assert len(report.splitlines()) <= 4